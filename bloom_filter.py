@@ -0,0 +1,217 @@
+# bloom_filter.py
+# Provides a probabilistic membership filter for product IDs.
+# SRP: BloomFilter only answers "definitely absent" / "possibly present" questions and
+# knows how to convert itself to and from its JSON representation.
+
+import base64
+import hashlib
+import json
+import math
+from typing import Iterable, Iterator, Optional
+
+from file_handler import FileHandler
+
+DEFAULT_FALSE_POSITIVE_RATE: float = 0.01
+DEFAULT_CAPACITY: int = 1024
+
+
+class BloomFilter:
+    """
+    A Bloom filter over integer keys.
+
+    A negative answer is always correct, a positive answer may be wrong with a
+    probability close to the configured false-positive rate as long as the number
+    of inserted keys stays below the capacity.
+
+    Attributes:
+    - _capacity: The number of keys the filter was sized for.
+    - _false_positive_rate: The target false-positive rate at full capacity.
+    - _bit_count: The number of bits in the filter.
+    - _hash_count: The number of bit positions set per key.
+    - _bits: The bit array backing the filter.
+    - _count: The number of keys added so far.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+    ):
+        """
+        Initialize an empty BloomFilter sized for the given capacity.
+
+        :param capacity: The expected number of keys.
+        :param false_positive_rate: The acceptable false-positive rate, between 0 and 1.
+        :raises ValueError: If capacity or false_positive_rate is out of range.
+        """
+        if capacity <= 0:
+            raise ValueError("Bloom filter capacity must be positive.")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(
+                "Bloom filter false-positive rate must be between 0 and 1."
+            )
+
+        self._capacity = capacity
+        self._false_positive_rate = false_positive_rate
+        self._bit_count = max(
+            8,
+            math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)),
+        )
+        self._hash_count = max(1, round(self._bit_count / capacity * math.log(2)))
+        self._bits = bytearray((self._bit_count + 7) // 8)
+        self._count = 0
+
+    @classmethod
+    def from_keys(
+        cls,
+        keys: Iterable[int],
+        capacity: int = DEFAULT_CAPACITY,
+        false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+    ) -> "BloomFilter":
+        """
+        Build a filter containing the given keys.
+
+        :param keys: The keys to add.
+        :param capacity: The minimum capacity of the filter.
+        :param false_positive_rate: The target false-positive rate.
+        :return: A new BloomFilter containing every key.
+        """
+        keys = list(keys)
+        bloom = cls(max(capacity, len(keys)), false_positive_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def false_positive_rate(self) -> float:
+        return self._false_positive_rate
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def is_saturated(self) -> bool:
+        """
+        Tell whether more keys were added than the filter was sized for.
+
+        :return: True if the actual false-positive rate exceeds the target.
+        """
+        return self._count > self._capacity
+
+    def _positions(self, key: int) -> Iterator[int]:
+        # Double hashing: two 64-bit halves of one digest generate all k positions.
+        digest = hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self._hash_count):
+            yield (h1 + i * h2) % self._bit_count
+
+    def add(self, key: int) -> None:
+        """
+        Add a key to the filter.
+
+        :param key: The key to add.
+        """
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def might_contain(self, key: int) -> bool:
+        """
+        Check whether a key may have been added.
+
+        :param key: The key to check.
+        :return: False if the key was definitely never added, True otherwise.
+        """
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __contains__(self, key: int) -> bool:
+        return self.might_contain(key)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the filter to a JSON-serializable dictionary.
+
+        :return: A dictionary describing the filter.
+        """
+        return {
+            "capacity": self._capacity,
+            "false_positive_rate": self._false_positive_rate,
+            "bit_count": self._bit_count,
+            "hash_count": self._hash_count,
+            "count": self._count,
+            "bits": base64.b64encode(bytes(self._bits)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BloomFilter":
+        """
+        Rebuild a filter from the output of to_dict.
+
+        :param data: A dictionary produced by to_dict.
+        :return: The restored BloomFilter.
+        :raises ValueError: If the dictionary does not describe a valid filter.
+        """
+        try:
+            bloom = cls(int(data["capacity"]), float(data["false_positive_rate"]))
+            bits = bytearray(base64.b64decode(data["bits"]))
+            bloom._count = int(data["count"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid Bloom filter data: {e}")
+
+        if (
+            int(data.get("bit_count", -1)) != bloom._bit_count
+            or int(data.get("hash_count", -1)) != bloom._hash_count
+            or len(bits) != len(bloom._bits)
+        ):
+            raise ValueError("Invalid Bloom filter data: size mismatch.")
+        bloom._bits = bits
+        return bloom
+
+    def save(
+        self, file_handler: FileHandler, fingerprint: Optional[str] = None
+    ) -> None:
+        """
+        Persist the filter as JSON using the given FileHandler.
+
+        :param file_handler: The FileHandler to write to.
+        :param fingerprint: An optional fingerprint of the keys, e.g. a content hash
+            of the data the filter was built from, checked again by load.
+        """
+        data = self.to_dict()
+        if fingerprint is not None:
+            data["fingerprint"] = fingerprint
+        file_handler.write(json.dumps(data))
+
+    @classmethod
+    def load(
+        cls, file_handler: FileHandler, fingerprint: Optional[str] = None
+    ) -> Optional["BloomFilter"]:
+        """
+        Load a filter previously written by save.
+
+        :param file_handler: The FileHandler to read from.
+        :param fingerprint: If given, the filter is only loaded if it was saved with
+            the same fingerprint.
+        :return: The restored BloomFilter, or None if the file is missing, unreadable
+            or was saved for other keys.
+        """
+        data_str = file_handler.read()
+        if not data_str:
+            return None
+        try:
+            data = json.loads(data_str)
+            if fingerprint is not None and data.get("fingerprint") != fingerprint:
+                return None
+            return cls.from_dict(data)
+        except (json.JSONDecodeError, AttributeError, ValueError):
+            return None
@@ -0,0 +1,304 @@
+# catalog_export.py
+# Streams a catalog to CSV, JSON Lines or a simple columnar binary file.
+#
+# Usage: python catalog_export.py DATA_FILE OUTPUT [--format csv|jsonl|columnar]
+#        [--fields id,name] [--where "quantity < 5"] [--workers N]
+# SRP: The export pipeline cuts products into chunks, encodes the chunks in worker
+# processes and writes them in order; it never reads or changes the repository itself.
+
+import argparse
+import collections
+import csv
+import io
+import json
+import os
+import struct
+import sys
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from constants_messages import ProductMessages
+from file_handler import FileHandler
+from product import Product
+from product_query import FIELDS, Predicate, parse_query, resolve_field
+from product_repository import ProductRepository
+from storage_backends import open_loader
+
+FORMAT_CSV: str = "csv"
+FORMAT_JSONL: str = "jsonl"
+FORMAT_COLUMNAR: str = "columnar"
+FORMATS: Tuple[str, ...] = (FORMAT_CSV, FORMAT_JSONL, FORMAT_COLUMNAR)
+
+DEFAULT_CHUNK_SIZE: int = 10_000
+
+# A columnar file starts with COLUMNAR_MAGIC and a header: its length (uint32) and
+# the JSON list of field names. Blocks follow, each the number of rows and the byte
+# length of its columns (both uint32), then every column in field order. Integer
+# columns are little-endian int64 values; text columns are rows + 1 uint32 offsets
+# into the UTF-8 text that follows them. All lengths are big-endian.
+COLUMNAR_MAGIC: bytes = b"PRODCOL1"
+_LENGTH = struct.Struct(">I")
+_BLOCK_HEADER = struct.Struct(">II")
+TEXT_FIELDS: Tuple[str, ...] = ("name",)
+
+Row = Tuple
+ProductFilter = Callable[[Product], bool]
+ProgressCallback = Callable[[int], None]
+
+
+def resolve_fields(fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """
+    Map a projection to canonical field names.
+
+    :param fields: Field names or aliases, e.g. ["id", "price"], or None for all.
+    :return: The canonical field names in the given order.
+    :raises QueryError: If a field is unknown.
+    """
+    if fields is None:
+        return FIELDS
+    return tuple(resolve_field(field) for field in fields)
+
+
+def encode_chunk(fmt: str, fields: Sequence[str], rows: List[Row]) -> bytes:
+    """
+    Encode projected rows in an export format; runs in the worker processes.
+
+    :param fmt: One of FORMATS.
+    :param fields: The field names, in the order of the row values.
+    :param rows: The rows to encode.
+    :return: The encoded rows, without any file header.
+    """
+    if fmt == FORMAT_CSV:
+        text = io.StringIO()
+        csv.writer(text, lineterminator="\n").writerows(rows)
+        return text.getvalue().encode("utf-8")
+    if fmt == FORMAT_JSONL:
+        return "".join(
+            json.dumps(dict(zip(fields, row))) + "\n" for row in rows
+        ).encode("utf-8")
+    return _encode_block(fields, rows)
+
+
+def _encode_block(fields: Sequence[str], rows: List[Row]) -> bytes:
+    columns = []
+    for position, field in enumerate(fields):
+        values = [row[position] for row in rows]
+        if field in TEXT_FIELDS:
+            encoded = [value.encode("utf-8") for value in values]
+            offsets = array("I", [0])
+            for value in encoded:
+                offsets.append(offsets[-1] + len(value))
+            columns.append(_little_endian(offsets).tobytes() + b"".join(encoded))
+        else:
+            columns.append(_little_endian(array("q", values)).tobytes())
+    body = b"".join(columns)
+    return _BLOCK_HEADER.pack(len(rows), len(body)) + body
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def file_header(fmt: str, fields: Sequence[str]) -> bytes:
+    """
+    Build what an export file starts with.
+
+    :param fmt: One of FORMATS.
+    :param fields: The exported field names.
+    :return: The CSV header line, the columnar header, or nothing for JSON Lines.
+    """
+    if fmt == FORMAT_CSV:
+        return encode_chunk(FORMAT_CSV, fields, [tuple(fields)])
+    if fmt == FORMAT_COLUMNAR:
+        header = json.dumps(list(fields)).encode("utf-8")
+        return COLUMNAR_MAGIC + _LENGTH.pack(len(header)) + header
+    return b""
+
+
+def read_columnar(filename: str) -> Iterator[Dict[str, list]]:
+    """
+    Read a columnar export one block at a time.
+
+    :param filename: The path of the file.
+    :return: An iterator over blocks, each a dict of column values by field name.
+    :raises ValueError: If the file is not a columnar export.
+    """
+    with open(filename, "rb") as file:
+        if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{filename} is not a columnar export.")
+        (length,) = _LENGTH.unpack(file.read(_LENGTH.size))
+        fields = json.loads(file.read(length))
+        while True:
+            header = file.read(_BLOCK_HEADER.size)
+            if not header:
+                return
+            rows, length = _BLOCK_HEADER.unpack(header)
+            body = memoryview(file.read(length))
+            block = {}
+            position = 0
+            for field in fields:
+                if field in TEXT_FIELDS:
+                    offsets = array("I")
+                    offsets.frombytes(body[position : position + (rows + 1) * 4])
+                    _little_endian(offsets)
+                    position += len(offsets) * 4
+                    text = bytes(body[position : position + offsets[-1]])
+                    block[field] = [
+                        text[start:end].decode("utf-8")
+                        for start, end in zip(offsets, offsets[1:])
+                    ]
+                    position += offsets[-1]
+                else:
+                    values = array("q")
+                    values.frombytes(body[position : position + rows * 8])
+                    block[field] = _little_endian(values).tolist()
+                    position += rows * 8
+            yield block
+
+
+def iter_chunks(
+    products: Iterable[Product],
+    fields: Sequence[str],
+    where: Optional[ProductFilter] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[List[Row]]:
+    """
+    Filter and project products into lists of plain tuples.
+
+    :param products: The products to export.
+    :param fields: The canonical field names to keep.
+    :param where: A function selecting the products to export, or None for all.
+    :param chunk_size: The number of rows per chunk.
+    :return: An iterator over chunks of at most chunk_size rows.
+    """
+    chunk: List[Row] = []
+    for product in products:
+        if where is not None and not where(product):
+            continue
+        chunk.append(tuple(getattr(product, field) for field in fields))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_products(
+    products: Iterable[Product],
+    filename: str,
+    fmt: str = FORMAT_CSV,
+    fields: Optional[Iterable[str]] = None,
+    where=None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> int:
+    """
+    Write products to an export file, encoding chunks in parallel.
+
+    At most two chunks per worker are in flight at any time and the encoded chunks
+    are written in order as they finish, so memory does not grow with the catalog.
+    The file is replaced atomically once the export is complete.
+
+    :param products: The products to export, e.g. a repository snapshot.
+    :param filename: The path of the export file.
+    :param fmt: One of FORMATS.
+    :param fields: The fields to export, by name or alias, or None for all.
+    :param where: A Predicate or function selecting the products, or None for all.
+    :param chunk_size: The number of rows encoded per task.
+    :param workers: The number of worker processes, None for one per CPU; 1 or less
+        encodes in the calling process.
+    :param progress: Called with the total number of rows written after every chunk.
+    :return: The number of rows exported.
+    :raises ValueError: If the format is unknown or chunk_size is not positive.
+    :raises QueryError: If a field is unknown.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(ProductMessages.unknown_export_format(fmt, FORMATS))
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    fields = resolve_fields(fields)
+    if isinstance(where, Predicate):
+        where = where.matches
+    chunks = iter_chunks(products, fields, where, chunk_size)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    written = 0
+
+    def encoded(executor: Optional[Executor]) -> Iterator[bytes]:
+        nonlocal written
+        yield file_header(fmt, fields)
+        if executor is None:
+            results = (
+                (len(chunk), encode_chunk(fmt, fields, chunk)) for chunk in chunks
+            )
+        else:
+            results = _encode_in_order(executor, fmt, fields, chunks, 2 * workers)
+        for rows, data in results:
+            yield data
+            written += rows
+            if progress is not None:
+                progress(written)
+
+    file_handler = FileHandler(filename)
+    if workers <= 1:
+        file_handler.write_chunks(encoded(None))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            file_handler.write_chunks(encoded(executor))
+    return written
+
+
+def _encode_in_order(
+    executor: Executor,
+    fmt: str,
+    fields: Sequence[str],
+    chunks: Iterator[List[Row]],
+    window: int,
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Encode chunks in an executor, keeping a bounded number of them in flight.
+
+    :return: An iterator over (row count, encoded chunk) pairs in chunk order.
+    """
+    pending = collections.deque()
+    for chunk in chunks:
+        pending.append((len(chunk), executor.submit(encode_chunk, fmt, fields, chunk)))
+        if len(pending) >= window:
+            rows, future = pending.popleft()
+            yield rows, future.result()
+    while pending:
+        rows, future = pending.popleft()
+        yield rows, future.result()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export a catalog.")
+    parser.add_argument("data_file", help="The JSON catalog to export.")
+    parser.add_argument("output", help="The export file to write.")
+    parser.add_argument("--format", choices=FORMATS, default=FORMAT_CSV)
+    parser.add_argument("--fields", help="Comma-separated fields, e.g. id,name.")
+    parser.add_argument("--where", default="", help='A filter, e.g. "quantity < 5".')
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, help="Worker processes; default 1/CPU.")
+    args = parser.parse_args(argv)
+
+    repository = ProductRepository(open_loader("json", args.data_file))
+    with repository.snapshot() as snapshot:
+        count = export_products(
+            snapshot,
+            args.output,
+            args.format,
+            args.fields.split(",") if args.fields else None,
+            parse_query(args.where),
+            args.chunk_size,
+            args.workers,
+        )
+    print(f"Exported {count} product(s) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# catalog_manager.py
+# Hosts many product catalogs, e.g. one per storefront, in a single process.
+# SRP: CatalogManager opens catalogs on first use and keeps only the most recently used
+# ones resident, flushing the rest to storage.
+
+import contextlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from constants_messages import ProductMessages
+from product_repository import ProductRepository
+from product_service import ProductService
+from product_validator import ProductValidator
+from storage_backends import open_loader
+
+DEFAULT_MAX_OPEN_CATALOGS: int = 64
+
+logger = logging.getLogger(__name__)
+
+
+class _OpenCatalog:
+    """
+    A resident catalog.
+
+    Attributes:
+    - repository: The catalog's ProductRepository, None until it has been loaded.
+    - service: The ProductService over the repository.
+    - pins: How many callers are using the catalog; pinned catalogs are not evicted.
+    - ready: Set once loading has finished, successfully or not.
+    - error: The exception loading raised, if any.
+    """
+
+    def __init__(self):
+        self.repository: Optional[ProductRepository] = None
+        self.service: Optional[ProductService] = None
+        self.pins = 0
+        self.ready = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class CatalogManager:
+    """
+    Lazily opened, LRU-evicted catalogs sharing one validator and storage backend.
+
+    Catalogs are opened with autosave off, so writes stay in memory until the catalog
+    is flushed, evicted or the manager is closed; memory therefore follows the set of
+    recently used catalogs rather than the number of catalogs. A catalog is loaded
+    once even if several threads ask for it at the same time, and loading happens
+    outside the manager lock so other catalogs stay available meanwhile.
+
+    Attributes:
+    - root_dir: The directory holding the catalog files.
+    - backend: The name of the storage backend, see storage_backends.
+    - max_open: How many catalogs stay resident when they are not pinned.
+    - validator: The ProductValidator shared by all catalogs.
+    - _open: The resident catalogs by name, least recently used first.
+    - _evicting: Evicted catalogs whose unsaved changes are still being written.
+    - _lock: Guards _open and _evicting.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        backend: str = "json",
+        max_open: int = DEFAULT_MAX_OPEN_CATALOGS,
+        validator: Optional[ProductValidator] = None,
+        autosave: bool = False,
+    ):
+        """
+        Initialize a CatalogManager with no catalogs open.
+
+        :param root_dir: The directory holding the catalog files; created if missing.
+        :param backend: The name of the storage backend of every catalog.
+        :param max_open: How many catalogs stay resident; must be positive.
+        :param validator: The validator shared by all catalogs; one is created if None.
+        :param autosave: If True, every change is saved at once instead of on flush.
+        :raises ValueError: If max_open is not positive.
+        """
+        if max_open <= 0:
+            raise ValueError("max_open must be positive.")
+        os.makedirs(root_dir, exist_ok=True)
+        self.root_dir = root_dir
+        self.backend = backend
+        self.max_open = max_open
+        self.validator = validator or ProductValidator()
+        self._autosave = autosave
+        self._open: "OrderedDict[str, _OpenCatalog]" = OrderedDict()
+        self._evicting: Dict[str, _OpenCatalog] = {}
+        self._lock = threading.Lock()
+
+    def location(self, name: str) -> str:
+        """
+        Get where a catalog is stored.
+
+        :param name: The catalog name.
+        :return: The path of the catalog file.
+        :raises ValueError: If the name could escape the root directory.
+        """
+        if not name or name.startswith(".") or os.sep in name or "/" in name:
+            raise ValueError(ProductMessages.invalid_catalog_name(name))
+        return os.path.join(self.root_dir, f"{name}.{self.backend}")
+
+    def catalog_names(self) -> List[str]:
+        """
+        List the catalogs stored under the root directory, open or not.
+
+        :return: The catalog names in alphabetical order.
+        """
+        suffix = f".{self.backend}"
+        names = {
+            entry[: -len(suffix)]
+            for entry in os.listdir(self.root_dir)
+            if entry.endswith(suffix)
+        }
+        with self._lock:
+            names.update(self._open)
+        return sorted(names)
+
+    @property
+    def open_catalogs(self) -> List[str]:
+        """
+        Get the names of the resident catalogs.
+
+        :return: The names, least recently used first.
+        """
+        with self._lock:
+            return list(self._open)
+
+    @contextlib.contextmanager
+    def catalog(self, name: str) -> Iterator[ProductService]:
+        """
+        Use a catalog, keeping it resident until the block ends.
+
+        This is the only way to get a catalog's service: a service used after its
+        catalog was evicted would change a copy that is never saved again.
+
+        :param name: The catalog name.
+        :return: A context manager yielding the catalog's ProductService.
+        """
+        entry = self._pin(name)
+        try:
+            yield entry.service
+        finally:
+            with self._lock:
+                entry.pins -= 1
+            self._evict()
+
+    def _pin(self, name: str) -> _OpenCatalog:
+        location = self.location(name)
+        with self._lock:
+            entry = self._open.get(name)
+            if entry is None:
+                # A catalog that is still being flushed is taken back as it is,
+                # rather than reloaded from a file that is not complete yet.
+                entry = self._evicting.get(name)
+            owner = entry is None
+            if owner:
+                entry = _OpenCatalog()
+            self._open[name] = entry
+            self._open.move_to_end(name)
+            entry.pins += 1
+
+        if owner:
+            try:
+                entry.repository = ProductRepository(
+                    open_loader(self.backend, location), autosave=self._autosave
+                )
+                entry.service = ProductService(entry.repository, self.validator)
+            except BaseException as e:
+                entry.error = e
+                with self._lock:
+                    if self._open.get(name) is entry:
+                        del self._open[name]
+                raise
+            finally:
+                entry.ready.set()
+            self._evict()
+        else:
+            entry.ready.wait()
+            if entry.error is not None:
+                with self._lock:
+                    entry.pins -= 1
+                raise entry.error
+        return entry
+
+    def _evict(self) -> None:
+        """
+        Flush and drop least recently used catalogs until at most max_open are resident.
+
+        Pinned catalogs and catalogs still loading are skipped, so the limit can be
+        exceeded while more catalogs than that are in use. A catalog that cannot be
+        saved stays resident as well.
+        """
+        with self._lock:
+            excess = len(self._open) - self.max_open
+            evicted = []
+            for name, entry in list(self._open.items()):
+                if excess <= 0:
+                    break
+                if entry.pins or not entry.ready.is_set():
+                    continue
+                del self._open[name]
+                self._evicting[name] = entry
+                evicted.append((name, entry))
+                excess -= 1
+        # Saving happens outside the manager lock; the repository has its own lock.
+        for name, entry in evicted:
+            try:
+                entry.repository.flush()
+                saved = True
+            except Exception:
+                # This runs as part of some other catalog's work, so the failure is
+                # logged rather than raised into it.
+                logger.exception("Could not save evicted catalog %s", name)
+                saved = False
+            with self._lock:
+                if self._evicting.get(name) is entry:
+                    del self._evicting[name]
+                if not saved and name not in self._open:
+                    # Kept resident, least recently used, so that its unsaved changes
+                    # are not lost and the next eviction tries again.
+                    self._open[name] = entry
+                    self._open.move_to_end(name, last=False)
+
+    def flush(self) -> None:
+        """
+        Save the unsaved changes of every resident catalog.
+        """
+        with self._lock:
+            entries = [entry for entry in self._open.values() if entry.ready.is_set()]
+        for entry in entries:
+            if entry.repository is not None:
+                entry.repository.flush()
+
+    def close(self) -> None:
+        """
+        Flush every resident catalog and drop all of them.
+        """
+        self.flush()
+        with self._lock:
+            self._open.clear()
+
+    def __enter__(self) -> "CatalogManager":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Describe the resident catalogs.
+
+        :return: The number of resident, pinned and dirty catalogs.
+        """
+        with self._lock:
+            entries = [entry for entry in self._open.values() if entry.ready.is_set()]
+        return {
+            "open": len(entries),
+            "pinned": sum(1 for entry in entries if entry.pins),
+            "dirty": sum(
+                1
+                for entry in entries
+                if entry.repository is not None and entry.repository.dirty
+            ),
+        }
@@ -0,0 +1,267 @@
+# catalog_merkle.py
+# A content-hash tree over product records, bucketed by product ID range.
+# SRP: CatalogMerkleTree summarizes catalog content so two catalogs can be compared by
+# walking down from the root into the ID ranges whose hashes differ.
+
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+from constants_messages import MAX_PRODUCT_ID_LENGTH
+from file_handler import FileHandler
+from product import Product
+
+DEFAULT_BUCKET_WIDTH: int = 1024
+FANOUT_BITS: int = 4  # Every interior node has up to 16 children.
+_MODULUS: int = 1 << 256
+
+
+def record_digest(product: Product) -> int:
+    """
+    Hash the content of a product.
+
+    :param product: The product to hash.
+    :return: A 256-bit integer digest of the ID, name, price and quantity.
+    """
+    canonical = json.dumps(
+        [product.product_id, product.name, product.price_cents, product.quantity]
+    )
+    return int.from_bytes(hashlib.sha256(canonical.encode("utf-8")).digest(), "big")
+
+
+def content_hash(products) -> Tuple[int, str]:
+    """
+    Hash a stream of products the way CatalogMerkleTree hashes its root.
+
+    Nothing but a running sum is kept, so any number of products can be hashed in
+    constant memory.
+
+    :param products: An iterable of Product objects with distinct IDs.
+    :return: The number of products and the hash, equal to the root_hash of a tree
+        holding the same products.
+    """
+    count = total = 0
+    for product in products:
+        count += 1
+        total = (total + record_digest(product)) % _MODULUS
+    return count, f"{total:064x}"
+
+
+class CatalogMerkleTree:
+    """
+    A hash tree whose leaves are ranges of bucket_width consecutive product IDs.
+
+    A node's hash is the sum, modulo 2**256, of the digests of all records below it.
+    Because the combination is a sum, changing one record adjusts each level by the
+    same delta, so updates cost one digest plus one addition per level and never
+    re-hash siblings. Empty nodes are not stored.
+
+    Attributes:
+    - bucket_width: How many consecutive IDs share a leaf.
+    - _depth: The number of levels above the leaves.
+    - _levels: Per level, the (hash, record count) of every non-empty node by prefix.
+    - _digests: The digest of every record, needed to undo it on update or removal.
+    """
+
+    def __init__(self, bucket_width: int = DEFAULT_BUCKET_WIDTH):
+        """
+        Initialize an empty CatalogMerkleTree.
+
+        :param bucket_width: How many consecutive IDs share a leaf.
+        """
+        self.bucket_width = bucket_width
+        highest_bucket = (10**MAX_PRODUCT_ID_LENGTH - 1) // bucket_width
+        self._depth = max(1, -(-highest_bucket.bit_length() // FANOUT_BITS))
+        self._levels: List[Dict[int, Tuple[int, int]]] = [
+            {} for _ in range(self._depth + 1)
+        ]
+        self._digests: Dict[int, int] = {}
+
+    @classmethod
+    def from_products(
+        cls, products, bucket_width: int = DEFAULT_BUCKET_WIDTH
+    ) -> "CatalogMerkleTree":
+        """
+        Build a tree over the given products.
+
+        :param products: An iterable of Product objects.
+        :param bucket_width: How many consecutive IDs share a leaf.
+        :return: The new CatalogMerkleTree.
+        """
+        tree = cls(bucket_width)
+        for product in products:
+            tree.update(product)
+        return tree
+
+    @property
+    def root_hash(self) -> str:
+        """
+        Get the hash of the whole catalog.
+
+        :return: The root hash as 64 hex digits.
+        """
+        value, _ = self._levels[self._depth].get(0, (0, 0))
+        return f"{value:064x}"
+
+    def __len__(self) -> int:
+        return self._levels[self._depth].get(0, (0, 0))[1]
+
+    def bucket_of(self, product_id: int) -> int:
+        return product_id // self.bucket_width
+
+    def bucket_range(self, bucket: int) -> Tuple[int, int]:
+        """
+        Get the IDs covered by a leaf bucket.
+
+        :param bucket: The bucket number.
+        :return: The lowest and highest product ID in the bucket, inclusive.
+        """
+        low = bucket * self.bucket_width
+        return low, low + self.bucket_width - 1
+
+    def update(self, product: Product) -> None:
+        """
+        Add or replace the record of a product.
+
+        :param product: The new version of the product.
+        """
+        digest = record_digest(product)
+        previous = self._digests.get(product.product_id)
+        if previous == digest:
+            return
+        self._digests[product.product_id] = digest
+        if previous is None:
+            self._adjust(product.product_id, digest, 1)
+        else:
+            self._adjust(product.product_id, digest - previous, 0)
+
+    def remove(self, product_id: int) -> None:
+        """
+        Remove the record of a product.
+
+        :param product_id: The ID of the removed product.
+        """
+        previous = self._digests.pop(product_id, None)
+        if previous is not None:
+            self._adjust(product_id, -previous, -1)
+
+    def _adjust(self, product_id: int, delta: int, count_delta: int) -> None:
+        prefix = self.bucket_of(product_id)
+        for level in self._levels:
+            value, count = level.get(prefix, (0, 0))
+            count += count_delta
+            if count:
+                level[prefix] = ((value + delta) % _MODULUS, count)
+            else:
+                del level[prefix]
+            prefix >>= FANOUT_BITS
+
+    def diff(self, other: "CatalogMerkleTree") -> List[int]:
+        """
+        Find the leaf buckets whose content differs between two trees.
+
+        Only subtrees with different hashes are visited, so the cost grows with the
+        number of differences, not with the catalog size.
+
+        :param other: A tree built with the same bucket width.
+        :return: The differing bucket numbers in ascending order.
+        :raises ValueError: If the trees use different bucket widths.
+        """
+        if other.bucket_width != self.bucket_width:
+            raise ValueError("Cannot diff trees with different bucket widths.")
+
+        differing = []
+        pending = [(self._depth, 0)]
+        while pending:
+            level, prefix = pending.pop()
+            if self._levels[level].get(prefix) == other._levels[level].get(prefix):
+                continue
+            if level == 0:
+                differing.append(prefix)
+                continue
+            # Children are pushed highest first so buckets come out in ascending order.
+            first_child = prefix << FANOUT_BITS
+            for child in reversed(range(first_child, first_child + (1 << FANOUT_BITS))):
+                pending.append((level - 1, child))
+        return differing
+
+    def to_dict(self) -> dict:
+        """
+        Convert the tree to a JSON-serializable dictionary of its leaves.
+
+        :return: A dictionary describing the tree.
+        """
+        return {
+            "bucket_width": self.bucket_width,
+            "root_hash": self.root_hash,
+            "buckets": {
+                str(bucket): [f"{value:064x}", count]
+                for bucket, (value, count) in sorted(self._levels[0].items())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CatalogMerkleTree":
+        """
+        Rebuild a tree from the output of to_dict.
+
+        The restored tree can be diffed but not updated, because per-record digests
+        are not stored.
+
+        :param data: A dictionary produced by to_dict.
+        :return: The restored CatalogMerkleTree.
+        :raises ValueError: If the data is malformed or its root hash does not match.
+        """
+        try:
+            tree = cls(int(data["bucket_width"]))
+            for bucket, (value, count) in data["buckets"].items():
+                prefix, value, count = int(bucket), int(value, 16), int(count)
+                for level in tree._levels:
+                    node_value, node_count = level.get(prefix, (0, 0))
+                    node_value = (node_value + value) % _MODULUS
+                    level[prefix] = (node_value, node_count + count)
+                    prefix >>= FANOUT_BITS
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid catalog tree data: {e}")
+        if tree.root_hash != data.get("root_hash"):
+            raise ValueError("Invalid catalog tree data: root hash mismatch.")
+        return tree
+
+    def save(
+        self, file_handler: FileHandler, source_digest: Optional[str] = None
+    ) -> None:
+        """
+        Persist the tree as JSON using the given FileHandler.
+
+        :param file_handler: The FileHandler to write to.
+        :param source_digest: An optional digest of the data file the tree describes,
+            checked again by load.
+        """
+        data = self.to_dict()
+        if source_digest is not None:
+            data["source_digest"] = source_digest
+        file_handler.write(json.dumps(data))
+
+    @classmethod
+    def load(
+        cls, file_handler: FileHandler, source_digest: Optional[str] = None
+    ) -> Optional["CatalogMerkleTree"]:
+        """
+        Load a tree previously written by save.
+
+        :param file_handler: The FileHandler to read from.
+        :param source_digest: If given, the tree is only loaded if it was saved for a
+            data file with this digest.
+        :return: The restored tree, or None if the file is missing, unreadable or
+            describes other data.
+        """
+        data_str = file_handler.read()
+        if not data_str:
+            return None
+        try:
+            data = json.loads(data_str)
+            if source_digest is not None and data.get("source_digest") != source_digest:
+                return None
+            return cls.from_dict(data)
+        except (json.JSONDecodeError, AttributeError, ValueError):
+            return None
@@ -0,0 +1,154 @@
+# catalog_sync.py
+# Compares and reconciles two product catalogs through their content-hash trees.
+# SRP: sync_catalogs transfers only the products in buckets whose hashes differ;
+# the command line wraps it as "diff" and "sync" over catalog files.
+
+import argparse
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+from catalog_merkle import CatalogMerkleTree, record_digest
+from data_loader import DataLoader
+from file_handler import FileHandler
+from product import Product
+from product_query import Query, where
+from product_repository import ProductRepository
+
+
+class SyncReport(NamedTuple):
+    """
+    The outcome of a catalog sync.
+
+    buckets lists the differing ID buckets; upserted and removed are the product IDs
+    that were (or, for a dry run, would be) written to or deleted from the target.
+    """
+
+    buckets: List[int]
+    upserted: List[int]
+    removed: List[int]
+
+    @property
+    def in_sync(self) -> bool:
+        return not self.upserted and not self.removed
+
+
+def merkle_path(data_file: str) -> str:
+    """
+    Get the file a catalog's hash tree is stored in, next to its data file.
+
+    :param data_file: The path of the catalog data file.
+    :return: The path of the tree file.
+    """
+    root, _ = os.path.splitext(data_file)
+    return root + ".merkle.json"
+
+
+def _bucket_products(
+    repository: ProductRepository, tree: CatalogMerkleTree, bucket: int
+) -> Dict[int, Product]:
+    low, high = tree.bucket_range(bucket)
+    products = repository.query(Query(where("id").between(low, high)))
+    return {product.product_id: product for product in products}
+
+
+def sync_catalogs(
+    source: ProductRepository, target: ProductRepository, dry_run: bool = False
+) -> SyncReport:
+    """
+    Make the target catalog equal to the source catalog.
+
+    Only the buckets whose hashes differ are read, through the ID index, so the cost
+    grows with the amount of change rather than the catalog size. All changes are
+    written to the target in one batch per operation.
+
+    :param source: The repository to copy from.
+    :param target: The repository to bring up to date.
+    :param dry_run: If True, only report what would change.
+    :return: A SyncReport of the differing buckets and products.
+    """
+    source_tree = source.merkle_tree
+    buckets = source_tree.diff(target.merkle_tree)
+    upserts: List[Product] = []
+    removed: List[int] = []
+    for bucket in buckets:
+        wanted = _bucket_products(source, source_tree, bucket)
+        present = _bucket_products(target, source_tree, bucket)
+        upserts.extend(
+            product
+            for product_id, product in wanted.items()
+            if product_id not in present
+            or record_digest(present[product_id]) != record_digest(product)
+        )
+        removed.extend(product_id for product_id in present if product_id not in wanted)
+
+    if not dry_run:
+        if upserts:
+            target.add_products(upserts)
+        if removed:
+            target.remove_products(removed)
+    return SyncReport(buckets, [product.product_id for product in upserts], removed)
+
+
+def _open_catalog(data_file: str) -> ProductRepository:
+    return ProductRepository(
+        DataLoader(FileHandler(data_file)),
+        autosave=False,
+        merkle_handler=FileHandler(merkle_path(data_file)),
+    )
+
+
+def _load_tree(data_file: str) -> CatalogMerkleTree:
+    """
+    Get the hash tree of a catalog file, preferring the stored one.
+
+    The stored tree is only used if it was saved for the current content of the data
+    file; any writer that does not keep the tree file current changes that content.
+
+    :param data_file: The path of the catalog data file.
+    :return: The stored tree, or one built by loading the catalog if there is no
+        current one.
+    """
+    data_digest = FileHandler(data_file).digest()
+    tree = None
+    if data_digest is not None:
+        tree = CatalogMerkleTree.load(
+            FileHandler(merkle_path(data_file)), source_digest=data_digest
+        )
+    if tree is None:
+        tree = _open_catalog(data_file).merkle_tree
+    return tree
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare and reconcile catalogs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    diff_parser = commands.add_parser("diff", help="List the differing ID ranges.")
+    sync_parser = commands.add_parser("sync", help="Copy differences to the target.")
+    for command_parser in (diff_parser, sync_parser):
+        command_parser.add_argument("source", help="The catalog file to copy from.")
+        command_parser.add_argument("target", help="The catalog data file to update.")
+    sync_parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "diff":
+        source_tree = _load_tree(args.source)
+        buckets = source_tree.diff(_load_tree(args.target))
+        for bucket in buckets:
+            low, high = source_tree.bucket_range(bucket)
+            print(f"ids {low}-{high}")
+        print(f"{len(buckets)} differing bucket(s)")
+        return
+
+    target = _open_catalog(args.target)
+    report = sync_catalogs(_open_catalog(args.source), target, dry_run=args.dry_run)
+    if not args.dry_run:
+        target.flush()
+    action = "would be" if args.dry_run else "were"
+    print(
+        f"{len(report.buckets)} differing bucket(s); {len(report.upserted)} product(s) "
+        f"{action} copied and {len(report.removed)} {action} removed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+# change_feed.py
+# Change-data-capture for the product catalog.
+# SRP: ChangeFeed numbers and delivers change events and keeps the durable event log;
+# ConsumerOffsets remembers how far each downstream consumer has read.
+
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from data_loader import DataLoader
+from file_handler import FileHandler
+
+OPERATION_UPSERT: str = "upsert"
+OPERATION_REMOVE: str = "remove"
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeEvent(NamedTuple):
+    """
+    One change to the catalog.
+
+    data holds the stored record of the product (as written by ProductRepository)
+    for upserts and is None for removals.
+    """
+
+    sequence: int
+    operation: str
+    product_id: int
+    data: Optional[dict]
+    timestamp: float
+
+    def to_json(self) -> str:
+        return json.dumps(self._asdict())
+
+    @classmethod
+    def from_json(cls, line: str) -> "ChangeEvent":
+        return cls(**json.loads(line))
+
+
+Subscriber = Callable[[ChangeEvent], None]
+
+
+class Subscription:
+    """
+    A handle returned by ChangeFeed.subscribe; cancel() stops delivery.
+
+    Attributes:
+    - callback: The subscriber.
+    - start_sequence: The feed's last sequence when live delivery started; every
+      later event is delivered.
+    """
+
+    def __init__(self, feed: "ChangeFeed", callback: Subscriber):
+        self._feed = feed
+        self.callback = callback
+        self.start_sequence = 0
+
+    def cancel(self) -> None:
+        self._feed._unsubscribe(self)
+
+
+class ChangeFeed:
+    """
+    An ordered stream of ChangeEvent objects with strictly increasing sequence numbers.
+
+    Subscribers are called synchronously, in sequence order, right after each change
+    is stored. A subscriber that raises is logged and does not affect the writer or
+    the other subscribers. With a log handler every event is also appended as one JSON
+    line to a durable log that consumers can replay or tail from a saved sequence.
+
+    Attributes:
+    - _log_handler: The FileHandler of the durable log, or None for an in-memory feed.
+    - _sequence: The sequence number of the latest event.
+    - _subscriptions: The active subscriptions.
+    - _lock: Serializes publication and subscription.
+    """
+
+    def __init__(self, log_handler: Optional[FileHandler] = None):
+        """
+        Initialize a ChangeFeed, resuming the sequence from an existing log.
+
+        :param log_handler: An optional FileHandler for the durable event log.
+        """
+        self._log_handler = log_handler
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.RLock()
+        self._sequence = self._last_logged_sequence()
+
+    @property
+    def last_sequence(self) -> int:
+        return self._sequence
+
+    @property
+    def is_durable(self) -> bool:
+        return self._log_handler is not None
+
+    def publish(
+        self, operation: str, product_id: int, data: Optional[dict]
+    ) -> ChangeEvent:
+        """
+        Number a change, persist it to the log and deliver it to subscribers.
+
+        :param operation: OPERATION_UPSERT or OPERATION_REMOVE.
+        :param product_id: The ID of the changed product.
+        :param data: The stored record of the product, or None for a removal.
+        :return: The published ChangeEvent.
+        """
+        with self._lock:
+            event = ChangeEvent(
+                self._sequence + 1, operation, product_id, data, time.time()
+            )
+            if self._log_handler is not None:
+                self._log_handler.append(event.to_json() + "\n")
+            self._sequence = event.sequence
+            for subscription in list(self._subscriptions):
+                self._deliver(subscription, event)
+            return event
+
+    def subscribe(
+        self, callback: Subscriber, from_sequence: Optional[int] = None
+    ) -> Subscription:
+        """
+        Register a callback for change events.
+
+        :param callback: Called with every ChangeEvent.
+        :param from_sequence: If given, logged events after this sequence are replayed
+            to the callback before live delivery starts, with no gap in between.
+        :return: A Subscription whose cancel() stops delivery.
+        """
+        subscription = Subscription(self, callback)
+        if from_sequence is not None:
+            # Most of the replay happens without the lock, so writers are not held up.
+            for event in self.read_from(from_sequence):
+                self._deliver(subscription, event)
+                from_sequence = event.sequence
+        with self._lock:
+            if from_sequence is not None:
+                # Only what was logged during the replay above is left.
+                for event in self.read_from(from_sequence):
+                    self._deliver(subscription, event)
+            subscription.start_sequence = self._sequence
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    @staticmethod
+    def _deliver(subscription: Subscription, event: ChangeEvent) -> None:
+        try:
+            subscription.callback(event)
+        except Exception:
+            logger.exception("Change subscriber failed on event %s", event.sequence)
+
+    def read_from(self, sequence: int) -> Iterator[ChangeEvent]:
+        """
+        Read logged events with a sequence number greater than the given one.
+
+        :param sequence: The last sequence the consumer has already applied.
+        :return: An iterator over ChangeEvent objects; empty for an in-memory feed.
+        """
+        position = self._position_after(sequence)
+        while True:
+            events, position = self._read_chunk(position)
+            if not events:
+                return
+            for event in events:
+                if event.sequence > sequence:
+                    yield event
+
+    def tail(
+        self,
+        sequence: int,
+        stop: threading.Event,
+        poll_interval: float = 0.5,
+    ) -> Iterator[ChangeEvent]:
+        """
+        Follow the durable log, yielding new events as they are written, until stopped.
+
+        :param sequence: The last sequence the consumer has already applied.
+        :param stop: An Event that ends the iteration when set.
+        :param poll_interval: Seconds to wait between checks for new events.
+        :return: An iterator over ChangeEvent objects.
+        """
+        position = self._position_after(sequence)
+        while not stop.is_set():
+            events, position = self._read_chunk(position)
+            for event in events:
+                if event.sequence > sequence:
+                    sequence = event.sequence
+                    yield event
+            if not events:
+                stop.wait(poll_interval)
+
+    def _last_logged_sequence(self, tail_bytes: int = 64 * 1024) -> int:
+        """
+        Find the sequence of the last complete event in the log by reading its end.
+
+        :param tail_bytes: How many bytes at the end of the log to inspect.
+        :return: The last logged sequence, or 0 if there is none.
+        """
+        if self._log_handler is None:
+            return 0
+        tail = self._log_handler.read_tail(tail_bytes)
+        if tail is None:
+            return 0
+        lines = tail.split(b"\n")
+        for line in reversed(lines):
+            try:
+                return ChangeEvent.from_json(line.decode("utf-8")).sequence
+            except (ValueError, TypeError):
+                # An empty, partial or cut-off line; look at the one before it.
+                continue
+        return 0
+
+    def _position_after(self, sequence: int) -> int:
+        """
+        Find where the first logged event after a sequence starts.
+
+        Sequences grow line by line, so the log is binary-searched by byte offset and
+        a resume costs a few short reads however long the log is.
+
+        :param sequence: The last sequence the consumer has already applied.
+        :return: The byte offset of the line holding the first later event, or of the
+            end of the complete lines if there is none.
+        """
+        if self._log_handler is None:
+            return 0
+        low, high = 0, self._log_handler.size()
+        # Find the smallest offset whose next event is later than sequence (or absent).
+        while low < high:
+            middle = (low + high) // 2
+            start, event_sequence = self._event_at(middle)
+            if event_sequence is None or event_sequence > sequence:
+                high = middle
+            else:
+                # Every offset up to start leads to the same event.
+                low = start + 1
+        return self._event_at(low)[0]
+
+    def _event_at(self, position: int, block_size: int = 1024):
+        """
+        Find the first complete log line starting at or after a byte position.
+
+        Lines that do not decode, e.g. one cut off by a crash, are passed over.
+
+        :param position: The byte offset to look from.
+        :param block_size: How many bytes are read at a time.
+        :return: The offset of the line and its event's sequence. If no complete,
+            readable line follows, the sequence is None and the offset is where the
+            next line would start, or position if no line starts after it.
+        """
+        start = position
+        if start > 0:
+            # Unless it is at the very start, the line begins after the next newline.
+            start = self._next_line(start - 1, block_size)
+            if start is None:
+                return position, None
+        while True:
+            end = self._next_line(start, block_size)
+            if end is None:
+                return start, None
+            line = self._log_handler.read_bytes(start, end - start) or b""
+            try:
+                return start, ChangeEvent.from_json(line.decode("utf-8")).sequence
+            except (ValueError, TypeError):
+                start = end
+
+    def _next_line(self, position: int, block_size: int) -> Optional[int]:
+        """
+        Find the offset right after the next newline at or after a byte position.
+
+        :param position: The byte offset to look from.
+        :param block_size: How many bytes are read at a time.
+        :return: The offset after the newline, or None if there is none.
+        """
+        offset = position
+        while True:
+            block = self._log_handler.read_bytes(offset, block_size)
+            if not block:
+                return None
+            newline = block.find(b"\n")
+            if newline >= 0:
+                return offset + newline + 1
+            offset += len(block)
+
+    def _read_chunk(self, position: int, max_bytes: int = 1 << 20):
+        """
+        Read complete log lines starting at a byte position.
+
+        :param position: The byte offset to start reading at.
+        :param max_bytes: Roughly how many bytes to read at most.
+        :return: The decoded events and the byte offset after the last complete line.
+        """
+        if self._log_handler is None:
+            return [], position
+        chunk = self._log_handler.read_bytes(position, max_bytes)
+        if chunk is None:
+            return [], position
+        # A partially written last line is left for the next read.
+        end = chunk.rfind(b"\n") + 1
+        events = [
+            ChangeEvent.from_json(line)
+            for line in chunk[:end].decode("utf-8").splitlines()
+            if line
+        ]
+        return events, position + end
+
+
+class ConsumerOffsets:
+    """
+    Durable per-consumer offsets, i.e. the last sequence each consumer has applied.
+
+    Attributes:
+    - _loader: The DataLoader the offsets are stored with.
+    - _offsets: The offsets keyed by consumer name.
+    """
+
+    def __init__(self, loader: DataLoader):
+        """
+        Initialize ConsumerOffsets from previously saved offsets.
+
+        :param loader: A DataLoader used to load and save the offsets.
+        """
+        self._loader = loader
+        self._offsets: Dict[str, int] = {
+            name: int(offset) for name, offset in loader.load_data().items()
+        }
+        self._lock = threading.Lock()
+
+    def get(self, consumer: str) -> int:
+        """
+        Get the last sequence a consumer has committed.
+
+        :param consumer: The consumer name.
+        :return: The committed sequence, or 0 if the consumer is new.
+        """
+        return self._offsets.get(consumer, 0)
+
+    def commit(self, consumer: str, sequence: int) -> None:
+        """
+        Save the last sequence a consumer has applied.
+
+        :param consumer: The consumer name.
+        :param sequence: The sequence of the last applied event.
+        """
+        with self._lock:
+            self._offsets[consumer] = sequence
+            self._loader.save_data(dict(self._offsets))
@@ -4,7 +4,22 @@
 # Maximum allowable lengths for product ID and product name.
 MAX_PRODUCT_ID_LENGTH: int = 15
 MAX_PRODUCT_NAME_LENGTH: int = 30
+# Prices in cents and quantities are stored in signed 64-bit columns.
+MAX_PRODUCT_PRICE_CENTS: int = 2**63 - 1
+MAX_PRODUCT_QUANTITY: int = 2**63 - 1
 DEFAULT_DATA_FILE: str = "products.json"
+DEFAULT_BLOOM_FILE: str = "products.bloom.json"
+DEFAULT_CHANGE_LOG_FILE: str = "products.changes.jsonl"
+DEFAULT_MERKLE_FILE: str = "products.merkle.json"
+DEFAULT_PROFILE_DIR: str = "profiles"
+DEFAULT_HISTORY_FILE: str = "products.history"
+
+# Environment variable that turns on profiling at startup; its value is the report
+# directory, or "1" for DEFAULT_PROFILE_DIR.
+PROFILE_ENV_VAR: str = "PRODUCTS_PROFILE"
+
+# Prompt shown by the CLI main menu; scripted sessions use it to delimit commands.
+MENU_PROMPT: str = "Enter your choice: "
 
 
 # This class respects the SRP principle by centralizing error messages.
@@ -20,6 +35,7 @@ class ProductMessages:
         "ERROR: Duplicate product ID! Please choose a unique product ID."
     )
     INVALID_INTEGER: str = "ERROR: Product ID should be a valid integer."
+    PRODUCT_NOT_FOUND: str = "ERROR: No product with this ID exists."
     NON_POSITIVE_ID: str = "ERROR: Product ID should be a positive integer."
     ID_TOO_LONG: str = (
         f"Product ID cannot be longer than {MAX_PRODUCT_ID_LENGTH} characters."
@@ -32,10 +48,27 @@ class ProductMessages:
     # Error Messages: Price
     INVALID_PRICE: str = "Product price must be a valid number."
     NON_POSITIVE_PRICE: str = "Product price must be greater than 0."
+    PRICE_TOO_HIGH: str = (
+        "Product price cannot be more than "
+        f"{MAX_PRODUCT_PRICE_CENTS // 100}.{MAX_PRODUCT_PRICE_CENTS % 100:02d}."
+    )
 
     # Error Messages/Quantity
     INVALID_QUANTITY: str = "Product quantity must be a valid integer."
     NEGATIVE_QUANTITY: str = "Product quantity cannot be negative."
+    QUANTITY_TOO_HIGH: str = (
+        f"Product quantity cannot be more than {MAX_PRODUCT_QUANTITY}."
+    )
+
+    # Error Messages/Query
+    INVALID_QUERY: str = (
+        "ERROR: Invalid query. Example: quantity < 5 and price between 10 and 50"
+        " and name starts with 'USB'"
+    )
+    INVALID_QUERY_LIMIT: str = "ERROR: Query limit must be a non-negative integer."
+
+    # Error Messages/History
+    HISTORY_DISABLED: str = "ERROR: Inventory history is not being recorded."
 
     # Error Messages/Generic
     ADD_PRODUCT_FAILED: str = "ERROR: Failed to Add Product."
@@ -43,3 +76,37 @@ class ProductMessages:
     # Positive/Informative Messages
     PRODUCT_ADDED_SUCCESS: str = "Product added successfully."
     INPUT_VALUE: str = "Please enter again or press Enter to cancel."
+
+    @staticmethod
+    def unknown_query_field(field: str) -> str:
+        return f"ERROR: Unknown field '{field}'. Use id, name, price or quantity."
+
+    @staticmethod
+    def invalid_query_value(field: str, value) -> str:
+        return f"ERROR: '{value}' is not a valid value for {field}."
+
+    @staticmethod
+    def bulk_row_error(row_number: int, message: str) -> str:
+        return f"Row {row_number}: {message}"
+
+    @staticmethod
+    def unreadable_data_file(filename: str) -> str:
+        return (
+            f"ERROR: {filename} is not valid JSON. It was left unchanged; repair or "
+            "move it before starting again."
+        )
+
+    @staticmethod
+    def invalid_catalog_name(name: str) -> str:
+        return f"ERROR: '{name}' is not a valid catalog name."
+
+    @staticmethod
+    def unknown_backend(name: str, known) -> str:
+        return (
+            f"ERROR: Unknown storage backend '{name}'. "
+            f"Use one of: {', '.join(known)}."
+        )
+
+    @staticmethod
+    def unknown_export_format(name: str, known) -> str:
+        return f"ERROR: Unknown export format '{name}'. Use one of: {', '.join(known)}."
@@ -2,9 +2,19 @@
 # Provides functionality for loading and saving data in JSON format.
 # SRP: DataLoader class is responsible for converting data between dict and its string representation in JSON format.
 
+import copy
 import json
+import re
+from typing import Iterable, Iterator, Optional, Tuple
+from constants_messages import ProductMessages
 from file_handler import FileHandler
 
+# A record as streamed between storage backends: the key and the stored value. A value
+# of None in append_records removes the key.
+Record = Tuple[str, Optional[dict]]
+
+_WHITESPACE = re.compile(r"\s*")
+
 
 # DataLoader is responsible for converting data between dict and its string representation in JSON format.
 # SRP is followed here.
@@ -20,14 +30,194 @@ class DataLoader:
         self.file_handler = file_handler
 
     def load_data(self) -> dict:
+        """
+        Load the saved data.
+
+        :return: The data, or an empty dict if the file is missing or empty.
+        :raises ValueError: If the file is not valid JSON. The file is left as it is,
+            rather than being treated as empty and overwritten by the next save.
+        """
         data_str = self.file_handler.read()
         if not data_str:
             return {}
         try:
             return json.loads(data_str)
         except json.JSONDecodeError:
-            return {}
+            raise ValueError(
+                ProductMessages.unreadable_data_file(self.file_handler.filename)
+            )
 
     def save_data(self, data: dict):
         data_str = json.dumps(data, indent=4)
         self.file_handler.write(data_str)
+
+    def digest(self) -> Optional[str]:
+        """
+        Fingerprint the saved data, e.g. to tell whether derived files are current.
+
+        :return: A hash of the data file, or None if there is no file.
+        """
+        return self.file_handler.digest()
+
+    def iter_records(self, chunk_size: int = 1 << 16) -> Iterator[Record]:
+        """
+        Read the saved records one by one without loading the whole file.
+
+        :param chunk_size: How many characters are read from the file at a time.
+        :return: An iterator over (key, value) pairs in file order.
+        :raises ValueError: If the file is not a JSON object.
+        """
+        try:
+            file = open(self.file_handler.filename, "r")
+        except FileNotFoundError:
+            return
+        with file:
+            yield from _iter_json_object(file, chunk_size)
+
+    def write_records(self, records: Iterable[Record]):
+        """
+        Replace the saved data with the given records, writing them as they come.
+
+        The file looks exactly as if save_data had been given the same data.
+
+        :param records: The (key, value) pairs to save.
+        """
+
+        def chunks():
+            separator = "{"
+            for key, value in records:
+                value_str = json.dumps(value, indent=4).replace("\n", "\n    ")
+                yield f"{separator}\n    {json.dumps(key)}: {value_str}".encode("utf-8")
+                separator = ","
+            yield b"{}" if separator == "{" else b"\n}"
+
+        self.file_handler.write_chunks(chunks())
+
+    def append_records(self, records: Iterable[Record]):
+        """
+        Add, replace or remove (with a value of None) some records.
+
+        A JSON object cannot be appended to, so the whole file is rewritten. It is
+        streamed into a replacement file, so readers never see a partial file and the
+        catalog is never held in memory as a whole.
+
+        :param records: The (key, value) pairs to apply.
+        """
+        changes = dict(records)
+
+        def merged() -> Iterator[Record]:
+            for key, value in self.iter_records():
+                if key in changes:
+                    value = changes.pop(key)
+                if value is not None:
+                    yield key, value
+            for key, value in changes.items():
+                if value is not None:
+                    yield key, value
+
+        self.write_records(merged())
+
+
+def _iter_json_object(file, chunk_size: int) -> Iterator[Record]:
+    """
+    Parse a JSON object from a file incrementally, yielding its members.
+
+    Only the unparsed rest of the current chunk and the member being parsed are held
+    in memory.
+
+    :param file: A text file positioned at the start of the object.
+    :param chunk_size: How many characters are read at a time.
+    :return: An iterator over (key, value) pairs.
+    :raises ValueError: If the content is not a JSON object.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, at_end = "", 0, False
+
+    def fill() -> None:
+        nonlocal buffer, position, at_end
+        chunk = file.read(chunk_size)
+        at_end = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+    def peek() -> str:
+        nonlocal position
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            if at_end:
+                raise ValueError("Unexpected end of JSON data.")
+            fill()
+
+    def expect(chars: str) -> str:
+        nonlocal position
+        char = peek()
+        if char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON data.")
+        position += 1
+        return char
+
+    def item():
+        nonlocal position
+        peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                # A number ending with the buffer may continue in the next chunk.
+                if end < len(buffer) or at_end:
+                    position = end
+                    return value
+            except json.JSONDecodeError:
+                if at_end:
+                    raise
+            fill()
+
+    expect("{")
+    if peek() == "}":
+        return
+    while True:
+        key = item()
+        if not isinstance(key, str):
+            raise ValueError("Expected a string key in JSON data.")
+        expect(":")
+        yield key, item()
+        if expect(",}") == "}":
+            return
+
+
+# InMemoryDataLoader offers the DataLoader interface without any file, e.g. for replicas
+# and tests. Data is deep-copied in both directions so callers cannot share records.
+class InMemoryDataLoader:
+    """
+    A DataLoader replacement that keeps the data in memory.
+
+    Attributes:
+    - _data: The last saved data.
+    """
+
+    def __init__(self, data: Optional[dict] = None):
+        self._data = copy.deepcopy(data) if data else {}
+
+    def load_data(self) -> dict:
+        return copy.deepcopy(self._data)
+
+    def save_data(self, data: dict):
+        self._data = copy.deepcopy(data)
+
+    def digest(self) -> Optional[str]:
+        # Nothing outlives the process, so there is nothing to keep current.
+        return None
+
+    def iter_records(self) -> Iterator[Record]:
+        for key, value in list(self._data.items()):
+            yield key, copy.deepcopy(value)
+
+    def write_records(self, records: Iterable[Record]):
+        self._data = {key: copy.deepcopy(value) for key, value in records}
+
+    def append_records(self, records: Iterable[Record]):
+        for key, value in records:
+            if value is None:
+                self._data.pop(key, None)
+            else:
+                self._data[key] = copy.deepcopy(value)
@@ -1,3 +1,9 @@
+import contextlib
+import hashlib
+import os
+from typing import Iterable, Optional
+
+
 class FileHandler:
     def __init__(self, filename: str):
         """
@@ -21,6 +27,64 @@ class FileHandler:
         except FileNotFoundError:
             return None
 
+    def read_bytes(self, position: int = 0, size: int = -1) -> Optional[bytes]:
+        """
+        Read binary data from the file, starting at a byte position.
+
+        :param position: The byte offset to start reading at.
+        :param size: The most bytes to read, or -1 to read to the end of the file.
+        :return: The data read, or None if the file does not exist.
+        """
+        try:
+            with open(self.filename, "rb") as file:
+                file.seek(position)
+                return file.read(size)
+        except FileNotFoundError:
+            return None
+
+    def read_tail(self, size: int) -> Optional[bytes]:
+        """
+        Read up to the given number of bytes from the end of the file.
+
+        :param size: The most bytes to read.
+        :return: The data read, or None if the file does not exist.
+        """
+        try:
+            with open(self.filename, "rb") as file:
+                file.seek(0, os.SEEK_END)
+                file.seek(max(0, file.tell() - size))
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def size(self) -> int:
+        """
+        Get the size of the file.
+
+        :return: The size in bytes, or 0 if the file does not exist.
+        """
+        try:
+            return os.path.getsize(self.filename)
+        except FileNotFoundError:
+            return 0
+
+    def digest(self, chunk_size: int = 1 << 20) -> Optional[str]:
+        """
+        Hash the contents of the file, reading it in chunks.
+
+        :param chunk_size: How many bytes are read at a time.
+        :return: The SHA-256 of the contents as hex digits, or None if the file does not
+            exist.
+        """
+        sha256 = hashlib.sha256()
+        try:
+            with open(self.filename, "rb") as file:
+                for chunk in iter(lambda: file.read(chunk_size), b""):
+                    sha256.update(chunk)
+        except FileNotFoundError:
+            return None
+        return sha256.hexdigest()
+
     def write(self, data: str) -> None:
         """
         Write the provided data to the file.
@@ -29,3 +93,54 @@ class FileHandler:
         """
         with open(self.filename, "w") as file:
             file.write(data)
+
+    def append(self, data: str) -> None:
+        """
+        Append the provided data to the end of the file, creating it if needed.
+
+        :param data: The data to be appended to the file as a string.
+        """
+        with open(self.filename, "a") as file:
+            file.write(data)
+
+    def write_bytes(self, data: bytes) -> None:
+        """
+        Replace the file with the provided binary data atomically.
+
+        :param data: The data to be written to the file as bytes.
+        """
+        self.write_chunks([data])
+
+    def write_chunks(self, chunks: Iterable[bytes]) -> None:
+        """
+        Replace the file with binary data produced piece by piece, atomically.
+
+        The data is written to a temporary file next to the target, synced to disk and
+        then renamed over the target, so readers see either the old or the new file.
+        Only one chunk is held in memory at a time.
+
+        :param chunks: The pieces of the new file content, in order.
+        """
+        temporary = f"{self.filename}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                file.flush()
+                os.fsync(file.fileno())
+        except BaseException:
+            # The temporary file may never have been created; that must not hide the
+            # original error.
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temporary)
+            raise
+        os.replace(temporary, self.filename)
+
+    def append_bytes(self, data: bytes) -> None:
+        """
+        Append the provided binary data to the end of the file, creating it if needed.
+
+        :param data: The data to be appended to the file as bytes.
+        """
+        with open(self.filename, "ab") as file:
+            file.write(data)
@@ -0,0 +1,302 @@
+# framed_data_loader.py
+# Provides a record-framed, checksummed storage format for catalog data.
+# SRP: FramedDataLoader converts data between dict and a file of independently
+# verifiable records, recovering every intact record when part of the file is damaged.
+
+import itertools
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from data_loader import Record
+from file_handler import FileHandler
+
+# The file starts with MAGIC; every record is SYNC_MARKER, the payload length and the
+# CRC32 of the payload (both big-endian uint32), then the UTF-8 JSON payload
+# [key, value]. The marker contains bytes that never occur in UTF-8, so a payload
+# can never look like the start of a record. Records appended later override earlier
+# ones with the same key, and a value of null removes the key.
+MAGIC: bytes = b"PRODREC1"
+SYNC_MARKER: bytes = b"\xff\xfeRC"
+_RECORD_HEADER = struct.Struct(">4sII")
+MAX_RECORD_LENGTH: int = 1 << 24
+# Files smaller than this are always verified in one pass, even if workers are allowed.
+PARALLEL_MIN_BYTES: int = 4 << 20
+
+logger = logging.getLogger(__name__)
+
+Span = Tuple[int, int]
+
+
+class RecoveryReport(NamedTuple):
+    """
+    What loading a framed file found.
+
+    corrupt_regions counts the damaged stretches between intact records, and
+    bytes_skipped is their total size; both are 0 for an undamaged file.
+    """
+
+    records: int
+    corrupt_regions: int
+    bytes_skipped: int
+
+    @property
+    def is_clean(self) -> bool:
+        return self.corrupt_regions == 0
+
+
+def encode_record(key: str, value) -> bytes:
+    """
+    Frame one key/value pair.
+
+    :param key: The key of the record.
+    :param value: A JSON-serializable value.
+    :return: The framed record.
+    """
+    payload = json.dumps([key, value], separators=(",", ":")).encode("utf-8")
+    return _RECORD_HEADER.pack(SYNC_MARKER, len(payload), zlib.crc32(payload)) + payload
+
+
+def scan_records(buffer, start: int, stop: int) -> List[Span]:
+    """
+    Find the intact records that start within a byte range.
+
+    :param buffer: The file contents, e.g. an mmap.
+    :param start: The first offset a record may start at.
+    :param stop: The offset at which no more records may start.
+    :return: The (start, end) offsets of the records whose checksum matches.
+    """
+    return list(iter_spans(buffer, start, stop))
+
+
+def iter_spans(buffer, start: int, stop: int) -> Iterator[Span]:
+    """
+    Yield the intact records that start within a byte range, in file order.
+
+    After a damaged record the scan resynchronizes at the next sync marker, so one bad
+    byte costs only the record it is in.
+
+    :param buffer: The file contents, e.g. an mmap.
+    :param start: The first offset a record may start at.
+    :param stop: The offset at which no more records may start.
+    :return: An iterator over the (start, end) offsets of checksum-valid records.
+    """
+    size = len(buffer)
+    position = start
+    while True:
+        # A marker starting just before stop may end after it.
+        position = buffer.find(
+            SYNC_MARKER, position, min(size, stop + len(SYNC_MARKER) - 1)
+        )
+        if position < 0 or position + _RECORD_HEADER.size > size:
+            return
+        _, length, crc = _RECORD_HEADER.unpack_from(buffer, position)
+        payload_start = position + _RECORD_HEADER.size
+        end = payload_start + length
+        if (
+            length <= MAX_RECORD_LENGTH
+            and end <= size
+            and zlib.crc32(buffer[payload_start:end]) == crc
+        ):
+            yield position, end
+            position = end
+        else:
+            position += 1
+
+
+def _scan_file_chunk(filename: str, start: int, stop: int) -> List[Span]:
+    with open(filename, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buffer:
+        return scan_records(buffer, start, stop)
+
+
+class FramedDataLoader:
+    """
+    A DataLoader replacement storing every key/value pair as a checksummed record.
+
+    Loading verifies the records in one streaming pass over a memory-mapped file and
+    keeps every intact record. Damaged stretches are skipped, reported in last_report
+    and logged, and the damaged file is copied aside before it can be overwritten.
+    Saving replaces the file atomically.
+
+    Attributes:
+    - file_handler: An instance of FileHandler class.
+    - workers: The number of processes verifying large files in parallel; 1 or less
+      verifies in the calling process.
+    - last_report: The RecoveryReport of the latest load, or None before loading.
+    """
+
+    def __init__(self, file_handler: FileHandler, workers: int = 1):
+        self.file_handler = file_handler
+        self.workers = workers
+        self.last_report: Optional[RecoveryReport] = None
+
+    def load_data(self) -> dict:
+        filename = self.file_handler.filename
+        if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+            self.last_report = RecoveryReport(0, 0, 0)
+            return {}
+
+        with open(filename, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as buffer:
+            data, intact = self._decode(buffer, self._scan(buffer))
+            header_end = len(MAGIC) if buffer[: len(MAGIC)] == MAGIC else 0
+            report = self._report(intact, header_end, len(buffer))
+        data = {key: value for key, value in data.items() if value is not None}
+
+        self.last_report = report
+        if not report.is_clean:
+            logger.warning(
+                "Recovered %s records from %s; skipped %s damaged region(s), %s bytes",
+                report.records,
+                filename,
+                report.corrupt_regions,
+                report.bytes_skipped,
+            )
+            shutil.copyfile(filename, f"{filename}.corrupt")
+        return data
+
+    @staticmethod
+    def _decode(buffer, spans: List[Span]) -> Tuple[dict, List[Span]]:
+        """
+        Decode the payloads of verified records.
+
+        All payloads are parsed as one JSON array, which is much faster than parsing
+        them one by one; only if that fails is every payload parsed on its own.
+
+        :param buffer: The mapped file.
+        :param spans: The (start, end) offsets of the verified records.
+        :return: The decoded data and the spans of the records that decoded.
+        """
+        payloads = [buffer[start + _RECORD_HEADER.size : end] for start, end in spans]
+        try:
+            return dict(json.loads(b"[" + b",".join(payloads) + b"]")), spans
+        except (ValueError, TypeError):
+            pass
+        data = {}
+        intact = []
+        for span, payload in zip(spans, payloads):
+            try:
+                key, value = json.loads(payload)
+            except (ValueError, TypeError):
+                continue
+            data[key] = value
+            intact.append(span)
+        return data, intact
+
+    def _scan(self, buffer) -> List[Span]:
+        """
+        Find the intact records of the whole file, in parallel if it is large enough.
+
+        :param buffer: The mapped file.
+        :return: The (start, end) offsets of the intact records in file order.
+        """
+        size = len(buffer)
+        if self.workers <= 1 or size < PARALLEL_MIN_BYTES:
+            return scan_records(buffer, 0, size)
+
+        chunk = -(-size // self.workers)
+        bounds = [(start, min(size, start + chunk)) for start in range(0, size, chunk)]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(
+                _scan_file_chunk,
+                [self.file_handler.filename] * len(bounds),
+                [start for start, _ in bounds],
+                [stop for _, stop in bounds],
+            )
+            spans = []
+            covered = 0
+            for chunk_spans in results:
+                for start, end in chunk_spans:
+                    # A chunk may begin inside a record the previous chunk already
+                    # read; whatever it found there is part of that record.
+                    if start >= covered:
+                        spans.append((start, end))
+                        covered = end
+        return spans
+
+    @staticmethod
+    def _report(spans: List[Span], header_end: int, size: int) -> RecoveryReport:
+        regions = skipped = 0
+        previous_end = header_end
+        for start, end in spans + [(size, size)]:
+            if start > previous_end:
+                regions += 1
+                skipped += start - previous_end
+            previous_end = end
+        return RecoveryReport(len(spans), regions, skipped)
+
+    def save_data(self, data: dict):
+        self.write_records(data.items())
+
+    def digest(self) -> Optional[str]:
+        """
+        Fingerprint the saved data, e.g. to tell whether derived files are current.
+
+        :return: A hash of the data file, or None if there is no file.
+        """
+        return self.file_handler.digest()
+
+    def iter_records(self) -> Iterator[Record]:
+        """
+        Read the current records one by one without decoding the whole file at once.
+
+        Because appended records override earlier ones, a first pass notes the
+        position of the last record of every key; only keys and offsets are held.
+        Damaged records are skipped.
+
+        :return: An iterator over (key, value) pairs in file order.
+        """
+        filename = self.file_handler.filename
+        if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+            return
+        decoder = json.JSONDecoder()
+        with open(filename, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as buffer:
+            latest = {}
+            for start, end in iter_spans(buffer, 0, len(buffer)):
+                payload = buffer[start + _RECORD_HEADER.size : end].decode("utf-8")
+                try:
+                    # The key is the first element of the payload array.
+                    key, _ = decoder.raw_decode(payload, 1)
+                except ValueError:
+                    continue
+                latest[key] = start
+            for start, end in iter_spans(buffer, 0, len(buffer)):
+                payload = buffer[start + _RECORD_HEADER.size : end]
+                try:
+                    key, value = json.loads(payload)
+                except (ValueError, TypeError):
+                    continue
+                if latest.get(key) == start and value is not None:
+                    yield key, value
+
+    def write_records(self, records: Iterable[Record]):
+        """
+        Replace the file with the given records, encoding them as they come.
+
+        :param records: The (key, value) pairs to save.
+        """
+        chunks = (encode_record(key, value) for key, value in records)
+        self.file_handler.write_chunks(itertools.chain([MAGIC], chunks))
+
+    def append_records(self, records: Iterable[Record]):
+        """
+        Append records that add, replace or remove (with a value of None) keys.
+
+        :param records: The (key, value) pairs to apply.
+        """
+        filename = self.file_handler.filename
+        prefix = b"" if os.path.exists(filename) else MAGIC
+        self.file_handler.append_bytes(
+            prefix + b"".join(encode_record(key, value) for key, value in records)
+        )
@@ -0,0 +1,447 @@
+# inventory_history.py
+# Keeps every past price, quantity and name of every product, compactly.
+# SRP: InventoryHistory turns change events into compressed per-product time series
+# and answers point-in-time questions from them; it never changes the catalog.
+
+import bisect
+import json
+import logging
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from change_feed import ChangeEvent, OPERATION_UPSERT, Subscription
+from file_handler import FileHandler
+from product import Product
+from product_repository import ProductRepository
+
+DEFAULT_HISTORY_BLOCK_SIZE: int = 64
+
+# A history file starts with HISTORY_MAGIC and a header: its length (uint32) and a
+# JSON object holding the last applied change sequence. Blocks follow, each the
+# product ID (int64), the time of its first entry in microseconds (int64) and the
+# length of the compressed block (uint32), then the block. All big-endian.
+HISTORY_MAGIC: bytes = b"PRODHIS1"
+_LENGTH = struct.Struct(">I")
+_BLOCK_HEADER = struct.Struct(">qqI")
+
+_MICROSECONDS: int = 1_000_000
+
+logger = logging.getLogger(__name__)
+
+
+class _State(NamedTuple):
+    """
+    A product at one point in time; price_cents is None once it was removed.
+    """
+
+    timestamp: int
+    price_cents: Optional[int]
+    quantity: int
+    name: str
+
+
+class HistoryEntry(NamedTuple):
+    """
+    One recorded change of a product.
+
+    product is the product as it was from timestamp on, or None if it was removed.
+    """
+
+    timestamp: float
+    product: Optional[Product]
+
+
+def encode_block(states: List[_State]) -> bytes:
+    """
+    Delta-encode and compress consecutive states of one product.
+
+    The first row holds absolute values. Every later row holds the differences in
+    time, price and quantity from the row before, and the name only if it changed;
+    a removal is the time difference and null. Blocks decode independently.
+
+    :param states: The states in time order; at least one.
+    :return: The compressed block.
+    """
+    rows = []
+    base: Optional[_State] = None
+    for state in states:
+        if base is None:
+            row = list(state)
+        elif state.price_cents is None:
+            row = [state.timestamp - base.timestamp, None]
+        else:
+            row = [
+                state.timestamp - base.timestamp,
+                state.price_cents - (base.price_cents or 0),
+                state.quantity - base.quantity,
+            ]
+            if state.name != base.name:
+                row.append(state.name)
+        rows.append(row)
+        # A removal keeps the values before it as the base of the next delta.
+        if base is None or state.price_cents is not None:
+            base = state
+        else:
+            base = base._replace(timestamp=state.timestamp)
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_block(block: bytes) -> List[_State]:
+    """
+    Decompress and decode a block written by encode_block.
+
+    :param block: The compressed block.
+    :return: The states in time order.
+    """
+    states: List[_State] = []
+    base: Optional[_State] = None
+    for row in json.loads(zlib.decompress(block)):
+        if base is None:
+            state = _State(*row)
+        elif row[1] is None:
+            state = _State(base.timestamp + row[0], None, base.quantity, base.name)
+        else:
+            state = _State(
+                base.timestamp + row[0],
+                (base.price_cents or 0) + row[1],
+                base.quantity + row[2],
+                row[3] if len(row) > 3 else base.name,
+            )
+        states.append(state)
+        if base is None or state.price_cents is not None:
+            base = state
+        else:
+            base = base._replace(timestamp=state.timestamp)
+    return states
+
+
+class _ProductHistory:
+    """
+    The time series of one product.
+
+    Attributes:
+    - starts: The first timestamp of every sealed block, i.e. the block index.
+    - blocks: The sealed, compressed blocks in time order.
+    - tail: The newest states, not compressed yet.
+    - last: The newest state, or None before the first one.
+    """
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.blocks: List[bytes] = []
+        self.tail: List[_State] = []
+        self.last: Optional[_State] = None
+
+    def append(self, state: _State, block_size: int) -> None:
+        self.tail.append(state)
+        self.last = state
+        if len(self.tail) >= block_size:
+            self.seal()
+
+    def seal(self) -> None:
+        self.starts.append(self.tail[0].timestamp)
+        self.blocks.append(encode_block(self.tail))
+        self.tail = []
+
+    def state_at(self, timestamp: int) -> Optional[_State]:
+        """
+        Find the state in effect at a time.
+
+        Only the tail or the one block the index points to is decoded.
+
+        :param timestamp: The time in microseconds.
+        :return: The latest state at or before the time, or None if there is none.
+        """
+        if self.tail and self.tail[0].timestamp <= timestamp:
+            states = self.tail
+        else:
+            position = bisect.bisect_right(self.starts, timestamp) - 1
+            if position < 0:
+                return None
+            states = decode_block(self.blocks[position])
+        position = bisect.bisect_right([state.timestamp for state in states], timestamp)
+        return states[position - 1]
+
+    def states(self) -> Iterator[_State]:
+        for block in self.blocks:
+            yield from decode_block(block)
+        yield from self.tail
+
+
+def _to_product(product_id: int, state: _State) -> Optional[Product]:
+    if state.price_cents is None:
+        return None
+    return Product.from_cents(product_id, state.name, state.price_cents, state.quantity)
+
+
+class InventoryHistory:
+    """
+    A time series of every product's price, quantity and name, fed by the change feed.
+
+    Each product's changes are kept in blocks of block_size states. The newest block
+    stays uncompressed; full blocks are delta-encoded and compressed. A per-product
+    index of block start times lets a point-in-time lookup decode a single block, and
+    storage grows with the number of changes, not with the size of the catalog.
+
+    With a file handler the history is loaded on start and written by save(). If the
+    repository's change feed is durable, changes logged after the saved sequence are
+    replayed, so nothing is lost between saves. A damaged file is set aside and the
+    history starts empty. Products whose current state the history does not know yet
+    are recorded when the history starts.
+
+    Attributes:
+    - block_size: How many states a block holds before it is compressed.
+    - _repository: The ProductRepository whose changes are recorded.
+    - _file_handler: The FileHandler the history is saved with, or None.
+    - _products: The time series by product ID.
+    - _sequence: The sequence of the last change event applied.
+    - _subscription: The change feed subscription, or None once closed.
+    - _lock: Guards the time series.
+    """
+
+    def __init__(
+        self,
+        repository: ProductRepository,
+        file_handler: Optional[FileHandler] = None,
+        block_size: int = DEFAULT_HISTORY_BLOCK_SIZE,
+    ):
+        """
+        Initialize an InventoryHistory and start recording the repository's changes.
+
+        :param repository: The ProductRepository to record.
+        :param file_handler: An optional FileHandler to load and save the history.
+        :param block_size: How many states a compressed block holds; must be positive.
+        :raises ValueError: If block_size is not positive.
+        """
+        if block_size <= 0:
+            raise ValueError("block_size must be positive.")
+        self.block_size = block_size
+        self._repository = repository
+        self._file_handler = file_handler
+        self._products: Dict[int, _ProductHistory] = {}
+        self._sequence = 0
+        self._lock = threading.RLock()
+        self._load()
+
+        changes = repository.changes
+        replay = self._sequence if changes.is_durable and self._sequence else None
+        self._subscription: Optional[Subscription] = changes.subscribe(
+            self._on_change, from_sequence=replay
+        )
+        self._record_current_state()
+
+    def _record_current_state(self) -> None:
+        """
+        Record every product whose latest state differs from the catalog.
+
+        Catalog reads are lock-free and each product is re-read under the history
+        lock, so a change delivered meanwhile is never recorded out of order.
+        """
+        with self._repository.snapshot() as snapshot:
+            product_ids = {product.product_id for product in snapshot}
+        now = self._now()
+        with self._lock:
+            product_ids.update(self._products)
+            for product_id in product_ids:
+                product = self._repository.get_product_by_id(product_id)
+                if product is None:
+                    self._record(product_id, _State(now, None, 0, ""))
+                else:
+                    self._record(product_id, self._state(product, now))
+
+    @staticmethod
+    def _now() -> int:
+        return int(time.time() * _MICROSECONDS)
+
+    @staticmethod
+    def _state(product: Product, timestamp: int) -> _State:
+        return _State(timestamp, product.price_cents, product.quantity, product.name)
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        timestamp = int(event.timestamp * _MICROSECONDS)
+        with self._lock:
+            if event.operation == OPERATION_UPSERT:
+                product = ProductRepository.from_record(event.product_id, event.data)
+                self._record(event.product_id, self._state(product, timestamp))
+            else:
+                self._record(event.product_id, _State(timestamp, None, 0, ""))
+            self._sequence = max(self._sequence, event.sequence)
+
+    def _record(self, product_id: int, state: _State) -> None:
+        """
+        Append a state to a product's series unless nothing changed.
+
+        :param product_id: The ID of the product.
+        :param state: Its new state.
+        """
+        history = self._products.get(product_id)
+        if history is None:
+            if state.price_cents is None:
+                return
+            history = self._products[product_id] = _ProductHistory()
+        last = history.last
+        if last is not None:
+            if last.price_cents is None and state.price_cents is None:
+                return
+            if last[1:] == state[1:]:
+                return
+            # Entries stay in time order even if the clock steps back.
+            state = state._replace(timestamp=max(state.timestamp, last.timestamp))
+        history.append(state, self.block_size)
+
+    def as_of(self, timestamp: float) -> List[Product]:
+        """
+        Reconstruct the catalog as it was at a point in time.
+
+        :param timestamp: The time, in seconds since the epoch.
+        :return: The products that existed then, by ascending ID.
+        """
+        moment = int(timestamp * _MICROSECONDS)
+        with self._lock:
+            products = []
+            for product_id in sorted(self._products):
+                state = self._products[product_id].state_at(moment)
+                product = _to_product(product_id, state) if state else None
+                if product is not None:
+                    products.append(product)
+            return products
+
+    def product_as_of(self, product_id: int, timestamp: float) -> Optional[Product]:
+        """
+        Get a product as it was at a point in time.
+
+        :param product_id: The ID of the product.
+        :param timestamp: The time, in seconds since the epoch.
+        :return: The product, or None if it did not exist then.
+        """
+        with self._lock:
+            history = self._products.get(product_id)
+            if history is None:
+                return None
+            state = history.state_at(int(timestamp * _MICROSECONDS))
+            return _to_product(product_id, state) if state else None
+
+    def product_history(self, product_id: int) -> List[HistoryEntry]:
+        """
+        List every recorded change of a product.
+
+        :param product_id: The ID of the product.
+        :return: The changes, oldest first; empty for an unknown product.
+        """
+        with self._lock:
+            history = self._products.get(product_id)
+            if history is None:
+                return []
+            return [
+                HistoryEntry(
+                    state.timestamp / _MICROSECONDS, _to_product(product_id, state)
+                )
+                for state in history.states()
+            ]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Describe the size of the history.
+
+        :return: The number of products, compressed blocks, bytes those blocks take
+            and states not compressed yet.
+        """
+        with self._lock:
+            histories = list(self._products.values())
+            blocks = [block for history in histories for block in history.blocks]
+            return {
+                "products": len(histories),
+                "blocks": len(blocks),
+                "block_bytes": sum(len(block) for block in blocks),
+                "open_states": sum(len(history.tail) for history in histories),
+            }
+
+    def _load(self) -> None:
+        """
+        Read the history file, reopening the last block of each product as its tail.
+
+        A file that cannot be read is copied to <file>.corrupt and the history starts
+        empty, so a damaged history never keeps the catalog from starting.
+        """
+        if self._file_handler is None:
+            return
+        data = self._file_handler.read_bytes()
+        if data is None:
+            return
+        try:
+            self._sequence, self._products = self._parse(data)
+        except (ValueError, TypeError, KeyError, IndexError, struct.error, zlib.error):
+            filename = self._file_handler.filename
+            logger.warning(
+                "%s is damaged; keeping it as %s.corrupt and starting an empty history",
+                filename,
+                filename,
+            )
+            FileHandler(f"{filename}.corrupt").write_bytes(data)
+
+    def _parse(self, data: bytes) -> Tuple[int, Dict[int, _ProductHistory]]:
+        """
+        Decode the content of a history file.
+
+        :param data: The whole file.
+        :return: The last applied sequence and the time series by product ID.
+        :raises ValueError: If the file is not a complete inventory history; damaged
+            blocks may also raise struct.error, zlib.error or the errors of json.
+        """
+        if not data.startswith(HISTORY_MAGIC):
+            raise ValueError("Not an inventory history.")
+        position = len(HISTORY_MAGIC)
+        (length,) = _LENGTH.unpack_from(data, position)
+        position += _LENGTH.size
+        sequence = int(json.loads(data[position : position + length])["sequence"])
+        position += length
+        products: Dict[int, _ProductHistory] = {}
+        while position < len(data):
+            product_id, start, length = _BLOCK_HEADER.unpack_from(data, position)
+            position += _BLOCK_HEADER.size
+            if position + length > len(data):
+                raise ValueError("Truncated inventory history.")
+            history = products.setdefault(product_id, _ProductHistory())
+            history.starts.append(start)
+            history.blocks.append(data[position : position + length])
+            position += length
+        for history in products.values():
+            states = decode_block(history.blocks[-1])
+            history.last = states[-1]
+            if len(states) < self.block_size:
+                history.starts.pop()
+                history.blocks.pop()
+                history.tail = states
+        return sequence, products
+
+    def save(self) -> None:
+        """
+        Write the history to its file atomically; without a file handler, do nothing.
+        """
+        if self._file_handler is None:
+            return
+        with self._lock:
+            header = json.dumps({"sequence": self._sequence}).encode("utf-8")
+            chunks = [HISTORY_MAGIC, _LENGTH.pack(len(header)), header]
+            for product_id, history in self._products.items():
+                blocks = list(zip(history.starts, history.blocks))
+                if history.tail:
+                    blocks.append(
+                        (history.tail[0].timestamp, encode_block(history.tail))
+                    )
+                for start, block in blocks:
+                    chunks.append(_BLOCK_HEADER.pack(product_id, start, len(block)))
+                    chunks.append(block)
+            self._file_handler.write_chunks(chunks)
+
+    def close(self) -> None:
+        """
+        Stop recording changes and save the history.
+        """
+        if self._subscription is not None:
+            self._subscription.cancel()
+            self._subscription = None
+        self.save()
@@ -1,11 +1,44 @@
+import sys
+from typing import Iterable, List, Optional, TextIO
+
+DEFAULT_BUFFER_SIZE: int = 64 * 1024
+
+
 class IOHandler:
+    def __init__(
+        self,
+        buffered: bool = False,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        stream: Optional[TextIO] = None,
+    ):
+        """
+        Initialize an IOHandler instance.
+
+        :param buffered: If True, output is collected and written in large batches.
+        :param buffer_size: The number of buffered characters that triggers a flush.
+        :param stream: The output stream; defaults to the current sys.stdout.
+        """
+        self._buffered = buffered
+        self._buffer_size = buffer_size
+        self._stream = stream
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+
+    @property
+    def stream(self) -> TextIO:
+        # Looked up on every use so redirections of sys.stdout are honoured.
+        return self._stream if self._stream is not None else sys.stdout
+
     def input(self, prompt: str) -> str:
         """
         Read user input from the console with the provided prompt.
 
+        Pending buffered output is flushed first so it appears before the prompt.
+
         :param prompt: The prompt message displayed to the user.
         :return: The user's input as a string.
         """
+        self.flush()
         return input(prompt)
 
     def print(self, message: str) -> None:
@@ -14,4 +47,36 @@ class IOHandler:
 
         :param message: The message to be displayed.
         """
-        print(message)
+        if self._buffered:
+            self._append(message)
+        else:
+            print(message, file=self.stream)
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        """
+        Print many messages, one per line, with as few writes as possible.
+
+        :param lines: The messages to be displayed.
+        """
+        if self._buffered:
+            for line in lines:
+                self._append(line)
+        else:
+            self.stream.writelines(line + "\n" for line in lines)
+
+    def flush(self) -> None:
+        """
+        Write any buffered output to the stream.
+        """
+        if self._buffer:
+            self._buffer.append("")
+            self.stream.write("\n".join(self._buffer))
+            self._buffer.clear()
+            self._buffered_chars = 0
+        self.stream.flush()
+
+    def _append(self, line: str) -> None:
+        self._buffer.append(line)
+        self._buffered_chars += len(line) + 1
+        if self._buffered_chars >= self._buffer_size:
+            self.flush()
@@ -0,0 +1,441 @@
+# load_generator.py
+# Drives a mixed read/write/bulk workload against ProductService and reports latency.
+#
+# Usage: python load_generator.py [--backend NAME|all] [--rate OPS] [--duration SECS]
+#        [--mix read=80,query=5,write=10,bulk=5] [--workers N] [--processes N]
+# SRP: LoadGenerator issues operations on an open-loop schedule and records how long
+# each took; LoadReport turns the recorded latencies into per-operation statistics.
+
+import argparse
+import bisect
+import itertools
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from product_query import Query, where
+from product_repository import ProductRepository
+from product_service import ProductService
+from product_validator import ProductValidator
+from storage_backends import backend_names, open_loader
+
+OPERATION_READ: str = "read"
+OPERATION_QUERY: str = "query"
+OPERATION_WRITE: str = "write"
+OPERATION_BULK: str = "bulk"
+OPERATIONS = (OPERATION_READ, OPERATION_QUERY, OPERATION_WRITE, OPERATION_BULK)
+DEFAULT_MIX: Dict[str, float] = {
+    OPERATION_READ: 80,
+    OPERATION_QUERY: 5,
+    OPERATION_WRITE: 10,
+    OPERATION_BULK: 5,
+}
+QUERY_SPAN: int = 100  # Width of the ID range a query operation reads.
+# IDs written by different processes start this far apart so they never collide.
+PROCESS_ID_STRIDE: int = 10**12
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parse a workload mix such as "read=80,write=15,bulk=5".
+
+    :param text: Comma-separated operation=weight pairs.
+    :return: The weight of every listed operation.
+    :raises ValueError: If an operation is unknown or a weight is not a positive number.
+    """
+    mix = {}
+    for part in text.split(","):
+        operation, _, weight = part.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{operation}'. Use {OPERATIONS}.")
+        mix[operation] = float(weight)
+        if not mix[operation] > 0:
+            raise ValueError(f"The weight of '{operation}' must be positive.")
+    return mix
+
+
+class ZipfianKeys:
+    """
+    Draws keys with Zipfian popularity: the k-th most popular key is chosen with a
+    probability proportional to 1 / k**exponent.
+
+    Attributes:
+    - _keys: The keys, most popular first.
+    - _cumulative: The running sum of the weights, for sampling by bisection.
+    """
+
+    def __init__(self, keys: Sequence[int], exponent: float = 1.0, seed: int = 0):
+        """
+        Initialize ZipfianKeys over the given keys.
+
+        :param keys: The keys to draw from.
+        :param exponent: The skew; 0 is uniform, larger values favour fewer keys.
+        :param seed: Decides which keys are the popular ones.
+        """
+        self._keys = list(keys)
+        # Popularity is not tied to key order, so hot keys are spread over the ID range.
+        random.Random(seed).shuffle(self._keys)
+        self._cumulative = list(
+            itertools.accumulate(
+                1 / rank**exponent for rank in range(1, len(self._keys) + 1)
+            )
+        )
+
+    def sample(self, rng: random.Random) -> int:
+        position = bisect.bisect_left(
+            self._cumulative, rng.random() * self._cumulative[-1]
+        )
+        return self._keys[min(position, len(self._keys) - 1)]
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """
+    Get a percentile by the nearest-rank method.
+
+    :param sorted_values: The values in ascending order.
+    :param fraction: The percentile as a fraction, e.g. 0.99.
+    :return: The percentile, or 0.0 if there are no values.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class OperationStats(NamedTuple):
+    """Latency (in seconds), throughput and errors of one operation type."""
+
+    count: int
+    errors: int
+    throughput: float
+    p50: float
+    p99: float
+    p999: float
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.count if self.count else 0.0
+
+
+class LoadReport:
+    """
+    The measurements of one load run.
+
+    Latencies are measured from the scheduled arrival time, so time spent waiting for
+    a free worker counts, as it would for a real client.
+
+    Attributes:
+    - duration: The length of the run in seconds.
+    - offered_rate: The target arrival rate in operations per second.
+    - latencies: Per operation, the latency of every successful call.
+    - errors: Per operation, the number of calls that raised.
+    """
+
+    def __init__(self, duration: float, offered_rate: float):
+        self.duration = duration
+        self.offered_rate = offered_rate
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, operation: str, latency: float, failed: bool) -> None:
+        if failed:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+        else:
+            self.latencies.setdefault(operation, []).append(latency)
+
+    def merge(self, other: "LoadReport") -> None:
+        """
+        Add the measurements of a run that happened at the same time, e.g. in another
+        process.
+
+        :param other: The report to add.
+        """
+        self.offered_rate += other.offered_rate
+        for operation, latencies in other.latencies.items():
+            self.latencies.setdefault(operation, []).extend(latencies)
+        for operation, errors in other.errors.items():
+            self.errors[operation] = self.errors.get(operation, 0) + errors
+
+    def stats(self) -> Dict[str, OperationStats]:
+        result = {}
+        for operation in OPERATIONS:
+            latencies = sorted(self.latencies.get(operation, ()))
+            errors = self.errors.get(operation, 0)
+            count = len(latencies) + errors
+            if not count:
+                continue
+            result[operation] = OperationStats(
+                count,
+                errors,
+                count / self.duration,
+                percentile(latencies, 0.5),
+                percentile(latencies, 0.99),
+                percentile(latencies, 0.999),
+            )
+        return result
+
+    def describe(self) -> List[str]:
+        """
+        Describe the run as a table, one row per operation.
+
+        :return: The lines of the table.
+        """
+        lines = [
+            f"offered {self.offered_rate:.0f} ops/s for {self.duration:.1f}s",
+            f"{'operation':<10}{'count':>9}{'ops/s':>10}{'errors':>9}"
+            f"{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}",
+        ]
+        for operation, stats in self.stats().items():
+            lines.append(
+                f"{operation:<10}{stats.count:>9}{stats.throughput:>10.1f}"
+                f"{stats.error_rate:>9.2%}{stats.p50 * 1000:>10.3f}"
+                f"{stats.p99 * 1000:>10.3f}{stats.p999 * 1000:>10.3f}"
+            )
+        return lines
+
+
+class LoadGenerator:
+    """
+    An open-loop load generator.
+
+    Arrivals follow a Poisson process at the target rate and are dispatched on
+    schedule whether or not earlier operations have finished, so a slow service
+    builds a queue instead of slowing the load down.
+
+    Attributes:
+    - _service: The ProductService under load.
+    - _keys: The popularity distribution of existing product IDs.
+    - _operations: The operations to choose from and their cumulative weights.
+    - _bulk_size: The number of products added by one bulk operation.
+    - _new_ids: Issues the IDs of products added during the run.
+    - _rng: The random source of the dispatcher.
+    """
+
+    def __init__(
+        self,
+        service: ProductService,
+        existing_ids: Sequence[int],
+        mix: Optional[Dict[str, float]] = None,
+        zipf_exponent: float = 1.0,
+        bulk_size: int = 100,
+        first_new_id: Optional[int] = None,
+        seed: int = 0,
+    ):
+        """
+        Initialize a LoadGenerator.
+
+        :param service: The ProductService to drive.
+        :param existing_ids: The IDs read and queried; must not be empty.
+        :param mix: The relative weight of every operation; defaults to DEFAULT_MIX.
+        :param zipf_exponent: The skew of key popularity.
+        :param bulk_size: The number of products added by one bulk operation.
+        :param first_new_id: The first ID used for writes; defaults to above the
+            highest existing ID.
+        :param seed: The seed of all random choices.
+        """
+        self._service = service
+        self._keys = ZipfianKeys(existing_ids, zipf_exponent, seed)
+        mix = mix or DEFAULT_MIX
+        self._operations = list(mix)
+        self._weights = list(itertools.accumulate(mix.values()))
+        self._bulk_size = bulk_size
+        if first_new_id is None:
+            first_new_id = max(existing_ids) + 1
+        self._new_ids: Iterator[int] = itertools.count(first_new_id)
+        self._ids_lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def run(self, rate: float, duration: float, workers: int = 8) -> LoadReport:
+        """
+        Apply the workload for a while and measure it.
+
+        :param rate: The target arrival rate in operations per second.
+        :param duration: How long new operations are started, in seconds.
+        :param workers: The number of threads executing operations.
+        :return: The LoadReport of the run.
+        """
+        schedule = []
+        elapsed = self._rng.expovariate(rate)
+        while elapsed < duration:
+            (operation,) = self._rng.choices(
+                self._operations, cum_weights=self._weights
+            )
+            schedule.append((elapsed, operation, self._keys.sample(self._rng)))
+            elapsed += self._rng.expovariate(rate)
+
+        report = LoadReport(duration, rate)
+        report_lock = threading.Lock()
+
+        def execute(scheduled: float, operation: str, key: int) -> None:
+            failed = False
+            try:
+                self._execute(operation, key)
+            except Exception:
+                failed = True
+            latency = time.perf_counter() - scheduled
+            with report_lock:
+                report.record(operation, latency, failed)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            start = time.perf_counter()
+            for offset, operation, key in schedule:
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(execute, start + offset, operation, key)
+        return report
+
+    def _next_ids(self, count: int) -> List[int]:
+        with self._ids_lock:
+            return list(itertools.islice(self._new_ids, count))
+
+    def _execute(self, operation: str, key: int) -> None:
+        if operation == OPERATION_READ:
+            self._service.product_exists(key)
+        elif operation == OPERATION_QUERY:
+            self._service.query(
+                Query(where("id").between(key, key + QUERY_SPAN)).take(10)
+            )
+        elif operation == OPERATION_WRITE:
+            (product_id,) = self._next_ids(1)
+            self._service.add_product(
+                str(product_id), f"Load {product_id}", "9.99", "5"
+            )
+        else:
+            self._service.add_products(
+                (str(product_id), f"Load {product_id}", "9.99", "5")
+                for product_id in self._next_ids(self._bulk_size)
+            )
+
+
+class LoadSettings(NamedTuple):
+    """Everything one load run needs; picklable, so it can be sent to a process."""
+
+    backend: str
+    location: str
+    catalog_size: int
+    rate: float
+    duration: float
+    workers: int
+    mix: Dict[str, float]
+    zipf_exponent: float
+    bulk_size: int
+    seed: int
+
+
+def open_service(backend: str, location: str, catalog_size: int) -> ProductService:
+    """
+    Open a catalog on a storage backend and fill it with products 1..catalog_size.
+
+    :param backend: The name of the storage backend.
+    :param location: Where the backend stores the catalog.
+    :param catalog_size: The number of products to start with.
+    :return: A ProductService over the catalog.
+    """
+    service = ProductService(
+        ProductRepository(open_loader(backend, location)), ProductValidator()
+    )
+    service.add_products(
+        (str(product_id), f"Product {product_id}", "1.00", "10")
+        for product_id in range(1, catalog_size + 1)
+        if not service.product_exists(product_id)
+    )
+    return service
+
+
+def run_load(settings: LoadSettings, process_index: int = 0) -> LoadReport:
+    """
+    Open the catalog described by the settings and run the workload against it.
+
+    :param settings: The LoadSettings of the run.
+    :param process_index: Which of several concurrent processes this is; selects
+        its catalog location, IDs and random seed.
+    :return: The LoadReport of the run.
+    """
+    location = settings.location
+    if process_index:
+        root, extension = os.path.splitext(location)
+        location = f"{root}.{process_index}{extension}"
+    service = open_service(settings.backend, location, settings.catalog_size)
+    generator = LoadGenerator(
+        service,
+        range(1, settings.catalog_size + 1),
+        settings.mix,
+        settings.zipf_exponent,
+        settings.bulk_size,
+        first_new_id=settings.catalog_size + 1 + process_index * PROCESS_ID_STRIDE,
+        seed=settings.seed + process_index,
+    )
+    return generator.run(settings.rate, settings.duration, settings.workers)
+
+
+def run_load_in_processes(settings: LoadSettings, processes: int) -> LoadReport:
+    """
+    Run the workload in several processes at once and combine their measurements.
+
+    Processes cannot share a ProductService, so every process drives its own catalog
+    on the same backend at an equal share of the target rate.
+
+    :param settings: The LoadSettings with the total target rate.
+    :param processes: The number of processes.
+    :return: The combined LoadReport.
+    """
+    share = settings._replace(rate=settings.rate / processes)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        reports = list(executor.map(run_load, [share] * processes, range(processes)))
+    combined = reports[0]
+    for report in reports[1:]:
+        combined.merge(report)
+    return combined
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test ProductService.")
+    parser.add_argument(
+        "--backend", default="all", help=f"One of {backend_names()} or 'all'."
+    )
+    parser.add_argument("--rate", type=float, default=500.0, help="Operations/second.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds.")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. read=80,write=20"
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Threads per process.")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--catalog-size", type=int, default=10_000)
+    parser.add_argument("--zipf", type=float, default=1.0, help="Key skew exponent.")
+    parser.add_argument("--bulk-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    backends = backend_names() if args.backend == "all" else [args.backend]
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as directory:
+            settings = LoadSettings(
+                backend,
+                os.path.join(directory, "catalog"),
+                args.catalog_size,
+                args.rate,
+                args.duration,
+                args.workers,
+                args.mix,
+                args.zipf,
+                args.bulk_size,
+                args.seed,
+            )
+            if args.processes > 1:
+                report = run_load_in_processes(settings, args.processes)
+            else:
+                report = run_load(settings)
+        print(f"backend {backend}")
+        print("\n".join(report.describe()))
+        print()
+
+
+if __name__ == "__main__":
+    main()
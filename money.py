@@ -0,0 +1,49 @@
+# money.py
+# Conversions between decimal prices and the integer-cents representation.
+# Prices are stored as an exact number of cents; floats are only a compatibility view.
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Union
+
+CENTS_PER_UNIT: int = 100
+_CENT = Decimal("0.01")
+
+
+def to_cents(value: Union[str, int, float, Decimal]) -> int:
+    """
+    Convert a price to a whole number of cents, rounding half up.
+
+    Floats are converted through their shortest repr, so 1.005 becomes 101 cents
+    rather than the 100 its binary value would round to.
+
+    :param value: The price as a string, number or Decimal.
+    :return: The price in cents.
+    :raises ValueError: If the value is not a finite number.
+    """
+    try:
+        amount = Decimal(value if isinstance(value, Decimal) else str(value).strip())
+        return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP) * CENTS_PER_UNIT)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Not a valid price: {value!r}")
+
+
+def cents_to_float(cents: int) -> float:
+    """
+    Convert cents to a float price.
+
+    :param cents: The price in cents.
+    :return: The price as a float, e.g. 1234 -> 12.34.
+    """
+    return cents / CENTS_PER_UNIT
+
+
+def format_cents(cents: int) -> str:
+    """
+    Format cents as a plain decimal string with exactly two decimals.
+
+    :param cents: The price in cents.
+    :return: The formatted price, e.g. 1234 -> "12.34".
+    """
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(cents), CENTS_PER_UNIT)
+    return f"{sign}{whole}.{fraction:02d}"
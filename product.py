@@ -2,6 +2,8 @@
 
 # This module defines a data class representing a product.
 
+from money import cents_to_float, to_cents
+
 
 # The Product class represents a single product item. It uses properties
 # and setters for encapsulating the access and modification of certain
@@ -14,7 +16,7 @@ class Product:
     Attributes:
     - _product_id: A private attribute that holds the unique identifier for the product.
     - _name: A private attribute that holds the name of the product.
-    - _price: A private attribute that holds the price of the product.
+    - _price_cents: A private attribute that holds the price of the product in whole cents.
     - _quantity: A private attribute that indicates the quantity of the product in stock.
     """
 
@@ -24,15 +26,35 @@ class Product:
 
         :param product_id: The unique identifier for the product as an integer.
         :param name: The name of the product as a string.
-        :param price: The price of the product as a float.
+        :param price: The price of the product as a float; it is stored as whole cents.
         :param quantity: The quantity of the product in stock as an integer.
         """
         # Initialize the Product object with the given attributes.
         self._product_id = product_id  # Setting the product's unique identifier
         self._name = name  # Setting the product's name
-        self._price = price  # Setting the product's price
+        self._price_cents = to_cents(price)  # Setting the product's price in cents
         self._quantity = quantity  # Setting the product's quantity in stock
 
+    @classmethod
+    def from_cents(
+        cls, product_id: int, name: str, price_cents: int, quantity: int
+    ) -> "Product":
+        """
+        Create a Product from a price already expressed in whole cents.
+
+        :param product_id: The unique identifier for the product as an integer.
+        :param name: The name of the product as a string.
+        :param price_cents: The price of the product in cents as an integer.
+        :param quantity: The quantity of the product in stock as an integer.
+        :return: The new Product.
+        """
+        product = cls.__new__(cls)
+        product._product_id = product_id
+        product._name = name
+        product._price_cents = price_cents
+        product._quantity = quantity
+        return product
+
     @property
     def product_id(self) -> int:
         """
@@ -67,9 +89,20 @@ class Product:
         """
         Get the product's price.
 
+        This is a compatibility view of price_cents.
+
         :return: The product's price as a float.
         """
-        return self._price
+        return cents_to_float(self._price_cents)
+
+    @property
+    def price_cents(self) -> int:
+        """
+        Get the product's price in whole cents.
+
+        :return: The product's price in cents as an integer.
+        """
+        return self._price_cents
 
     @property
     def quantity(self) -> int:
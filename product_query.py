@@ -0,0 +1,567 @@
+# product_query.py
+# A small predicate query language over products, with index-aware planning.
+# SRP: this module describes queries and chooses how to run them; ProductRepository
+# executes the chosen plan against its data and indexes.
+
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from constants_messages import ProductMessages
+from money import to_cents
+from product import Product
+
+# Queryable fields and the Product attribute each one reads.
+FIELDS: Tuple[str, ...] = ("product_id", "name", "price_cents", "quantity")
+
+# Friendlier names accepted by where() and parse_query(). Prices given as "price" are
+# in dollars and are converted to cents.
+FIELD_ALIASES: Dict[str, str] = {"id": "product_id", "price": "price_cents"}
+
+ACCESS_ID_LOOKUP: str = "id lookup"
+ACCESS_INDEX_RANGE: str = "index range"
+ACCESS_FULL_SCAN: str = "full scan"
+
+
+class QueryError(ValueError):
+    """Raised for malformed queries; the message is meant for the user"""
+
+    pass
+
+
+class Predicate(ABC):
+    """
+    A condition on a single product. Predicates combine with & (and), | (or), ~ (not).
+    """
+
+    @abstractmethod
+    def matches(self, product: Product) -> bool:
+        pass
+
+    @abstractmethod
+    def describe(self) -> str:
+        pass
+
+    def __and__(self, other: "Predicate") -> "Predicate":
+        return And(self, other)
+
+    def __or__(self, other: "Predicate") -> "Predicate":
+        return Or(self, other)
+
+    def __invert__(self) -> "Predicate":
+        return Not(self)
+
+    def __repr__(self) -> str:
+        return self.describe()
+
+
+class Range:
+    """
+    A possibly open interval of values, used both by predicates and by the planner.
+    """
+
+    def __init__(
+        self,
+        low: Any = None,
+        high: Any = None,
+        low_inclusive: bool = True,
+        high_inclusive: bool = True,
+    ):
+        self.low = low
+        self.high = high
+        self.low_inclusive = low_inclusive
+        self.high_inclusive = high_inclusive
+
+    def intersect(self, other: "Range") -> "Range":
+        """
+        Narrow this range by another one.
+
+        :param other: The range to intersect with.
+        :return: A new Range covering values in both ranges.
+        """
+        low, low_inclusive = self.low, self.low_inclusive
+        if other.low is not None and (
+            low is None
+            or other.low > low
+            or (other.low == low and not other.low_inclusive)
+        ):
+            low, low_inclusive = other.low, other.low_inclusive
+        high, high_inclusive = self.high, self.high_inclusive
+        if other.high is not None and (
+            high is None
+            or other.high < high
+            or (other.high == high and not other.high_inclusive)
+        ):
+            high, high_inclusive = other.high, other.high_inclusive
+        return Range(low, high, low_inclusive, high_inclusive)
+
+    def contains(self, value: Any) -> bool:
+        if self.low is not None:
+            if value < self.low or (value == self.low and not self.low_inclusive):
+                return False
+        if self.high is not None:
+            if value > self.high or (value == self.high and not self.high_inclusive):
+                return False
+        return True
+
+    def is_single_value(self) -> bool:
+        return (
+            self.low is not None
+            and self.low == self.high
+            and self.low_inclusive
+            and self.high_inclusive
+        )
+
+    def describe(self) -> str:
+        low = "-inf" if self.low is None else repr(self.low)
+        high = "+inf" if self.high is None else repr(self.high)
+        opening = "[" if self.low is not None and self.low_inclusive else "("
+        closing = "]" if self.high is not None and self.high_inclusive else ")"
+        return f"{opening}{low}, {high}{closing}"
+
+
+class RangePredicate(Predicate):
+    """
+    A field lying in a Range; comparisons and "between" are both range predicates.
+    """
+
+    def __init__(self, field: str, value_range: Range, text: str):
+        self.field = field
+        self.range = value_range
+        self._text = text
+
+    def matches(self, product: Product) -> bool:
+        return self.range.contains(getattr(product, self.field))
+
+    def describe(self) -> str:
+        return self._text
+
+
+class NotEqual(Predicate):
+    def __init__(self, field: str, value: Any):
+        self.field = field
+        self.value = value
+
+    def matches(self, product: Product) -> bool:
+        return getattr(product, self.field) != self.value
+
+    def describe(self) -> str:
+        return f"{self.field} != {self.value!r}"
+
+
+class StartsWith(Predicate):
+    def __init__(self, field: str, prefix: str):
+        self.field = field
+        self.prefix = prefix
+
+    def matches(self, product: Product) -> bool:
+        return str(getattr(product, self.field)).startswith(self.prefix)
+
+    def describe(self) -> str:
+        return f"{self.field} starts with {self.prefix!r}"
+
+
+class And(Predicate):
+    def __init__(self, *predicates: Predicate):
+        # Nested conjunctions are flattened so the planner sees every conjunct.
+        self.predicates: List[Predicate] = []
+        for predicate in predicates:
+            if isinstance(predicate, And):
+                self.predicates.extend(predicate.predicates)
+            else:
+                self.predicates.append(predicate)
+
+    def matches(self, product: Product) -> bool:
+        return all(predicate.matches(product) for predicate in self.predicates)
+
+    def describe(self) -> str:
+        return " AND ".join(predicate.describe() for predicate in self.predicates)
+
+
+class Or(Predicate):
+    def __init__(self, *predicates: Predicate):
+        self.predicates = list(predicates)
+
+    def matches(self, product: Product) -> bool:
+        return any(predicate.matches(product) for predicate in self.predicates)
+
+    def describe(self) -> str:
+        return "(" + " OR ".join(p.describe() for p in self.predicates) + ")"
+
+
+class Not(Predicate):
+    def __init__(self, predicate: Predicate):
+        self.predicate = predicate
+
+    def matches(self, product: Product) -> bool:
+        return not self.predicate.matches(product)
+
+    def describe(self) -> str:
+        return f"NOT ({self.predicate.describe()})"
+
+
+def resolve_field(name: str) -> str:
+    """
+    Map a field name or alias to the Product attribute it refers to.
+
+    :param name: The field name, e.g. "price" or "quantity".
+    :return: The canonical field name.
+    :raises QueryError: If the field is unknown.
+    """
+    field = FIELD_ALIASES.get(name.lower(), name.lower())
+    if field not in FIELDS:
+        raise QueryError(ProductMessages.unknown_query_field(name))
+    return field
+
+
+class Field:
+    """
+    Builds predicates on one field, e.g. where("quantity").lt(5).
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self.field = resolve_field(name)
+
+    def _value(self, value: Any) -> Any:
+        try:
+            if self.field == "price_cents" and self._name.lower() == "price":
+                return to_cents(value)
+            if self.field in ("product_id", "quantity", "price_cents"):
+                return int(value)
+        except (TypeError, ValueError):
+            raise QueryError(ProductMessages.invalid_query_value(self._name, value))
+        return str(value)
+
+    def _range(self, text: str, **bounds) -> RangePredicate:
+        return RangePredicate(self.field, Range(**bounds), text)
+
+    def eq(self, value: Any) -> Predicate:
+        value = self._value(value)
+        return self._range(f"{self.field} = {value!r}", low=value, high=value)
+
+    def ne(self, value: Any) -> Predicate:
+        return NotEqual(self.field, self._value(value))
+
+    def lt(self, value: Any) -> Predicate:
+        value = self._value(value)
+        return self._range(
+            f"{self.field} < {value!r}", high=value, high_inclusive=False
+        )
+
+    def le(self, value: Any) -> Predicate:
+        value = self._value(value)
+        return self._range(f"{self.field} <= {value!r}", high=value)
+
+    def gt(self, value: Any) -> Predicate:
+        value = self._value(value)
+        return self._range(f"{self.field} > {value!r}", low=value, low_inclusive=False)
+
+    def ge(self, value: Any) -> Predicate:
+        value = self._value(value)
+        return self._range(f"{self.field} >= {value!r}", low=value)
+
+    def between(self, low: Any, high: Any) -> Predicate:
+        low, high = self._value(low), self._value(high)
+        return self._range(
+            f"{self.field} between {low!r} and {high!r}", low=low, high=high
+        )
+
+    def startswith(self, prefix: str) -> Predicate:
+        return StartsWith(self.field, str(prefix))
+
+
+def where(name: str) -> Field:
+    """
+    Start building a predicate on a field.
+
+    :param name: The field name or alias.
+    :return: A Field whose methods create predicates.
+    """
+    return Field(name)
+
+
+class Query:
+    """
+    A filter, an optional sort order and an optional row limit.
+
+    Attributes:
+    - predicate: The filter, or None to match every product.
+    - sort_by: The canonical field to sort on, or None to keep catalog order.
+    - descending: Whether the sort order is reversed.
+    - limit: The maximum number of rows, or None for all.
+    """
+
+    def __init__(
+        self,
+        predicate: Optional[Predicate] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ):
+        if limit is not None and limit < 0:
+            raise QueryError(ProductMessages.INVALID_QUERY_LIMIT)
+        self.predicate = predicate
+        self.sort_by = resolve_field(sort_by) if sort_by else None
+        self.descending = descending
+        self.limit = limit
+
+    def filter(self, predicate: Predicate) -> "Query":
+        combined = predicate if self.predicate is None else self.predicate & predicate
+        return Query(combined, self.sort_by, self.descending, self.limit)
+
+    def order_by(self, field: str, descending: bool = False) -> "Query":
+        return Query(self.predicate, field, descending, self.limit)
+
+    def take(self, limit: int) -> "Query":
+        return Query(self.predicate, self.sort_by, self.descending, limit)
+
+    def sort_key(self, product: Product):
+        return (getattr(product, self.sort_by), product.product_id)
+
+
+class QueryPlan:
+    """
+    The access path chosen for a query and the work left after it.
+
+    Attributes:
+    - query: The planned Query.
+    - access_path: One of ACCESS_ID_LOOKUP, ACCESS_INDEX_RANGE or ACCESS_FULL_SCAN.
+    - field: The field used by the access path, if any.
+    - range: The value range read from the index, or the looked-up ID.
+    - estimated_rows: How many products the access path will read.
+    - residual: Predicates still evaluated on every product read.
+    - sorted_by_access: True if the access path already returns rows in sort order.
+    """
+
+    def __init__(
+        self,
+        query: Query,
+        access_path: str,
+        estimated_rows: int,
+        residual: List[Predicate],
+        field: Optional[str] = None,
+        value_range: Optional[Range] = None,
+        sorted_by_access: bool = False,
+    ):
+        self.query = query
+        self.access_path = access_path
+        self.field = field
+        self.range = value_range
+        self.estimated_rows = estimated_rows
+        self.residual = residual
+        self.sorted_by_access = sorted_by_access
+
+    def matches(self, product: Product) -> bool:
+        for predicate in self.residual:
+            if not predicate.matches(product):
+                return False
+        return True
+
+    def describe(self) -> List[str]:
+        """
+        Describe the plan as human-readable lines.
+
+        :return: One line per plan step.
+        """
+        if self.access_path == ACCESS_FULL_SCAN:
+            access = ACCESS_FULL_SCAN
+        elif self.access_path == ACCESS_ID_LOOKUP:
+            access = f"{ACCESS_ID_LOOKUP} product_id = {self.range.low!r}"
+        else:
+            access = f"{ACCESS_INDEX_RANGE} on {self.field} {self.range.describe()}"
+        lines = [f"Access: {access} (est. {self.estimated_rows} rows)"]
+        if self.residual:
+            lines.append("Filter: " + And(*self.residual).describe())
+        if self.query.sort_by:
+            order = "desc" if self.query.descending else "asc"
+            how = " (from index order)" if self.sorted_by_access else ""
+            lines.append(f"Sort: {self.query.sort_by} {order}{how}")
+        if self.query.limit is not None:
+            lines.append(f"Limit: {self.query.limit}")
+        return lines
+
+
+def plan_query(query: Query, indexes: Dict[str, Any], total_rows: int) -> QueryPlan:
+    """
+    Choose the cheapest access path for a query.
+
+    Conjuncts of the top-level AND that are ranges on the same field are merged. An
+    equality on product_id becomes an ID lookup; otherwise the indexed field whose
+    merged range matches the fewest entries is read from its index. A limited query
+    sorted on an indexed field reads that index in order. Everything not answered by
+    the access path is evaluated as a residual filter.
+
+    :param query: The Query to plan.
+    :param indexes: SortedIndex objects keyed by field name.
+    :param total_rows: The number of products in the catalog.
+    :return: The chosen QueryPlan.
+    """
+    if query.predicate is None:
+        conjuncts: List[Predicate] = []
+    elif isinstance(query.predicate, And):
+        conjuncts = query.predicate.predicates
+    else:
+        conjuncts = [query.predicate]
+
+    ranges: Dict[str, Range] = {}
+    covered: Dict[str, List[Predicate]] = {}
+    for predicate in conjuncts:
+        if isinstance(predicate, RangePredicate):
+            current = ranges.get(predicate.field, Range())
+            ranges[predicate.field] = current.intersect(predicate.range)
+            covered.setdefault(predicate.field, []).append(predicate)
+
+    def residual_without(field: str) -> List[Predicate]:
+        return [p for p in conjuncts if p not in covered[field]]
+
+    id_range = ranges.get("product_id")
+    if id_range is not None and id_range.is_single_value():
+        return QueryPlan(
+            query,
+            ACCESS_ID_LOOKUP,
+            1,
+            residual_without("product_id"),
+            field="product_id",
+            value_range=id_range,
+        )
+
+    best: Optional[QueryPlan] = None
+    for field, value_range in ranges.items():
+        index = indexes.get(field)
+        if index is None:
+            continue
+        estimate = index.count_range(
+            value_range.low,
+            value_range.high,
+            value_range.low_inclusive,
+            value_range.high_inclusive,
+        )
+        if best is None or estimate < best.estimated_rows:
+            best = QueryPlan(
+                query,
+                ACCESS_INDEX_RANGE,
+                estimate,
+                residual_without(field),
+                field=field,
+                value_range=value_range,
+                sorted_by_access=query.sort_by == field,
+            )
+
+    if best is not None and (best.estimated_rows < total_rows or best.sorted_by_access):
+        return best
+    if query.limit is not None and query.sort_by in indexes:
+        # Reading the sort field's index in order lets the scan stop after `limit` rows.
+        return QueryPlan(
+            query,
+            ACCESS_INDEX_RANGE,
+            total_rows,
+            list(conjuncts),
+            field=query.sort_by,
+            value_range=Range(),
+            sorted_by_access=True,
+        )
+    return QueryPlan(query, ACCESS_FULL_SCAN, total_rows, list(conjuncts))
+
+
+_TOKEN = re.compile(
+    r"\s*(?:'(?P<single>[^']*)'|\"(?P<double>[^\"]*)\"|(?P<op><=|>=|!=|==|=|<|>)"
+    r"|(?P<word>[^\s<>=!'\"]+))"
+)
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise QueryError(ProductMessages.INVALID_QUERY)
+        position = match.end()
+        if match.group("single") is not None or match.group("double") is not None:
+            value = match.group("single")
+            if value is None:
+                value = match.group("double")
+            tokens.append(("str", value))
+        elif match.group("op"):
+            tokens.append(("op", match.group("op")))
+        else:
+            tokens.append(("word", match.group("word")))
+    return tokens
+
+
+def parse_query(text: str) -> Optional[Predicate]:
+    """
+    Parse a filter such as "quantity < 5 and price between 10 and 50 and
+    name starts with 'USB'".
+
+    Conditions are joined with "and". Supported forms are FIELD OP VALUE with
+    OP one of = != < <= > >=, FIELD between LOW and HIGH, and FIELD starts with TEXT.
+
+    :param text: The filter text; empty text means no filter.
+    :return: The parsed Predicate, or None for an empty filter.
+    :raises QueryError: If the text is not a valid filter.
+    """
+    tokens = _tokenize(text)
+    if not tokens:
+        return None
+
+    position = 0
+
+    def take(kind: Optional[str] = None, word: Optional[str] = None) -> str:
+        nonlocal position
+        if position >= len(tokens):
+            raise QueryError(ProductMessages.INVALID_QUERY)
+        token_kind, value = tokens[position]
+        if (kind and token_kind != kind) or (word and value.lower() != word):
+            raise QueryError(ProductMessages.INVALID_QUERY)
+        position += 1
+        return value
+
+    def peek_word(word: str) -> bool:
+        return (
+            position < len(tokens)
+            and tokens[position][0] == "word"
+            and tokens[position][1].lower() == word
+        )
+
+    conditions = []
+    while True:
+        field = where(take("word"))
+        try:
+            if peek_word("between"):
+                take()
+                low = take()
+                take("word", "and")
+                conditions.append(field.between(low, take()))
+            elif peek_word("starts"):
+                take()
+                take("word", "with")
+                conditions.append(field.startswith(take()))
+            elif peek_word("startswith"):
+                take()
+                conditions.append(field.startswith(take()))
+            else:
+                operator = take("op")
+                value = take()
+                conditions.append(
+                    {
+                        "=": field.eq,
+                        "==": field.eq,
+                        "!=": field.ne,
+                        "<": field.lt,
+                        "<=": field.le,
+                        ">": field.gt,
+                        ">=": field.ge,
+                    }[operator](value)
+                )
+        except QueryError:
+            raise
+        except (TypeError, ValueError):
+            raise QueryError(ProductMessages.INVALID_QUERY)
+        if position == len(tokens):
+            break
+        take("word", "and")
+
+    return conditions[0] if len(conditions) == 1 else And(*conditions)
@@ -1,6 +1,24 @@
+import heapq
+import threading
+from array import array
+from itertools import islice
+from bloom_filter import BloomFilter, DEFAULT_FALSE_POSITIVE_RATE
+from catalog_merkle import CatalogMerkleTree
+from change_feed import ChangeFeed, OPERATION_REMOVE, OPERATION_UPSERT
 from data_loader import DataLoader
+from file_handler import FileHandler
+from money import format_cents, to_cents
 from product import Product
-from typing import Dict, List, Optional
+from product_query import (
+    ACCESS_FULL_SCAN,
+    ACCESS_ID_LOOKUP,
+    Query,
+    QueryPlan,
+    plan_query,
+)
+from sorted_index import SortedIndex
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from versioned_store import CatalogSnapshot, VersionedStore
 
 
 class ProductRepository:
@@ -8,18 +26,50 @@ class ProductRepository:
     A class that represents a repository of products.
 
     Attributes:
-    - _products: A dictionary to store product objects by their IDs.
+    - _products: A multi-version store of product objects keyed by their IDs.
     - _loader: An instance of DataLoader class.
+    - _id_filter: A Bloom filter over the stored product IDs.
+    - _bloom_handler: An optional FileHandler the Bloom filter is persisted with.
+    - _lock: A re-entrant lock serializing mutations of the repository.
+    - _indexes: Ordered secondary indexes keyed by the Product attribute they cover.
+    - _changes: The ChangeFeed every stored change is published to.
+    - _autosave: Whether every change is saved immediately.
+    - _dirty: Whether there are changes that have not been saved yet.
+    - _merkle: A content-hash tree over the products, for catalog diff and sync.
+    - _merkle_handler: An optional FileHandler the hash tree is persisted with.
     """
 
-    def __init__(self, loader: DataLoader):
+    # Attributes with an ordered index; names can be changed in place, so they are not.
+    INDEXED_FIELDS = ("product_id", "price_cents", "quantity")
+
+    def __init__(
+        self,
+        loader: DataLoader,
+        false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+        bloom_handler: Optional[FileHandler] = None,
+        change_feed: Optional[ChangeFeed] = None,
+        autosave: bool = True,
+        merkle_handler: Optional[FileHandler] = None,
+    ):
         """
         Initialize a ProductRepository instance.
 
         :param loader: An instance of DataLoader used to load and save product data.
+        :param false_positive_rate: The target false-positive rate of the ID filter.
+        :param bloom_handler: An optional FileHandler used to persist the ID filter next to the data.
+        :param change_feed: An optional ChangeFeed, e.g. a durable one; defaults to in-memory.
+        :param autosave: If False, changes are only saved by flush().
+        :param merkle_handler: An optional FileHandler used to persist the hash tree next to the data.
         """
-        self._products: Dict[int, Product] = {}
+        self._products: VersionedStore[Product] = VersionedStore()
         self._loader: DataLoader = loader
+        self._false_positive_rate = false_positive_rate
+        self._bloom_handler = bloom_handler
+        self._lock = threading.RLock()
+        self._changes = change_feed if change_feed is not None else ChangeFeed()
+        self._autosave = autosave
+        self._dirty = False
+        self._merkle_handler = merkle_handler
         self._load_products()
 
     def _load_products(self) -> None:
@@ -27,14 +77,76 @@ class ProductRepository:
         Load products from the data source using the DataLoader.
         """
         data: Dict[str, Dict[str, str]] = self._loader.load_data()
+        loaded: List[Product] = []
         for product_id, product_data in data.items():
-            product = Product(
-                int(product_id),
-                product_data["name"],
-                float(product_data["price"]),
-                int(product_data["quantity"]),
+            loaded.append(self.from_record(int(product_id), product_data))
+        self._products = VersionedStore(
+            (product.product_id, product) for product in loaded
+        )
+        self._indexes: Dict[str, SortedIndex] = {
+            field: SortedIndex(
+                [(getattr(product, field), product.product_id) for product in loaded]
+            )
+            for field in self.INDEXED_FIELDS
+        }
+        # The tree is always rebuilt from the loaded data so it can never be stale. A
+        # saved filter is only used if it was saved for exactly this content.
+        self._merkle = CatalogMerkleTree.from_products(loaded)
+        saved_filter = None
+        if self._bloom_handler is not None:
+            saved_filter = BloomFilter.load(
+                self._bloom_handler, fingerprint=self._merkle.root_hash
             )
-            self._products[product.product_id] = product
+        if (
+            saved_filter is not None
+            and saved_filter.count == len(loaded)
+            and saved_filter.false_positive_rate == self._false_positive_rate
+        ):
+            self._id_filter = saved_filter
+        else:
+            self._rebuild_id_filter()
+
+    def _rebuild_id_filter(self) -> None:
+        """
+        Rebuild the ID filter from the products currently held in memory.
+        """
+        self._id_filter = BloomFilter.from_keys(
+            self._products.keys(), false_positive_rate=self._false_positive_rate
+        )
+
+    def _track_ids(self, product_ids: Iterable[int]) -> None:
+        """
+        Record product IDs in the ID filter, growing the filter when it would overflow.
+
+        Must be called before the products are stored.
+
+        :param product_ids: The IDs of the products being stored.
+        """
+        new_ids = {
+            product_id for product_id in product_ids if product_id not in self._products
+        }
+        if self._id_filter.count + len(new_ids) <= self._id_filter.capacity:
+            for product_id in new_ids:
+                self._id_filter.add(product_id)
+            return
+
+        capacity = self._id_filter.capacity
+        while capacity < self._id_filter.count + len(new_ids):
+            capacity *= 2
+        keys = list(self._products.keys())
+        keys.extend(new_ids)
+        self._id_filter = BloomFilter.from_keys(
+            keys, capacity=capacity, false_positive_rate=self._false_positive_rate
+        )
+
+    def might_contain(self, product_id: int) -> bool:
+        """
+        Cheaply check whether a product ID may be stored in the repository.
+
+        :param product_id: The ID of the product to check.
+        :return: False if the product is definitely not stored, True if it may be.
+        """
+        return self._id_filter.might_contain(product_id)
 
     def add_product(self, product: Product) -> None:
         """
@@ -42,8 +154,240 @@ class ProductRepository:
 
         :param product: The product to be added.
         """
-        self._products[product.product_id] = product
-        self._save_products()
+        with self._lock:
+            self._track_ids([product.product_id])
+            self._index_product(product)
+            self._products.put(product.product_id, product)
+            self._changed()
+            self._publish_upserts([product])
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        """
+        Add several products to the repository and save them once.
+
+        :param products: The products to be added.
+        """
+        with self._lock:
+            # When an ID repeats within the batch, the last product wins.
+            unique = {product.product_id: product for product in products}
+            products = list(unique.values())
+            self._track_ids(product.product_id for product in products)
+            for product in products:
+                self._index_product(product)
+            # One version is published for the whole batch.
+            self._products.put_many(
+                (product.product_id, product) for product in products
+            )
+            self._changed()
+            self._publish_upserts(products)
+
+    def update_quantity(self, product_id: int, quantity: int) -> Optional[Product]:
+        """
+        Replace the stock level of a product.
+
+        Products are immutable, so a new version with the new quantity is stored.
+
+        :param product_id: The ID of the product.
+        :param quantity: The new quantity.
+        :return: The new version of the product, or None if there is no such product.
+        """
+        with self._lock:
+            current = self._products.get(product_id)
+            if current is None:
+                return None
+            product = Product.from_cents(
+                product_id, current.name, current.price_cents, quantity
+            )
+            self._index_product(product)
+            self._products.put(product_id, product)
+            self._changed()
+            self._publish_upserts([product])
+            return product
+
+    def remove_product(self, product_id: int) -> bool:
+        """
+        Remove a product from the repository.
+
+        :param product_id: The ID of the product to remove.
+        :return: True if the product existed.
+        """
+        return self.remove_products([product_id]) == 1
+
+    def remove_products(self, product_ids: Iterable[int]) -> int:
+        """
+        Remove several products from the repository and save once.
+
+        The ID filter keeps removed IDs, which only costs an extra lookup for them.
+
+        :param product_ids: The IDs of the products to remove.
+        :return: The number of products that existed and were removed.
+        """
+        with self._lock:
+            removed = [
+                product_id
+                for product_id in dict.fromkeys(product_ids)
+                if product_id in self._products
+            ]
+            if not removed:
+                return 0
+            for product_id in removed:
+                self._unindex_product(product_id)
+            self._products.put_many((product_id, None) for product_id in removed)
+            self._changed()
+            for product_id in removed:
+                self._changes.publish(OPERATION_REMOVE, product_id, None)
+            return len(removed)
+
+    def _changed(self) -> None:
+        """
+        Save after a change, or just remember the change when autosave is off.
+        """
+        if self._autosave:
+            self._save_products()
+        else:
+            self._dirty = True
+
+    @property
+    def dirty(self) -> bool:
+        """
+        Tell whether there are unsaved changes.
+
+        :return: True if flush() would write anything.
+        """
+        return self._dirty
+
+    def content_summary(self) -> Tuple[int, int, str]:
+        """
+        Describe the current content consistently with the change feed.
+
+        :return: The last change sequence, the number of products and the root hash
+            of the content-hash tree, all as of the same moment.
+        """
+        with self._lock:
+            return (
+                self._changes.last_sequence,
+                len(self._merkle),
+                self._merkle.root_hash,
+            )
+
+    def switch_loader(
+        self, loader: DataLoader, if_unchanged_since: Optional[int] = None
+    ) -> bool:
+        """
+        Store the products with another DataLoader from now on.
+
+        The new loader must already hold the current products; unsaved changes are
+        saved to it.
+
+        :param loader: The DataLoader to use.
+        :param if_unchanged_since: If given, only switch if the change feed is still
+            at this sequence, i.e. nothing changed since the caller last looked.
+        :return: True if the loader was switched.
+        """
+        with self._lock:
+            if (
+                if_unchanged_since is not None
+                and self._changes.last_sequence != if_unchanged_since
+            ):
+                return False
+            self._loader = loader
+            if self._dirty:
+                self._save_products()
+            return True
+
+    def flush(self) -> None:
+        """
+        Save the products if there are unsaved changes.
+        """
+        with self._lock:
+            if self._dirty:
+                self._save_products()
+
+    @property
+    def changes(self) -> ChangeFeed:
+        """
+        Get the feed of changes made to this repository.
+
+        :return: The repository's ChangeFeed.
+        """
+        return self._changes
+
+    def _publish_upserts(self, products: Iterable[Product]) -> None:
+        """
+        Publish one change event per stored product, in storage order.
+
+        :param products: The products that were just stored.
+        """
+        for product in products:
+            self._changes.publish(
+                OPERATION_UPSERT, product.product_id, self.to_record(product)
+            )
+
+    @staticmethod
+    def to_record(product: Product) -> Dict[str, object]:
+        """
+        Convert a product to the record stored in the data source.
+
+        :param product: The product to convert.
+        :return: The stored representation, without the product ID.
+        """
+        return {
+            "name": product.name,
+            "price": format_cents(product.price_cents),
+            "price_cents": product.price_cents,
+            "quantity": str(product.quantity),
+        }
+
+    @staticmethod
+    def from_record(product_id: int, record: Dict[str, object]) -> Product:
+        """
+        Convert a stored record back to a product.
+
+        :param product_id: The ID of the product.
+        :param record: The stored representation of the product.
+        :return: The Product.
+        """
+        # Files written before prices were kept in cents only have "price".
+        if "price_cents" in record:
+            price_cents = int(record["price_cents"])
+        else:
+            price_cents = to_cents(record["price"])
+        return Product.from_cents(
+            int(product_id), record["name"], price_cents, int(record["quantity"])
+        )
+
+    def _index_product(self, product: Product) -> None:
+        """
+        Update the secondary indexes for a product about to be stored.
+
+        :param product: The new version of the product.
+        """
+        previous = self._products.get(product.product_id)
+        for field, index in self._indexes.items():
+            if previous is not None:
+                index.remove(getattr(previous, field), product.product_id)
+            index.insert(getattr(product, field), product.product_id)
+        self._merkle.update(product)
+
+    def _unindex_product(self, product_id: int) -> None:
+        """
+        Remove a product about to be deleted from the secondary indexes.
+
+        :param product_id: The ID of the product.
+        """
+        previous = self._products.get(product_id)
+        for field, index in self._indexes.items():
+            index.remove(getattr(previous, field), product_id)
+        self._merkle.remove(product_id)
+
+    @property
+    def merkle_tree(self) -> CatalogMerkleTree:
+        """
+        Get the content-hash tree of the current products.
+
+        :return: The repository's CatalogMerkleTree.
+        """
+        return self._merkle
 
     def get_product_by_id(self, product_id: int) -> Optional[Product]:
         """
@@ -58,15 +402,20 @@ class ProductRepository:
         """
         Save products to the data source using the DataLoader.
         """
-        data = {
-            str(product_id): {
-                "name": product.name,
-                "price": str(product.price),
-                "quantity": str(product.quantity),
+        with self.snapshot() as snapshot:
+            data = {
+                str(product.product_id): self.to_record(product) for product in snapshot
             }
-            for product_id, product in self._products.items()
-        }
         self._loader.save_data(data)
+        self._dirty = False
+        if self._bloom_handler is not None:
+            self._id_filter.save(
+                self._bloom_handler, fingerprint=self._merkle.root_hash
+            )
+        if self._merkle_handler is not None:
+            # The digest lets readers of the stored tree notice later writes to the
+            # data by writers that do not keep the tree current.
+            self._merkle.save(self._merkle_handler, source_digest=self._loader.digest())
 
     def list_products(self) -> List[Product]:
         """
@@ -74,4 +423,91 @@ class ProductRepository:
 
         :return: A list of all products.
         """
-        return list(self._products.values())
+        with self.snapshot() as snapshot:
+            return list(snapshot)
+
+    def explain(self, query: Query) -> QueryPlan:
+        """
+        Choose how a query would be executed without running it.
+
+        :param query: The Query to plan.
+        :return: The QueryPlan that query() would use.
+        """
+        return plan_query(query, self._indexes, len(self._products))
+
+    def query(self, query: Query) -> List[Product]:
+        """
+        Find the products matching a query, sorted and limited as requested.
+
+        :param query: The Query to run.
+        :return: The matching products.
+        """
+        plan = self.explain(query)
+        if plan.access_path == ACCESS_FULL_SCAN:
+            with self.snapshot() as snapshot:
+                return self._finish_query(plan, snapshot)
+
+        # Indexes describe the latest version, so index reads happen under the lock.
+        with self._lock:
+            if plan.access_path == ACCESS_ID_LOOKUP:
+                product = self._products.get(plan.range.low)
+                candidates: Iterable[Product] = [product] if product else []
+            else:
+                ids = self._indexes[plan.field].ids_in_range(
+                    plan.range.low,
+                    plan.range.high,
+                    plan.range.low_inclusive,
+                    plan.range.high_inclusive,
+                    descending=plan.sorted_by_access and query.descending,
+                )
+                candidates = map(self._products.get, ids)
+            return self._finish_query(plan, candidates)
+
+    @staticmethod
+    def _finish_query(plan: QueryPlan, candidates: Iterable[Product]) -> List[Product]:
+        """
+        Filter, sort and limit candidate products in a single streaming pass.
+
+        :param plan: The QueryPlan being executed.
+        :param candidates: The products read by the access path.
+        :return: The query result.
+        """
+        query = plan.query
+        rows: Iterator[Product] = filter(plan.matches, candidates)
+        if query.sort_by is None or plan.sorted_by_access:
+            return list(islice(rows, query.limit))
+        if query.limit is not None:
+            select = heapq.nlargest if query.descending else heapq.nsmallest
+            return select(query.limit, rows, key=query.sort_key)
+        return sorted(rows, key=query.sort_key, reverse=query.descending)
+
+    def snapshot(self) -> CatalogSnapshot[Product]:
+        """
+        Take a consistent, read-only view of the current products.
+
+        Taking a snapshot copies nothing, and later writes never show up in it.
+        Close it when done, e.g. with a with-statement, so old versions can be freed.
+
+        :return: A CatalogSnapshot iterable over Product objects.
+        """
+        return self._products.snapshot()
+
+    @property
+    def version(self) -> int:
+        """
+        Get the version number of the latest published state.
+
+        :return: The current version.
+        """
+        return self._products.version
+
+    def price_column(self) -> array:
+        """
+        Get the prices of all products, in cents, packed into a signed 64-bit array.
+
+        The order matches list_products.
+
+        :return: An array('q') of prices in cents.
+        """
+        with self.snapshot() as snapshot:
+            return array("q", (product.price_cents for product in snapshot))
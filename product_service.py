@@ -1,7 +1,14 @@
+import threading
+from catalog_export import DEFAULT_CHUNK_SIZE, FORMAT_CSV, export_products
+from inventory_history import HistoryEntry, InventoryHistory
+from product_query import Query, QueryPlan
 from product_repository import ProductRepository
 from product_validator import ProductValidator
 from product import Product
-from constants_messages import ProductMessages
+from constants_messages import MAX_PRODUCT_QUANTITY, ProductMessages
+from money import format_cents
+from validation_schema import ValidatedRecord
+from typing import Callable, Iterable, List, Optional, Tuple
 
 
 def format_price(price: float):
@@ -14,6 +21,16 @@ def format_price(price: float):
     return f"${format(price, '.2f')}"
 
 
+def format_price_cents(price_cents: int):
+    """
+    Formats a price given in cents with two decimal places and a dollar sign.
+
+    :param price_cents: The price to format, in cents.
+    :return: The formatted price as a string (e.g., "$12.34").
+    """
+    return f"${format_cents(price_cents)}"
+
+
 class ProductService:
     """
     A class that provides business operations related to products.
@@ -21,17 +38,27 @@ class ProductService:
     Attributes:
     - _repository: An instance of ProductRepository.
     - _validator: An instance of ProductValidator.
+    - _write_lock: A lock making the duplicate check and the insert one atomic step.
+    - _history: An optional InventoryHistory recording the repository's changes.
     """
 
-    def __init__(self, repository: ProductRepository, validator: ProductValidator):
+    def __init__(
+        self,
+        repository: ProductRepository,
+        validator: ProductValidator,
+        history: Optional[InventoryHistory] = None,
+    ):
         """
         Initialize a ProductService instance.
 
         :param repository: An instance of ProductRepository used to manage product data.
         :param validator: An instance of ProductValidator used to validate product data.
+        :param history: An optional InventoryHistory answering as-of queries.
         """
         self._repository = repository
         self._validator = validator
+        self._write_lock = threading.Lock()
+        self._history = history
 
     def list_products(self) -> list:
         """
@@ -41,6 +68,135 @@ class ProductService:
         """
         return self._repository.list_products()
 
+    def list_products_by_price(self, descending: bool = False) -> list:
+        """
+        List all products ordered by price, ties broken by product ID.
+
+        :param descending: If True, the most expensive products come first.
+        :return: A list of Product objects.
+        """
+        return sorted(
+            self._repository.list_products(),
+            key=lambda product: (product.price_cents, product.product_id),
+            reverse=descending,
+        )
+
+    def inventory_value_cents(self) -> int:
+        """
+        Compute the exact value of all stock, i.e. the sum of price times quantity.
+
+        :return: The inventory value in cents.
+        """
+        return sum(
+            product.price_cents * product.quantity
+            for product in self._repository.list_products()
+        )
+
+    def query(self, query: Query) -> list:
+        """
+        Find the products matching a query.
+
+        :param query: A Query with an optional filter, sort order and limit.
+        :return: A list of matching Product objects.
+        """
+        return self._repository.query(query)
+
+    def explain(self, query: Query) -> QueryPlan:
+        """
+        Describe how a query would be executed.
+
+        :param query: A Query with an optional filter, sort order and limit.
+        :return: The QueryPlan chosen by the repository.
+        """
+        return self._repository.explain(query)
+
+    def export(
+        self,
+        filename: str,
+        fmt: str = FORMAT_CSV,
+        fields: Optional[Iterable[str]] = None,
+        where=None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Export a snapshot of the catalog to a CSV, JSON Lines or columnar file.
+
+        Products are streamed from the snapshot in chunks encoded by worker processes,
+        so writes can continue during the export and memory stays bounded.
+
+        :param filename: The path of the export file.
+        :param fmt: One of catalog_export.FORMATS.
+        :param fields: The fields to export, e.g. ["id", "name"], or None for all.
+        :param where: A Predicate or function selecting the products, or None for all.
+        :param chunk_size: The number of products encoded per task.
+        :param workers: The number of worker processes, None for one per CPU.
+        :param progress: Called with the number of products written so far.
+        :return: The number of products exported.
+        """
+        with self._repository.snapshot() as snapshot:
+            return export_products(
+                snapshot, filename, fmt, fields, where, chunk_size, workers, progress
+            )
+
+    def as_of(self, timestamp: float) -> List[Product]:
+        """
+        List the products as they were at a point in time.
+
+        :param timestamp: The time, in seconds since the epoch.
+        :return: The products that existed then, with their price, quantity and name
+            at that time, by ascending ID.
+        :raises ProductError: If no history is being recorded.
+        """
+        return self._require_history().as_of(timestamp)
+
+    def product_history(self, product_id: int) -> List[HistoryEntry]:
+        """
+        List every recorded change of a product.
+
+        :param product_id: The ID of the product.
+        :return: HistoryEntry objects, oldest first; the product is None for removals.
+        :raises ProductError: If no history is being recorded.
+        """
+        return self._require_history().product_history(product_id)
+
+    def _require_history(self) -> InventoryHistory:
+        if self._history is None:
+            raise ProductError(ProductMessages.HISTORY_DISABLED)
+        return self._history
+
+    def low_stock(self, count: int) -> List[Product]:
+        """
+        List the products with the lowest stock, read in order from the quantity index.
+
+        :param count: How many products to return.
+        :return: Up to count products, lowest quantity first, ties broken by ID.
+        """
+        return self._repository.query(Query(sort_by="quantity", limit=count))
+
+    def adjust_stock(self, product_id: int, delta: int) -> Product:
+        """
+        Change the stock level of a product by a number of units.
+
+        :param product_id: The ID of the product.
+        :param delta: The units added, or removed if negative.
+        :return: The product with its new quantity.
+        :raises ProductError: If there is no such product or the stock would go negative
+            or above MAX_PRODUCT_QUANTITY.
+        """
+        # The write lock makes reading and replacing the quantity one atomic step.
+        with self._write_lock:
+            product = self._repository.get_product_by_id(product_id)
+            if product is None:
+                raise ProductError(ProductMessages.PRODUCT_NOT_FOUND)
+            quantity = product.quantity + delta
+            if quantity < 0:
+                raise ProductError(ProductMessages.NEGATIVE_QUANTITY)
+            if quantity > MAX_PRODUCT_QUANTITY:
+                raise ProductError(ProductMessages.QUANTITY_TOO_HIGH)
+            return self._repository.update_quantity(product_id, quantity)
+
     def product_exists(self, product_id: int) -> bool:
         """
         Check if a product with the given product ID exists in the repository.
@@ -48,6 +204,9 @@ class ProductService:
         :param product_id: The ID of the product to check.
         :return: True if the product exists, False otherwise.
         """
+        # The ID filter answers "definitely new" without touching the authoritative store.
+        if not self._repository.might_contain(product_id):
+            return False
         product = self._repository.get_product_by_id(product_id)
         return product is not None
 
@@ -62,44 +221,99 @@ class ProductService:
         :return: A success message if the product is added successfully.
         :raises ProductError: If there is an issue with product data or the product already exists.
         """
-        try:
+        with self._write_lock:
             # 1. Validate the product data.
-            (
-                valid_id,
-                valid_name,
-                valid_price,
-                valid_quantity,
-            ) = self._validate_product_data(product_id, name, price, quantity)
+            record = self._validate_product_data(product_id, name, price, quantity)
 
             # 2. Store the product data.
-            self._store_new_product(valid_id, valid_name, valid_price, valid_quantity)
+            self._store_new_product(record)
 
-            return ProductMessages.PRODUCT_ADDED_SUCCESS
-        except ValueError as e:
-            raise ProductError(str(e))
+        return ProductMessages.PRODUCT_ADDED_SUCCESS
+
+    def add_validated_product(self, record: ValidatedRecord):
+        """
+        Add a new product from input that has already been validated, e.g. by the CLI.
+
+        Only the duplicate check is left to do, unless the record was validated
+        under other limits than this service's or is not a ValidatedRecord at all, in
+        which case it is checked again.
+
+        :param record: A ValidatedRecord issued by a ProductSchema.
+        :return: A success message if the product is added successfully.
+        :raises ProductError: If the product already exists or fails revalidation.
+        """
+        if (
+            type(record) is not ValidatedRecord
+            or record.schema is not self._validator.schema
+        ):
+            return self.add_product(
+                record.product_id,
+                record.name,
+                format_cents(record.price_cents),
+                record.quantity,
+            )
+        with self._write_lock:
+            self._ensure_product_does_not_exist(record.product_id)
+            self._store_new_product(record)
+        return ProductMessages.PRODUCT_ADDED_SUCCESS
+
+    def add_products(self, rows: Iterable[Tuple[str, str, str, str]]) -> int:
+        """
+        Add many new products to the repository in a single batch.
+
+        The batch is all-or-nothing: every row is validated before any product is stored.
+
+        :param rows: Tuples of (product_id, name, price, quantity) as strings.
+        :return: The number of products added.
+        :raises ProductError: If any row is invalid or duplicates an existing or earlier ID.
+        """
+        with self._write_lock:
+            return self._add_product_batch(rows)
+
+    def _add_product_batch(self, rows: Iterable[Tuple[str, str, str, str]]) -> int:
+        products: List[Product] = []
+        batch_ids = set()
+        for row_number, (product_id, name, price, quantity) in enumerate(rows, start=1):
+            try:
+                record = self._validate_product_data(product_id, name, price, quantity)
+                if record.product_id in batch_ids:
+                    raise ProductError(ProductMessages.DUPLICATE_PRODUCT_ID)
+            except ProductError as e:
+                raise ProductError(ProductMessages.bulk_row_error(row_number, str(e)))
+            batch_ids.add(record.product_id)
+            products.append(self._to_product(record))
+
+        self._repository.add_products(products)
+        return len(products)
 
     def _validate_product_data(
         self, product_id: str, name: str, price: str, quantity: str
-    ):
-        # Step 1: Validate product_id first
-        valid_id = self._validator.validate_product_id(product_id)
-        self._ensure_product_does_not_exist(valid_id)
+    ) -> ValidatedRecord:
+        schema = self._validator.schema
+        # Step 1: Validate product_id first, so a duplicate is reported before
+        # any error in the other attributes.
+        valid_id, error = schema.check_id(product_id)
+        if error is None:
+            self._ensure_product_does_not_exist(valid_id)
 
-        # Then validate other attributes
-        valid_name = self._validator.validate_product_name(name)
-        valid_price = self._validator.validate_product_price(price)
-        valid_quantity = self._validator.validate_product_quantity(quantity)
-
-        return valid_id, valid_name, valid_price, valid_quantity
+            # Then validate the whole record; the ID is already an int.
+            record, error = schema.validate(valid_id, name, price, quantity)
+            if error is None:
+                return record
+        raise ProductError(schema.message(error))
 
     def _ensure_product_does_not_exist(self, product_id: int):
-        if self._repository.get_product_by_id(product_id):
+        if self.product_exists(product_id):
             raise ProductError(ProductMessages.DUPLICATE_PRODUCT_ID)
 
-    def _store_new_product(
-        self, valid_id: int, valid_name: str, valid_price: float, valid_quantity: int
-    ):
-        product = Product(valid_id, valid_name, valid_price, valid_quantity)
+    @staticmethod
+    def _to_product(record: ValidatedRecord) -> Product:
+        return Product.from_cents(
+            record.product_id, record.name, record.price_cents, record.quantity
+        )
+
+    def _store_new_product(self, record: ValidatedRecord):
+        product = self._to_product(record)
         self._repository.add_product(product)
         if not self._repository.get_product_by_id(product.product_id):
             raise ProductError(ProductMessages.ADD_PRODUCT_FAILED)
@@ -1,17 +1,36 @@
-from constants_messages import (
-    MAX_PRODUCT_ID_LENGTH,
-    MAX_PRODUCT_NAME_LENGTH,
-    ProductMessages,
-)
+from typing import Optional
+
+from money import cents_to_float
+from validation_schema import PRODUCT_SCHEMA, CheckResult, ProductSchema
+
+
+def _value_or_raise(result: CheckResult):
+    value, error = result
+    if error is not None:
+        raise ValueError(ProductSchema.message(error))
+    return value
 
 
 class ProductValidator:
     """
     A class dedicated to validating product attributes.
 
-    It raises ValueErrors with specific messages if validation fails.
+    It raises ValueErrors with specific messages if validation fails. The checks
+    themselves are done by its ProductSchema, which reports errors as codes instead;
+    use the schema directly where failed input is expected.
+
+    Attributes:
+    - schema: The compiled ProductSchema applied by every method.
     """
 
+    def __init__(self, schema: Optional[ProductSchema] = None):
+        """
+        Initialize a ProductValidator.
+
+        :param schema: The ProductSchema to apply; defaults to the configured limits.
+        """
+        self.schema = schema or PRODUCT_SCHEMA
+
     def validate_product_id(self, product_id: str) -> int:
         """
         Validate a product ID.
@@ -20,20 +39,7 @@ class ProductValidator:
         :return: The validated product ID as an integer.
         :raises ValueError: If validation fails, with an appropriate error message.
         """
-        # Check if product_id is a valid integer
-        try:
-            id_value = int(product_id)
-        except ValueError:
-            raise ValueError(ProductMessages.INVALID_INTEGER)
-
-        # Convert the product_id to a string to check its length
-        if len(str(id_value)) > MAX_PRODUCT_ID_LENGTH:
-            raise ValueError(ProductMessages.ID_TOO_LONG)
-
-        if id_value <= 0:
-            raise ValueError(ProductMessages.NON_POSITIVE_ID)
-
-        return id_value
+        return _value_or_raise(self.schema.check_id(product_id))
 
     def validate_product_name(self, name: str) -> str:
         """
@@ -43,14 +49,7 @@ class ProductValidator:
         :return: The validated product name as a string.
         :raises ValueError: If validation fails, with an appropriate error message.
         """
-        name = name.strip()
-        if not name:
-            raise ValueError(ProductMessages.EMPTY_NAME)
-
-        if len(name) > MAX_PRODUCT_NAME_LENGTH:
-            raise ValueError(ProductMessages.NAME_TOO_LONG)
-
-        return name
+        return _value_or_raise(self.schema.check_name(name))
 
     def validate_product_price(self, price: str) -> float:
         """
@@ -60,16 +59,17 @@ class ProductValidator:
         :return: The validated product price as a float (rounded to 2 decimal places).
         :raises ValueError: If validation fails, with an appropriate error message.
         """
-        try:
-            price_value = float(price)
-        except ValueError:
-            raise ValueError(ProductMessages.INVALID_PRICE)
+        return cents_to_float(self.validate_product_price_cents(price))
 
-        if price_value <= 0:
-            raise ValueError(ProductMessages.NON_POSITIVE_PRICE)
+    def validate_product_price_cents(self, price: str) -> int:
+        """
+        Validate a product price and convert it to whole cents.
 
-        # Round to 2 decimal places
-        return round(price_value, 2)
+        :param price: The product price to validate as a string.
+        :return: The validated product price in cents as an integer.
+        :raises ValueError: If validation fails, with an appropriate error message.
+        """
+        return _value_or_raise(self.schema.check_price_cents(price))
 
     def validate_product_quantity(self, quantity: str) -> int:
         """
@@ -79,12 +79,4 @@ class ProductValidator:
         :return: The validated product quantity as an integer.
         :raises ValueError: If validation fails, with an appropriate error message.
         """
-        try:
-            quantity_value = int(quantity)
-        except ValueError:
-            raise ValueError(ProductMessages.INVALID_QUANTITY)
-
-        if quantity_value < 0:
-            raise ValueError(ProductMessages.NEGATIVE_QUANTITY)
-
-        return quantity_value
+        return _value_or_raise(self.schema.check_quantity(quantity))
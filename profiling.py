@@ -0,0 +1,323 @@
+# profiling.py
+# On-demand CPU and memory profiling of the service and repository layers.
+# SRP: ProfilingHooks installs and removes profiling wrappers around ProductService and
+# ProductRepository methods and writes what they collected to report files.
+
+import contextlib
+import cProfile
+import functools
+import inspect
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from constants_messages import DEFAULT_PROFILE_DIR, PROFILE_ENV_VAR
+from product_repository import ProductRepository
+from product_service import ProductService
+
+# Classes whose public methods are CPU-profiled.
+PROFILED_CLASSES = (ProductService, ProductRepository)
+# Repository methods whose allocations are attributed with tracemalloc snapshots. They
+# are CPU-profiled too, so loading from the constructor shows up in both reports.
+MEMORY_TRACED_METHODS = ("_load_products", "_save_products", "list_products")
+# Allocations are grouped by the allocating line, so one frame per trace is enough.
+TRACEBACK_FRAMES: int = 1
+MEMORY_REPORT_LINES: int = 20
+
+_active_lock = threading.Lock()
+_active: Optional["ProfilingHooks"] = None
+
+
+class ProfilingHooks:
+    """
+    Profiling wrappers that are patched onto the classes only while profiling is on.
+
+    Nothing is wrapped while disabled, so disabled hooks cost nothing. When enabled,
+    each thread gets its own cProfile profiler, which runs only for the outermost
+    service or repository call in progress, so time spent e.g. waiting for user input
+    is not recorded. Every memory-traced call takes two tracemalloc snapshots, which
+    makes those calls noticeably slower while enabled. Only one ProfilingHooks can be
+    enabled at a time.
+
+    Attributes:
+    - output_dir: The directory the reports are written to.
+    - _originals: The (class, name, original attribute) of every patched method.
+    - _profiles: The cProfile profiler of every thread that made a profiled call.
+    - _allocations: Per traced method, the bytes and blocks allocated by source line.
+    - _started_tracemalloc: Whether tracemalloc was started here and must be stopped.
+    - _local: Per-thread depth of nested profiled calls.
+    - _lock: Guards _profiles and _allocations.
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR):
+        """
+        Initialize disabled ProfilingHooks.
+
+        :param output_dir: The directory the reports are written to.
+        """
+        self.output_dir = output_dir
+        self._originals: List[Tuple[type, str, object]] = []
+        self._profiles: Dict[int, cProfile.Profile] = {}
+        self._allocations: Dict[str, Dict[str, List[int]]] = {}
+        self._started_tracemalloc = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return bool(self._originals)
+
+    def enable(self) -> None:
+        """
+        Start profiling by patching the profiled classes.
+
+        :raises RuntimeError: If other hooks are already enabled.
+        """
+        global _active
+        with _active_lock:
+            if _active is self:
+                return
+            if _active is not None:
+                raise RuntimeError("Profiling is already enabled elsewhere.")
+            _active = self
+
+        self._profiles.clear()
+        self._allocations.clear()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_FRAMES)
+            self._started_tracemalloc = True
+
+        for cls in PROFILED_CLASSES:
+            for name, attribute in list(vars(cls).items()):
+                traced = cls is ProductRepository and name in MEMORY_TRACED_METHODS
+                if not inspect.isfunction(attribute):
+                    continue
+                if name.startswith("_") and not traced:
+                    continue
+                hooked = attribute
+                if not name.startswith("_") or traced:
+                    hooked = self._cpu_hook(hooked)
+                if traced:
+                    hooked = self._memory_hook(hooked, name)
+                self._originals.append((cls, name, attribute))
+                setattr(cls, name, hooked)
+
+    def disable(self) -> List[str]:
+        """
+        Stop profiling, restore the original methods and write the reports.
+
+        :return: The paths of the written report files; empty if profiling was off.
+        """
+        global _active
+        if not self.active:
+            return []
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals.clear()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        with _active_lock:
+            _active = None
+        return self._write_reports()
+
+    def _cpu_hook(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def hooked(*args, **kwargs):
+            local = self._local
+            depth = getattr(local, "depth", 0)
+            profile = None
+            if depth == 0:
+                profile = self._thread_profile()
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Another profiler owns this thread; run the call unprofiled.
+                    profile = None
+            local.depth = depth + 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                local.depth = depth
+                if profile is not None:
+                    profile.disable()
+
+        return hooked
+
+    def _thread_profile(self) -> cProfile.Profile:
+        thread_id = threading.get_ident()
+        with self._lock:
+            profile = self._profiles.get(thread_id)
+            if profile is None:
+                profile = self._profiles[thread_id] = cProfile.Profile()
+            return profile
+
+    def _memory_hook(self, func: Callable, name: str) -> Callable:
+        @functools.wraps(func)
+        def hooked(*args, **kwargs):
+            if not tracemalloc.is_tracing():
+                return func(*args, **kwargs)
+            with self._profiler_paused():
+                before = tracemalloc.take_snapshot()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._profiler_paused():
+                    self._record_allocations(name, before, tracemalloc.take_snapshot())
+
+        return hooked
+
+    @contextlib.contextmanager
+    def _profiler_paused(self) -> Iterator[None]:
+        """
+        Keep snapshot work out of the CPU profile of a call that is being profiled.
+        """
+        profile = None
+        if getattr(self._local, "depth", 0):
+            profile = self._profiles.get(threading.get_ident())
+        if profile is not None:
+            profile.disable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.enable()
+
+    def _record_allocations(
+        self, name: str, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+    ) -> None:
+        """
+        Add the memory a traced call allocated, by source line, to its totals.
+
+        :param name: The name of the traced method.
+        :param before: A snapshot taken right before the call.
+        :param after: A snapshot taken right after the call.
+        """
+        ignored = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+        differences = after.filter_traces(ignored).compare_to(
+            before.filter_traces(ignored), "lineno"
+        )
+        with self._lock:
+            totals = self._allocations.setdefault(name, {})
+            for difference in differences:
+                if difference.size_diff <= 0:
+                    continue
+                frame = difference.traceback[0]
+                entry = totals.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                entry[0] += difference.size_diff
+                entry[1] += difference.count_diff
+
+    def _write_reports(self) -> List[str]:
+        """
+        Write the CPU profile as pstats and collapsed stacks, and the memory report.
+
+        :return: The paths of the written files.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, time.strftime("profile-%Y%m%d-%H%M%S"))
+        paths = []
+        with self._lock:
+            profiles = list(self._profiles.values())
+            self._profiles.clear()
+            allocations = dict(self._allocations)
+
+        if profiles:
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(prefix + ".pstats")
+            paths.append(prefix + ".pstats")
+            with open(prefix + ".collapsed", "w") as file:
+                file.writelines(line + "\n" for line in collapsed_stacks(stats.stats))
+            paths.append(prefix + ".collapsed")
+
+        if allocations:
+            with open(prefix + ".memory.txt", "w") as file:
+                for name, totals in sorted(allocations.items()):
+                    total = sum(size for size, _ in totals.values())
+                    file.write(f"{name}: {total / 1024:.1f} KiB allocated\n")
+                    top = sorted(totals.items(), key=lambda item: -item[1][0])
+                    for location, (size, count) in top[:MEMORY_REPORT_LINES]:
+                        file.write(
+                            f"  {location}: {size / 1024:.1f} KiB in {count} blocks\n"
+                        )
+            paths.append(prefix + ".memory.txt")
+        return paths
+
+
+def _frame_label(func: Tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        # Built-in functions have no source file.
+        label = name
+    else:
+        label = f"{os.path.basename(filename)}:{name}:{lineno}"
+    return label.replace(";", ",").replace(" ", "_")
+
+
+def collapsed_stacks(stats: dict, max_depth: int = 64) -> List[str]:
+    """
+    Convert pstats data into the collapsed-stack format read by flamegraph tools.
+
+    cProfile only records caller/callee pairs, so full stacks are reconstructed by
+    splitting every function's time over its callers in proportion to the time each
+    caller accounted for. Recursive cycles are cut where a function reappears.
+
+    :param stats: The stats dictionary of a pstats.Stats object.
+    :param max_depth: The deepest stack that is reconstructed.
+    :return: Lines of "frame;frame;frame microseconds", heaviest first.
+    """
+    callees: Dict[tuple, List[Tuple[tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, caller_cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, caller_cumulative))
+
+    weights: Dict[str, float] = {}
+
+    def walk(func: tuple, share: float, stack: List[tuple]) -> None:
+        stack.append(func)
+        path = ";".join(_frame_label(frame) for frame in stack)
+        weights[path] = weights.get(path, 0.0) + stats[func][2] * share
+        if len(stack) < max_depth:
+            for callee, edge_time in callees.get(func, ()):
+                callee_total = stats[callee][3]
+                if callee in stack or callee_total <= 0:
+                    continue
+                callee_share = share * edge_time / callee_total
+                # Paths worth less than a microsecond are dropped.
+                if callee_share * callee_total >= 1e-6:
+                    walk(callee, callee_share, stack)
+        stack.pop()
+
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(func, 1.0, [])
+
+    lines = [
+        (round(seconds * 1e6), path)
+        for path, seconds in weights.items()
+        if round(seconds * 1e6) > 0
+    ]
+    return [f"{path} {micros}" for micros, path in sorted(lines, reverse=True)]
+
+
+def hooks_from_environment() -> Optional[ProfilingHooks]:
+    """
+    Enable profiling if the profiling environment variable is set.
+
+    The variable holds the report directory; "1" selects the default directory.
+
+    :return: The enabled ProfilingHooks, or None if the variable is not set.
+    """
+    value = os.environ.get(PROFILE_ENV_VAR)
+    if not value:
+        return None
+    hooks = ProfilingHooks(DEFAULT_PROFILE_DIR if value == "1" else value)
+    hooks.enable()
+    return hooks
@@ -0,0 +1,477 @@
+# replication.py
+# Log-shipping replication of a ProductRepository to read-only replicas.
+# SRP: ReplicationLeader streams the leader's change feed over a socket;
+# ReplicationFollower applies that stream to its own in-memory repository.
+#
+# Usage:
+#   python replication.py leader --listen 127.0.0.1:7070 [--data products.json]
+#       runs the normal CLI and serves its changes to followers.
+#   python replication.py follower --connect 127.0.0.1:7070
+#       keeps a replica in sync and prints its lag.
+# Addresses are HOST:PORT for TCP or unix:PATH for a Unix socket.
+#
+# Wire format: one JSON object per line. The follower sends
+# {"from_sequence": N}. The leader answers with a "snapshot" message, unless it can
+# replay its durable log from N, followed by "event" and periodic "heartbeat" messages.
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from change_feed import ChangeEvent, ChangeFeed, OPERATION_REMOVE, OPERATION_UPSERT
+from constants_messages import DEFAULT_CHANGE_LOG_FILE, DEFAULT_DATA_FILE
+from data_loader import DataLoader, InMemoryDataLoader
+from file_handler import FileHandler
+from product_repository import ProductRepository
+
+MESSAGE_SNAPSHOT: str = "snapshot"
+MESSAGE_EVENT: str = "event"
+MESSAGE_HEARTBEAT: str = "heartbeat"
+
+Address = Union[str, Tuple[str, int]]
+
+logger = logging.getLogger(__name__)
+
+
+def parse_address(text: str) -> Address:
+    """
+    Parse HOST:PORT or unix:PATH.
+
+    :param text: The address text.
+    :return: A (host, port) tuple for TCP or a path string for a Unix socket.
+    :raises ValueError: If the address is malformed.
+    """
+    if text.startswith("unix:"):
+        return text[len("unix:") :]
+    host, _, port = text.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address: {text!r}")
+    return host, int(port)
+
+
+def _send(connection: socket.socket, message: dict) -> None:
+    connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+class _FollowerHandler(socketserver.StreamRequestHandler):
+    """
+    Serves one follower connection for a ReplicationLeader.
+    """
+
+    def handle(self) -> None:
+        leader: ReplicationLeader = self.server.leader
+        request = json.loads(self.rfile.readline() or b"{}")
+        from_sequence = int(request.get("from_sequence", 0))
+        events: "queue.Queue[ChangeEvent]" = queue.Queue()
+        feed = leader.repository.changes
+
+        if leader.can_replay_from(from_sequence):
+            subscription = feed.subscribe(events.put, from_sequence=from_sequence)
+        else:
+            # Events published between the subscription and the snapshot are sent
+            # again afterwards; applying a change twice is harmless.
+            subscription = feed.subscribe(events.put)
+            with leader.repository.snapshot() as snapshot:
+                products = {
+                    str(product.product_id): ProductRepository.to_record(product)
+                    for product in snapshot
+                }
+            _send(
+                self.connection,
+                {
+                    "type": MESSAGE_SNAPSHOT,
+                    "sequence": subscription.start_sequence,
+                    "products": products,
+                },
+            )
+
+        peer = leader._register(self)
+        try:
+            while not leader.stopping.is_set():
+                try:
+                    event = events.get(timeout=leader.heartbeat_interval)
+                except queue.Empty:
+                    _send(
+                        self.connection,
+                        {
+                            "type": MESSAGE_HEARTBEAT,
+                            "sequence": feed.last_sequence,
+                            "timestamp": time.time(),
+                        },
+                    )
+                    continue
+                message = event._asdict()
+                message["type"] = MESSAGE_EVENT
+                _send(self.connection, message)
+                leader._sent(peer, event.sequence)
+        except OSError:
+            pass  # The follower went away.
+        finally:
+            subscription.cancel()
+            leader._unregister(peer)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class ReplicationLeader:
+    """
+    Streams a repository's change feed to follower processes.
+
+    Attributes:
+    - repository: The ProductRepository being replicated.
+    - heartbeat_interval: Seconds of silence after which a heartbeat is sent.
+    - stopping: Set when the leader shuts down.
+    - _followers: The last sequence sent to each connected follower.
+    """
+
+    def __init__(
+        self,
+        repository: ProductRepository,
+        address: Address,
+        heartbeat_interval: float = 1.0,
+    ):
+        """
+        Initialize a ReplicationLeader; call start() to begin serving.
+
+        :param repository: The ProductRepository being replicated.
+        :param address: A (host, port) tuple, port 0 picks a free port, or a socket path.
+        :param heartbeat_interval: Seconds of silence after which a heartbeat is sent.
+        """
+        self.repository = repository
+        self.heartbeat_interval = heartbeat_interval
+        self.stopping = threading.Event()
+        self._followers: Dict[int, int] = {}
+        self._followers_lock = threading.Lock()
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            self._server = _UnixServer(address, _FollowerHandler)
+        else:
+            self._server = _TCPServer(address, _FollowerHandler)
+        self._server.leader = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Address:
+        return self._server.server_address
+
+    def start(self) -> None:
+        """
+        Start serving followers on a background thread.
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="replication-leader", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop serving and disconnect all followers.
+        """
+        self.stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def can_replay_from(self, sequence: int) -> bool:
+        """
+        Tell whether a follower at the given sequence can catch up from the log alone.
+
+        :param sequence: The last sequence the follower has applied.
+        :return: True if the durable log holds every later event.
+        """
+        feed: ChangeFeed = self.repository.changes
+        if not feed.is_durable or not 0 < sequence <= feed.last_sequence:
+            return False
+        following = next(feed.read_from(sequence), None)
+        if following is None:
+            return sequence == feed.last_sequence
+        return following.sequence == sequence + 1
+
+    def followers(self) -> List[Dict[str, int]]:
+        """
+        Describe the connected followers and how far behind the leader each one is.
+
+        :return: One dict per follower with sent_sequence and lag_events.
+        """
+        last = self.repository.changes.last_sequence
+        with self._followers_lock:
+            return [
+                {"sent_sequence": sent, "lag_events": last - sent}
+                for sent in self._followers.values()
+            ]
+
+    def _register(self, handler: _FollowerHandler) -> int:
+        with self._followers_lock:
+            self._followers[id(handler)] = self.repository.changes.last_sequence
+        return id(handler)
+
+    def _sent(self, peer: int, sequence: int) -> None:
+        with self._followers_lock:
+            self._followers[peer] = sequence
+
+    def _unregister(self, peer: int) -> None:
+        with self._followers_lock:
+            self._followers.pop(peer, None)
+
+
+class ReplicationFollower:
+    """
+    Keeps an in-memory, read-only replica of a leader's repository.
+
+    The replica is reachable through the repository property. It is replaced as a
+    whole when a snapshot arrives, so readers should fetch it for each read instead
+    of keeping a reference. Lost connections are retried, resuming from the last
+    applied sequence.
+
+    Attributes:
+    - _address: The leader's address.
+    - _repository: The current replica.
+    - _applied_sequence: The sequence of the last applied event.
+    - _leader_sequence: The leader's last sequence, as of the latest message.
+    - _last_event_time: The leader-side timestamp of the last applied event.
+    - reconnects: How often the follower has reconnected.
+    - failed_events: How many events could not be applied and were skipped.
+    """
+
+    def __init__(self, address: Address, reconnect_delay: float = 1.0):
+        """
+        Initialize a ReplicationFollower; call start() to connect.
+
+        :param address: The leader's (host, port) tuple or socket path.
+        :param reconnect_delay: Seconds to wait before reconnecting.
+        """
+        self._address = address
+        self._reconnect_delay = reconnect_delay
+        self._repository = ProductRepository(InMemoryDataLoader(), autosave=False)
+        self._applied_sequence = 0
+        self._leader_sequence = 0
+        self._last_event_time: Optional[float] = None
+        self._last_message_time: Optional[float] = None
+        self._connected = threading.Event()
+        self._synced = threading.Event()
+        self._stop = threading.Event()
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self.reconnects = 0
+        self.failed_events = 0
+
+    @property
+    def repository(self) -> ProductRepository:
+        return self._repository
+
+    def start(self) -> None:
+        """
+        Connect to the leader and apply its changes on a background thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="replication-follower", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Disconnect from the leader and stop applying changes.
+        """
+        self._stop.set()
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+
+    def wait_until_synced(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the replica has caught up with the leader once.
+
+        :param timeout: The maximum number of seconds to wait.
+        :return: True if the replica caught up in time.
+        """
+        return self._synced.wait(timeout)
+
+    def wait_for_sequence(self, sequence: int, timeout: float = 5.0) -> bool:
+        """
+        Wait until the replica has applied the given sequence.
+
+        :param sequence: The leader sequence to wait for.
+        :param timeout: The maximum number of seconds to wait.
+        :return: True if the sequence was applied in time.
+        """
+        deadline = time.monotonic() + timeout
+        while self._applied_sequence < sequence:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def lag(self) -> Dict[str, object]:
+        """
+        Report how far the replica is behind the leader.
+
+        :return: A dict with applied_sequence, leader_sequence, lag_events,
+            lag_seconds, seconds_since_message, connected, reconnects and
+            failed_events.
+        """
+        lag_events = max(0, self._leader_sequence - self._applied_sequence)
+        lag_seconds = 0.0
+        if lag_events and self._last_event_time is not None:
+            lag_seconds = max(0.0, time.time() - self._last_event_time)
+        return {
+            "applied_sequence": self._applied_sequence,
+            "leader_sequence": self._leader_sequence,
+            "lag_events": lag_events,
+            "lag_seconds": lag_seconds,
+            "seconds_since_message": (
+                None
+                if self._last_message_time is None
+                else time.time() - self._last_message_time
+            ),
+            "connected": self._connected.is_set(),
+            "reconnects": self.reconnects,
+            "failed_events": self.failed_events,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._follow()
+            except (OSError, ValueError):
+                pass
+            except Exception:
+                # Anything else is a bug or a malformed message; the follower keeps
+                # running and reconnects rather than silently dying.
+                logger.exception("Replication from %s failed", self._address)
+            self._connected.clear()
+            if self._stop.wait(self._reconnect_delay):
+                return
+            self.reconnects += 1
+
+    def _follow(self) -> None:
+        if isinstance(self._address, str):
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket = connection
+        with connection:
+            connection.connect(self._address)
+            _send(connection, {"from_sequence": self._applied_sequence})
+            self._connected.set()
+            with connection.makefile("rb") as stream:
+                for line in stream:
+                    self._handle(json.loads(line))
+                    if self._stop.is_set():
+                        return
+
+    def _handle(self, message: dict) -> None:
+        message_type = message.pop("type")
+        self._last_message_time = time.time()
+        if message_type == MESSAGE_SNAPSHOT:
+            self._repository = ProductRepository(
+                InMemoryDataLoader(message["products"]), autosave=False
+            )
+            self._applied_sequence = message["sequence"]
+            self._leader_sequence = max(self._leader_sequence, message["sequence"])
+        elif message_type == MESSAGE_EVENT:
+            event = ChangeEvent(**message)
+            try:
+                self.apply(event)
+            except Exception:
+                # Applying is deterministic, so a retry would fail again; the event is
+                # skipped and counted instead of stopping replication.
+                self.failed_events += 1
+                self._applied_sequence = max(self._applied_sequence, event.sequence)
+                logger.exception("Replica failed to apply event %s", event.sequence)
+            self._leader_sequence = max(self._leader_sequence, event.sequence)
+        elif message_type == MESSAGE_HEARTBEAT:
+            self._leader_sequence = message["sequence"]
+        if self._applied_sequence >= self._leader_sequence:
+            self._synced.set()
+
+    def apply(self, event: ChangeEvent) -> None:
+        """
+        Apply one change event to the replica.
+
+        :param event: The ChangeEvent received from the leader.
+        """
+        if event.sequence <= self._applied_sequence:
+            return
+        if event.operation == OPERATION_UPSERT:
+            self._repository.add_product(
+                ProductRepository.from_record(event.product_id, event.data)
+            )
+        elif event.operation == OPERATION_REMOVE:
+            self._repository.remove_product(event.product_id)
+        self._applied_sequence = event.sequence
+        self._last_event_time = event.timestamp
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Catalog replication.")
+    modes = parser.add_subparsers(dest="mode", required=True)
+    leader_parser = modes.add_parser("leader", help="Run the CLI and serve followers.")
+    leader_parser.add_argument("--listen", required=True, help="HOST:PORT or unix:PATH")
+    leader_parser.add_argument("--data", default=DEFAULT_DATA_FILE)
+    leader_parser.add_argument("--log", default=DEFAULT_CHANGE_LOG_FILE)
+    follower_parser = modes.add_parser("follower", help="Replicate and report lag.")
+    follower_parser.add_argument(
+        "--connect", required=True, help="HOST:PORT or unix:PATH"
+    )
+    follower_parser.add_argument("--interval", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if args.mode == "leader":
+        # Imported here so followers do not need the UI modules.
+        from io_handler import IOHandler
+        from product_service import ProductService
+        from product_validator import ProductValidator
+        from ui import CLI
+
+        repository = ProductRepository(
+            DataLoader(FileHandler(args.data)),
+            change_feed=ChangeFeed(FileHandler(args.log)),
+        )
+        leader = ReplicationLeader(repository, parse_address(args.listen))
+        leader.start()
+        validator = ProductValidator()
+        service = ProductService(repository, validator)
+        try:
+            CLI(service, validator, IOHandler()).main_loop()
+        finally:
+            leader.stop()
+        return
+
+    follower = ReplicationFollower(parse_address(args.connect))
+    follower.start()
+    try:
+        while True:
+            time.sleep(args.interval)
+            stats = follower.lag()
+            print(
+                f"products={len(follower.repository.list_products())} "
+                + " ".join(f"{key}={value}" for key, value in stats.items())
+            )
+    except KeyboardInterrupt:
+        follower.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# row_renderer.py
+# Renders products as the one-line rows shown in product listings.
+# SRP: ProductRowRenderer only formats rows and caches the formatted text.
+
+from weakref import WeakKeyDictionary
+from typing import Iterable, Iterator, Tuple
+
+from product import Product
+from product_service import format_price_cents
+
+
+class ProductRowRenderer:
+    """
+    Formats products for list views and caches the rendered rows.
+
+    Entries are keyed by the Product object itself, so a product replaced in the
+    repository is re-rendered, and cached rows disappear together with their
+    products. The name is the only attribute a Product lets callers change in place,
+    so it is kept with the cached row and compared on every lookup.
+
+    Attributes:
+    - _cache: A weak mapping from Product to its (name, rendered row) pair.
+    """
+
+    def __init__(self):
+        """
+        Initialize a ProductRowRenderer with an empty cache.
+        """
+        self._cache: "WeakKeyDictionary[Product, Tuple[str, str]]" = WeakKeyDictionary()
+
+    def render(self, product: Product) -> str:
+        """
+        Render a single product as a list row.
+
+        :param product: The product to render.
+        :return: The formatted row.
+        """
+        entry = self._cache.get(product)
+        if entry is not None and entry[0] is product.name:
+            return entry[1]
+
+        row = (
+            f"ID: {product.product_id} | Name: {product.name} | "
+            f"Price: {format_price_cents(product.price_cents)} | "
+            f"Quantity: {product.quantity}"
+        )
+        self._cache[product] = (product.name, row)
+        return row
+
+    def render_all(self, products: Iterable[Product]) -> Iterator[str]:
+        """
+        Lazily render a sequence of products.
+
+        :param products: The products to render.
+        :return: An iterator over the formatted rows.
+        """
+        return map(self.render, products)
+
+    def invalidate(self, product: Product) -> None:
+        """
+        Drop the cached row of a product.
+
+        :param product: The product whose row must be rendered again.
+        """
+        self._cache.pop(product, None)
+
+    def clear(self) -> None:
+        """
+        Drop every cached row.
+        """
+        self._cache.clear()
@@ -0,0 +1,103 @@
+# scripted_io_handler.py
+# Provides an IOHandler that replays recorded input instead of asking a human.
+# SRP: ScriptedIOHandler feeds scripted answers to the UI and times each menu command.
+
+import io
+import time
+from typing import Iterable, List, NamedTuple, Optional, TextIO
+
+from constants_messages import MENU_PROMPT
+from io_handler import IOHandler
+
+
+class ScriptExhausted(EOFError):
+    """Raised when the UI asks for input after the script has ended"""
+
+    pass
+
+
+class CommandTiming(NamedTuple):
+    """The latency of one menu command, from its selection to the next menu prompt."""
+
+    command: str
+    seconds: float
+
+
+class ScriptedIOHandler(IOHandler):
+    """
+    An IOHandler that answers prompts from a script, one line per prompt.
+
+    Prompts are not shown. Output is buffered into the given stream, which defaults to
+    an in-memory transcript. Every answer given to the main menu starts a command,
+    and the command ends when the menu prompt comes back or the script runs out.
+
+    Attributes:
+    - _lines: An iterator over the remaining script lines.
+    - _menu_prompt: The prompt that separates commands.
+    - timings: The recorded CommandTiming of every finished command.
+    """
+
+    def __init__(
+        self,
+        script: Iterable[str],
+        stream: Optional[TextIO] = None,
+        menu_prompt: str = MENU_PROMPT,
+    ):
+        """
+        Initialize a ScriptedIOHandler.
+
+        :param script: The input lines, e.g. an open file or a list of strings.
+        :param stream: Where output is written; defaults to an in-memory transcript.
+        :param menu_prompt: The main menu prompt used to delimit commands.
+        """
+        super().__init__(
+            buffered=True, stream=stream if stream is not None else io.StringIO()
+        )
+        self._lines = iter(script)
+        self._menu_prompt = menu_prompt
+        self._command: Optional[str] = None
+        self._command_started = 0.0
+        self.timings: List[CommandTiming] = []
+
+    def input(self, prompt: str) -> str:
+        """
+        Return the next script line without showing the prompt.
+
+        :param prompt: The prompt message; only used to detect the main menu.
+        :return: The next line of the script, without its line ending.
+        :raises ScriptExhausted: If the script has no more lines.
+        """
+        if prompt == self._menu_prompt:
+            self.finish()
+
+        try:
+            line = next(self._lines).rstrip("\r\n")
+        except StopIteration:
+            self.finish()
+            self.flush()
+            raise ScriptExhausted("Script has no more input.")
+
+        if prompt == self._menu_prompt:
+            self._command = line
+            self._command_started = time.perf_counter()
+        return line
+
+    def finish(self) -> None:
+        """
+        Close the timing of the command in progress, if any.
+        """
+        if self._command is not None:
+            elapsed = time.perf_counter() - self._command_started
+            self.timings.append(CommandTiming(self._command, elapsed))
+            self._command = None
+
+    @property
+    def transcript(self) -> str:
+        """
+        Get the output written so far when the default in-memory stream is used.
+
+        :return: The output text, or an empty string for other streams.
+        """
+        self.flush()
+        stream = self.stream
+        return stream.getvalue() if isinstance(stream, io.StringIO) else ""
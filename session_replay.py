@@ -0,0 +1,190 @@
+# session_replay.py
+# Replays recorded CLI sessions against a shared ProductService and reports latency.
+#
+# Usage: python session_replay.py [--data FILE] [--quiet] SCRIPT [SCRIPT ...]
+# A script is a text file holding one answer per prompt, exactly as an operator would
+# type them; "-" reads a script from standard input.
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, TextIO
+
+from constants_messages import DEFAULT_DATA_FILE
+from data_loader import DataLoader
+from file_handler import FileHandler
+from product_repository import ProductRepository
+from product_service import ProductService
+from product_validator import ProductValidator
+from scripted_io_handler import CommandTiming, ScriptedIOHandler, ScriptExhausted
+from ui import CLI
+
+
+class SessionResult(NamedTuple):
+    """The outcome of replaying one script."""
+
+    name: str
+    timings: List[CommandTiming]
+    elapsed: float
+    transcript: str
+
+
+def replay_session(
+    service: ProductService,
+    validator: ProductValidator,
+    script: Iterable[str],
+    name: str = "session",
+    stream: Optional[TextIO] = None,
+) -> SessionResult:
+    """
+    Drive a CLI with a script until it exits or the script runs out.
+
+    :param service: The ProductService the session operates on.
+    :param validator: The ProductValidator used by the CLI.
+    :param script: The input lines of the session.
+    :param name: A label for the session in reports.
+    :param stream: Where the CLI output goes; defaults to an in-memory transcript.
+    :return: The SessionResult with one timing per command.
+    """
+    io_handler = ScriptedIOHandler(script, stream=stream)
+    cli = CLI(service, validator, io_handler)
+    menu_names = list(cli.menu_items.keys())
+
+    started = time.perf_counter()
+    try:
+        cli.main_loop()
+    except ScriptExhausted:
+        pass
+    io_handler.finish()
+    elapsed = time.perf_counter() - started
+
+    timings = [
+        CommandTiming(_command_label(timing.command, menu_names), timing.seconds)
+        for timing in io_handler.timings
+    ]
+    return SessionResult(name, timings, elapsed, io_handler.transcript)
+
+
+def replay_sessions(
+    service: ProductService,
+    validator: ProductValidator,
+    scripts: Dict[str, List[str]],
+    quiet: bool = False,
+) -> List[SessionResult]:
+    """
+    Replay several scripts concurrently, one thread each, against a shared service.
+
+    :param service: The shared ProductService.
+    :param validator: The ProductValidator used by every CLI.
+    :param scripts: The script lines keyed by session name.
+    :param quiet: If True, discard CLI output instead of keeping transcripts.
+    :return: The SessionResult of every script, in the order given.
+    """
+    if not scripts:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(scripts)) as executor:
+        futures = []
+        for name, lines in scripts.items():
+            stream = open(os.devnull, "w") if quiet else None
+            futures.append(
+                (
+                    stream,
+                    executor.submit(
+                        replay_session, service, validator, lines, name, stream
+                    ),
+                )
+            )
+
+        results = []
+        for stream, future in futures:
+            try:
+                results.append(future.result())
+            finally:
+                if stream is not None:
+                    stream.close()
+        return results
+
+
+def summarize(results: List[SessionResult]) -> List[str]:
+    """
+    Build a per-command latency and throughput report.
+
+    :param results: The results of replayed sessions.
+    :return: The report lines.
+    """
+    by_command: Dict[str, List[float]] = {}
+    for result in results:
+        for timing in result.timings:
+            by_command.setdefault(timing.command, []).append(timing.seconds)
+
+    wall_time = max((result.elapsed for result in results), default=0.0)
+    total = sum(len(latencies) for latencies in by_command.values())
+    lines = [
+        f"Sessions: {len(results)} | Commands: {total} | Wall time: {wall_time:.3f}s"
+        + (f" | Throughput: {total / wall_time:.1f} cmd/s" if wall_time else "")
+    ]
+    for command, latencies in sorted(by_command.items()):
+        latencies.sort()
+        lines.append(
+            f"{command}: count={len(latencies)} "
+            f"mean={sum(latencies) / len(latencies) * 1000:.3f}ms "
+            f"p50={_percentile(latencies, 0.50) * 1000:.3f}ms "
+            f"p99={_percentile(latencies, 0.99) * 1000:.3f}ms "
+            f"max={latencies[-1] * 1000:.3f}ms"
+        )
+    return lines
+
+
+def _command_label(choice: str, menu_names: List[str]) -> str:
+    try:
+        index = int(choice)
+    except ValueError:
+        return "Invalid choice"
+    if 1 <= index <= len(menu_names):
+        return menu_names[index - 1]
+    return "Invalid choice"
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def _read_script(path: str) -> List[str]:
+    if path == "-":
+        return sys.stdin.readlines()
+    with open(path, "r") as file:
+        return file.readlines()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded CLI sessions.")
+    parser.add_argument("scripts", nargs="+", help="Script files, or - for stdin.")
+    parser.add_argument("--data", default=DEFAULT_DATA_FILE, help="Catalog file.")
+    parser.add_argument(
+        "--quiet", action="store_true", help="Discard the CLI output of the sessions."
+    )
+    args = parser.parse_args(argv)
+
+    validator = ProductValidator()
+    repository = ProductRepository(DataLoader(FileHandler(args.data)))
+    service = ProductService(repository, validator)
+
+    scripts = {
+        f"{index}:{path}": _read_script(path)
+        for index, path in enumerate(args.scripts, start=1)
+    }
+    results = replay_sessions(service, validator, scripts, quiet=args.quiet)
+    if not args.quiet:
+        for result in results:
+            print(f"--- {result.name} ---")
+            print(result.transcript, end="")
+    for line in summarize(results):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
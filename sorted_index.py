@@ -0,0 +1,120 @@
+# sorted_index.py
+# Provides an ordered secondary index mapping attribute values to product IDs.
+# SRP: SortedIndex only keeps (value, product_id) pairs sorted and answers range questions.
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Iterator, List, Optional, Tuple
+
+# Product IDs are positive, so these sentinels sort before and after every real entry
+# that shares the same value.
+_BEFORE_ALL_IDS = float("-inf")
+_AFTER_ALL_IDS = float("inf")
+
+
+class SortedIndex:
+    """
+    An ordered index of (value, product_id) pairs.
+
+    Lookups are binary searches; insertions and removals shift the underlying list,
+    which is fast in practice because the shift is a single memmove.
+
+    Attributes:
+    - _entries: The sorted (value, product_id) pairs.
+    """
+
+    def __init__(self, entries: Optional[List[Tuple[Any, int]]] = None):
+        """
+        Initialize a SortedIndex, optionally from unsorted entries.
+
+        :param entries: Initial (value, product_id) pairs.
+        """
+        self._entries: List[Tuple[Any, int]] = sorted(entries or [])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def insert(self, value: Any, product_id: int) -> None:
+        """
+        Add an entry to the index.
+
+        :param value: The indexed attribute value.
+        :param product_id: The ID of the product having that value.
+        """
+        insort(self._entries, (value, product_id))
+
+    def remove(self, value: Any, product_id: int) -> None:
+        """
+        Remove an entry from the index if present.
+
+        :param value: The indexed attribute value.
+        :param product_id: The ID of the product having that value.
+        """
+        entry = (value, product_id)
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def _slice(
+        self,
+        low: Any = None,
+        high: Any = None,
+        low_inclusive: bool = True,
+        high_inclusive: bool = True,
+    ) -> Tuple[int, int]:
+        entries = self._entries
+        if low is None:
+            start = 0
+        elif low_inclusive:
+            start = bisect_left(entries, (low, _BEFORE_ALL_IDS))
+        else:
+            start = bisect_right(entries, (low, _AFTER_ALL_IDS))
+        if high is None:
+            stop = len(entries)
+        elif high_inclusive:
+            stop = bisect_right(entries, (high, _AFTER_ALL_IDS))
+        else:
+            stop = bisect_left(entries, (high, _BEFORE_ALL_IDS))
+        return start, max(start, stop)
+
+    def count_range(
+        self,
+        low: Any = None,
+        high: Any = None,
+        low_inclusive: bool = True,
+        high_inclusive: bool = True,
+    ) -> int:
+        """
+        Count the entries whose value lies in a range, without visiting them.
+
+        :param low: The lower bound, or None for unbounded.
+        :param high: The upper bound, or None for unbounded.
+        :param low_inclusive: Whether the lower bound itself matches.
+        :param high_inclusive: Whether the upper bound itself matches.
+        :return: The number of matching entries.
+        """
+        start, stop = self._slice(low, high, low_inclusive, high_inclusive)
+        return stop - start
+
+    def ids_in_range(
+        self,
+        low: Any = None,
+        high: Any = None,
+        low_inclusive: bool = True,
+        high_inclusive: bool = True,
+        descending: bool = False,
+    ) -> Iterator[int]:
+        """
+        Iterate over the product IDs whose value lies in a range, in value order.
+
+        :param low: The lower bound, or None for unbounded.
+        :param high: The upper bound, or None for unbounded.
+        :param low_inclusive: Whether the lower bound itself matches.
+        :param high_inclusive: Whether the upper bound itself matches.
+        :param descending: If True, iterate from the highest value down.
+        :return: An iterator over product IDs.
+        """
+        start, stop = self._slice(low, high, low_inclusive, high_inclusive)
+        entries = self._entries
+        positions = range(stop - 1, start - 1, -1) if descending else range(start, stop)
+        for position in positions:
+            yield entries[position][1]
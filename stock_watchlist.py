@@ -0,0 +1,201 @@
+# stock_watchlist.py
+# Raises low-stock alerts the moment a product's quantity crosses its reorder threshold.
+# SRP: StockWatchlist follows the repository's change feed and decides which changes
+# are threshold crossings; it does not store or change products itself.
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from change_feed import ChangeEvent, OPERATION_UPSERT, Subscription
+from product_query import Query, where
+from product_repository import ProductRepository
+
+ALERT_LOW: str = "low"
+ALERT_RESTOCKED: str = "restocked"
+
+logger = logging.getLogger(__name__)
+
+
+class StockAlert(NamedTuple):
+    """
+    A threshold crossing.
+
+    kind is ALERT_LOW when the quantity fell to or below the threshold and
+    ALERT_RESTOCKED when it rose above it again.
+    """
+
+    kind: str
+    product_id: int
+    quantity: int
+    threshold: Optional[int]
+    timestamp: float
+
+
+AlertCallback = Callable[[StockAlert], None]
+
+
+class StockWatchlist:
+    """
+    Tracks which products are at or below their reorder threshold.
+
+    Every product uses the global threshold unless it has its own. Alerts are raised
+    only on crossings, so a product that stays low is reported once. They are passed
+    to the registered callbacks, synchronously on the writer's thread, and put on a
+    queue for consumers that poll.
+
+    Attributes:
+    - default_threshold: The threshold of products without their own, or None to
+      watch only products with their own threshold.
+    - alerts: The queue of raised StockAlert objects.
+    - _repository: The watched ProductRepository.
+    - _thresholds: The per-product thresholds.
+    - _low: The IDs of the products currently at or below their threshold.
+    - _callbacks: The registered alert callbacks.
+    - _subscription: The change feed subscription, or None once closed.
+    - _lock: Guards the thresholds and the low set.
+    """
+
+    def __init__(
+        self,
+        repository: ProductRepository,
+        default_threshold: Optional[int] = None,
+        thresholds: Optional[Dict[int, int]] = None,
+    ):
+        """
+        Initialize a StockWatchlist and start following the repository's changes.
+
+        Products that are already low are recorded without raising alerts.
+
+        :param repository: The ProductRepository to watch.
+        :param default_threshold: The global reorder threshold, or None.
+        :param thresholds: Per-product reorder thresholds by product ID.
+        """
+        self.default_threshold = default_threshold
+        self.alerts: "queue.Queue[StockAlert]" = queue.Queue()
+        self._repository = repository
+        self._thresholds: Dict[int, int] = dict(thresholds or {})
+        self._low: Set[int] = set()
+        self._callbacks: List[AlertCallback] = []
+        self._lock = threading.RLock()
+        # Subscribing first means no change is missed while the initial state is read;
+        # the crossing logic makes seeing a change twice harmless.
+        self._subscription: Optional[Subscription] = repository.changes.subscribe(
+            self._on_change
+        )
+        # The index query runs outside the watchlist lock, because writers hold the
+        # repository lock while they deliver changes to _on_change. Each candidate is
+        # then re-read, lock-free, so changes delivered meanwhile are not undone.
+        candidates = [product.product_id for product in self._candidates()]
+        with self._lock:
+            for product_id in candidates:
+                product = repository.get_product_by_id(product_id)
+                if product is not None and self._is_low(product_id, product.quantity):
+                    self._low.add(product_id)
+
+    def _candidates(self):
+        """
+        Find the products that may be low, using the quantity index.
+
+        :return: The products at or below the highest threshold in use.
+        """
+        limits = list(self._thresholds.values())
+        if self.default_threshold is not None:
+            limits.append(self.default_threshold)
+        if not limits:
+            return []
+        return self._repository.query(Query(where("quantity").le(max(limits))))
+
+    def threshold(self, product_id: int) -> Optional[int]:
+        return self._thresholds.get(product_id, self.default_threshold)
+
+    def _is_low(self, product_id: int, quantity: int) -> bool:
+        threshold = self.threshold(product_id)
+        return threshold is not None and quantity <= threshold
+
+    def set_threshold(self, product_id: int, threshold: Optional[int]) -> None:
+        """
+        Give a product its own reorder threshold, or return it to the global one.
+
+        The product is re-evaluated at once, which may raise an alert unless the
+        product is no longer watched at all.
+
+        :param product_id: The ID of the product.
+        :param threshold: The new threshold, or None to use the global threshold.
+        """
+        with self._lock:
+            if threshold is None:
+                self._thresholds.pop(product_id, None)
+            else:
+                self._thresholds[product_id] = threshold
+            product = self._repository.get_product_by_id(product_id)
+            if product is not None:
+                watched = self.threshold(product_id) is not None
+                self._evaluate(product_id, product.quantity, notify=watched)
+
+    def add_callback(self, callback: AlertCallback) -> None:
+        """
+        Register a function called with every alert.
+
+        :param callback: The function; exceptions it raises are logged and ignored.
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def low_products(self) -> List[int]:
+        """
+        Get the products currently at or below their threshold.
+
+        :return: Their IDs in ascending order.
+        """
+        with self._lock:
+            return sorted(self._low)
+
+    def close(self) -> None:
+        """
+        Stop following the repository's changes.
+        """
+        if self._subscription is not None:
+            self._subscription.cancel()
+            self._subscription = None
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        with self._lock:
+            if event.operation == OPERATION_UPSERT:
+                product = ProductRepository.from_record(event.product_id, event.data)
+                self._evaluate(event.product_id, product.quantity)
+            else:
+                self._low.discard(event.product_id)
+
+    def _evaluate(self, product_id: int, quantity: int, notify: bool = True) -> None:
+        """
+        Record a product's quantity and raise an alert if it crossed its threshold.
+
+        :param product_id: The ID of the product.
+        :param quantity: Its current quantity.
+        :param notify: If False, the state is updated without raising an alert.
+        """
+        low = self._is_low(product_id, quantity)
+        if low == (product_id in self._low):
+            return
+        if low:
+            self._low.add(product_id)
+        else:
+            self._low.discard(product_id)
+        if not notify:
+            return
+        alert = StockAlert(
+            ALERT_LOW if low else ALERT_RESTOCKED,
+            product_id,
+            quantity,
+            self.threshold(product_id),
+            time.time(),
+        )
+        self.alerts.put(alert)
+        for callback in list(self._callbacks):
+            try:
+                callback(alert)
+            except Exception:
+                logger.exception("Stock alert callback failed for %s", product_id)
@@ -0,0 +1,51 @@
+# storage_backends.py
+# Registry of the storage backends a catalog can be kept in.
+# SRP: Maps a backend name to a factory building the DataLoader-compatible object that
+# stores a catalog at a given location.
+
+from typing import Callable, Dict, List
+
+from constants_messages import ProductMessages
+from data_loader import DataLoader, InMemoryDataLoader
+from file_handler import FileHandler
+from framed_data_loader import FramedDataLoader
+
+# A factory takes a location, e.g. a file path, and returns an object with the
+# load_data() and save_data(data) methods of DataLoader.
+BackendFactory = Callable[[str], DataLoader]
+
+_BACKENDS: Dict[str, BackendFactory] = {}
+
+
+def register_backend(name: str, factory: BackendFactory) -> None:
+    """
+    Make a storage backend available under a name.
+
+    :param name: The backend name, e.g. as given on a command line.
+    :param factory: Builds the backend's loader for a location.
+    """
+    _BACKENDS[name] = factory
+
+
+def backend_names() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+def open_loader(name: str, location: str) -> DataLoader:
+    """
+    Build the loader of a registered backend.
+
+    :param name: The backend name.
+    :param location: Where the catalog is stored; ignored by in-memory backends.
+    :return: The loader.
+    :raises ValueError: If no backend is registered under the name.
+    """
+    factory = _BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(ProductMessages.unknown_backend(name, backend_names()))
+    return factory(location)
+
+
+register_backend("json", lambda location: DataLoader(FileHandler(location)))
+register_backend("memory", lambda location: InMemoryDataLoader())
+register_backend("framed", lambda location: FramedDataLoader(FileHandler(location)))
@@ -0,0 +1,224 @@
+# storage_migration.py
+# Moves a catalog from one storage backend to another without taking it offline.
+#
+# Usage: python storage_migration.py SOURCE TARGET
+# where SOURCE and TARGET are BACKEND:PATH, e.g. json:products.json
+# SRP: StorageMigration copies a live repository to a new loader, keeps the copy in step
+# by dual-writing changes and switches the repository over once both sides match.
+
+import argparse
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from catalog_merkle import content_hash
+from change_feed import ChangeEvent, Subscription
+from data_loader import DataLoader, Record
+from product import Product
+from product_repository import ProductRepository
+from storage_backends import open_loader
+
+PHASE_IDLE: str = "idle"
+PHASE_COPYING: str = "copying"
+PHASE_DUAL_WRITE: str = "dual-write"
+PHASE_DONE: str = "done"
+
+# A JSON target is rewritten on every append, so dual writes are applied in batches.
+DUAL_WRITE_BATCH_SIZE: int = 100
+
+
+class MigrationError(Exception):
+    """Raised when the target of a migration does not match its source."""
+
+
+def loader_products(loader: DataLoader) -> Iterable[Product]:
+    """
+    Stream the products stored by a loader.
+
+    :param loader: A loader with iter_records().
+    :return: An iterator over the stored products.
+    """
+    for key, record in loader.iter_records():
+        yield ProductRepository.from_record(int(key), record)
+
+
+def copy_records(source: DataLoader, target: DataLoader) -> Tuple[int, str]:
+    """
+    Copy a catalog between loaders offline, one record at a time, and verify it.
+
+    :param source: The loader to copy from.
+    :param target: The loader to replace the content of.
+    :return: The number of products copied and their content hash.
+    :raises MigrationError: If the target does not read back as the source.
+    """
+    target.write_records(source.iter_records())
+    expected = content_hash(loader_products(source))
+    actual = content_hash(loader_products(target))
+    if actual != expected:
+        raise MigrationError(f"Copy mismatch: source {expected}, target {actual}.")
+    return actual
+
+
+class StorageMigration:
+    """
+    Online migration of a repository to another loader.
+
+    copy() subscribes to the repository's change feed and streams a point-in-time
+    snapshot to the target. Changes made during the copy are buffered and applied
+    afterwards; after that, every change is also written to the target, in batches of
+    DUAL_WRITE_BATCH_SIZE and before every cutover check.
+    The repository keeps using its old loader throughout. cutover() checks that the
+    target holds the same number of products with the same content hash as the
+    repository and then switches the repository to the target.
+
+    Attributes:
+    - phase: One of the PHASE_ constants.
+    - _repository: The repository being migrated.
+    - _target: The loader the repository is moved to.
+    - _pending: Changes not yet written to the target, as records to append.
+    - _subscription: The change feed subscription used for dual writes.
+    - _error: The first exception a dual write raised, if any.
+    - _lock: Serializes dual writes with the end of the copy.
+    """
+
+    def __init__(self, repository: ProductRepository, target: DataLoader):
+        """
+        Initialize a StorageMigration.
+
+        :param repository: The repository to migrate.
+        :param target: The loader to move it to; must support the streaming methods.
+        """
+        self.phase = PHASE_IDLE
+        self._repository = repository
+        self._target = target
+        self._pending: List[Record] = []
+        self._subscription: Optional[Subscription] = None
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    def copy(self) -> int:
+        """
+        Copy the repository to the target and start dual-writing changes.
+
+        :return: The number of products in the copied snapshot.
+        """
+        with self._lock:
+            self.phase = PHASE_COPYING
+        # Subscribing before taking the snapshot means no change can be missed; changes
+        # already in the snapshot are applied again, which changes nothing.
+        self._subscription = self._repository.changes.subscribe(self._on_change)
+        copied = 0
+
+        def records():
+            nonlocal copied
+            with self._repository.snapshot() as snapshot:
+                for product in snapshot:
+                    copied += 1
+                    yield str(product.product_id), self._repository.to_record(product)
+
+        self._target.write_records(records())
+        with self._lock:
+            self._flush()
+            self.phase = PHASE_DUAL_WRITE
+        return copied
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        record = (str(event.product_id), event.data)
+        with self._lock:
+            if self.phase == PHASE_COPYING:
+                self._pending.append(record)
+            elif self.phase == PHASE_DUAL_WRITE:
+                self._pending.append(record)
+                if len(self._pending) >= DUAL_WRITE_BATCH_SIZE:
+                    self._flush()
+
+    def _flush(self) -> None:
+        records, self._pending = self._pending, []
+        if records:
+            self._append(records)
+
+    def _append(self, records: List[Record]) -> None:
+        try:
+            self._target.append_records(records)
+        except Exception as e:
+            # The repository's own write already succeeded; the failure surfaces
+            # at cutover instead.
+            if self._error is None:
+                self._error = e
+            raise
+
+    def cutover(self, attempts: int = 5) -> Tuple[int, str]:
+        """
+        Verify the target and switch the repository over to it.
+
+        The target is read without blocking writers. If a write lands while it is
+        being read, or the target cannot be read yet, the check is repeated, up to the
+        given number of attempts.
+
+        :param attempts: How often to try before giving up.
+        :return: The number of products and their content hash.
+        :raises MigrationError: If the copy is not in dual-write, a dual write
+            failed, the target differs from the repository, or the catalog kept
+            changing.
+        """
+        if self.phase != PHASE_DUAL_WRITE:
+            raise MigrationError("Cutover requires a finished copy.")
+        changes = self._repository.changes
+        for _ in range(attempts):
+            if self._error is not None:
+                raise MigrationError(f"A dual write failed: {self._error}")
+            sequence, count, root_hash = self._repository.content_summary()
+            expected = (count, root_hash)
+            try:
+                with self._lock:
+                    self._flush()
+            except Exception as e:
+                raise MigrationError(f"A dual write failed: {e}") from e
+            try:
+                actual = content_hash(loader_products(self._target))
+            except ValueError:
+                # Another process may be writing the target non-atomically.
+                continue
+            if actual == expected and self._repository.switch_loader(
+                self._target, if_unchanged_since=sequence
+            ):
+                self.close()
+                return actual
+            # A dual write only happens once its sequence is visible, so with no new
+            # sequence the target cannot have changed since the summary.
+            if actual != expected and changes.last_sequence == sequence:
+                raise MigrationError(
+                    f"Target mismatch: expected {expected}, found {actual}."
+                )
+        raise MigrationError("The catalog kept changing; try the cutover again.")
+
+    def close(self) -> None:
+        """
+        Stop dual-writing; the repository keeps whichever loader it has.
+        """
+        with self._lock:
+            self.phase = PHASE_DONE
+        if self._subscription is not None:
+            self._subscription.cancel()
+            self._subscription = None
+
+
+def _parse_location(text: str) -> DataLoader:
+    backend, _, path = text.partition(":")
+    try:
+        return open_loader(backend, path)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Copy a catalog between backends.")
+    parser.add_argument("source", type=_parse_location, help="BACKEND:PATH to read.")
+    parser.add_argument("target", type=_parse_location, help="BACKEND:PATH to write.")
+    args = parser.parse_args(argv)
+
+    count, digest = copy_records(args.source, args.target)
+    print(f"Copied and verified {count} product(s), content hash {digest}")
+
+
+if __name__ == "__main__":
+    main()
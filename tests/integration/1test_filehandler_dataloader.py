@@ -71,6 +71,6 @@ def test_file_handler_and_data_loader_integration(
     with open(test_file, "w") as file:
         file.write("corrupt data")
 
-    # When DataLoader encounters the corrupted data file, it should return an empty dictionary.
-    loaded_data = data_loader.load_data()
-    assert loaded_data == {}
+    # When DataLoader encounters the corrupted data file, it should refuse to load it.
+    with pytest.raises(ValueError):
+        data_loader.load_data()
@@ -3,6 +3,7 @@ import pytest
 import os
 from data_loader import DataLoader
 from file_handler import FileHandler
+from product_repository import ProductRepository
 
 # Define the path for a temporary file that will be used for testing
 TEMP_FILE_PATH = "temp_test_file.json"
@@ -44,3 +45,17 @@ def data_loader(file_handler):
     - Test loading data with DataLoader and verify it matches the saved data
     - Test DataLoader's behavior with corrupted data in the file
     """
+
+
+def test_corrupt_data_file_is_not_overwritten(test_file, data_loader):
+    """
+    Test that a data file that is not valid JSON is refused rather than replaced.
+    """
+    with open(test_file, "w") as file:
+        file.write('{"1": {"name": "Lamp", "price_cents": 1')
+
+    with pytest.raises(ValueError):
+        ProductRepository(data_loader)
+
+    with open(test_file) as file:
+        assert file.read() == '{"1": {"name": "Lamp", "price_cents": 1'
@@ -0,0 +1,105 @@
+import os
+import pytest
+
+from change_feed import ChangeFeed
+from data_loader import InMemoryDataLoader
+from file_handler import FileHandler
+from product import Product
+from product_repository import ProductRepository
+from replication import ReplicationFollower, ReplicationLeader, parse_address
+
+
+@pytest.fixture
+def leader_repository(tmp_path) -> ProductRepository:
+    """
+    Fixture to provide a leader repository with a durable change log.
+
+    :return: An instance of ProductRepository holding one product.
+    """
+    log_handler = FileHandler(os.path.join(tmp_path, "changes.jsonl"))
+    repository = ProductRepository(
+        InMemoryDataLoader(), change_feed=ChangeFeed(log_handler)
+    )
+    repository.add_product(Product(1, "Cable", 2.5, 10))
+    return repository
+
+
+@pytest.fixture
+def leader(leader_repository: ProductRepository) -> ReplicationLeader:
+    """
+    Fixture to provide a running leader on a free local TCP port.
+
+    :param leader_repository: The repository to replicate.
+    :return: A started ReplicationLeader.
+    """
+    leader = ReplicationLeader(
+        leader_repository, ("127.0.0.1", 0), heartbeat_interval=0.05
+    )
+    leader.start()
+    yield leader
+    leader.stop()
+
+
+def test_parse_address():
+    """Test parsing of TCP and Unix socket addresses"""
+    assert parse_address("127.0.0.1:7070") == ("127.0.0.1", 7070)
+    assert parse_address("unix:/tmp/catalog.sock") == "/tmp/catalog.sock"
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+
+def test_follower_catches_up_and_streams_changes(
+    leader: ReplicationLeader, leader_repository: ProductRepository
+):
+    """
+    Test that a follower loads a snapshot, then applies live changes.
+
+    :param leader: A running ReplicationLeader.
+    :param leader_repository: The leader's repository.
+    """
+    follower = ReplicationFollower(leader.address, reconnect_delay=0.05)
+    follower.start()
+    try:
+        assert follower.wait_until_synced(timeout=5)
+        assert follower.repository.get_product_by_id(1).name == "Cable"
+
+        leader_repository.add_products(
+            [Product(2, "Hub", 20, 1), Product(3, "Plug", 3, 5)]
+        )
+        assert follower.wait_for_sequence(3)
+
+        assert len(follower.repository.list_products()) == 3
+        assert follower.lag()["lag_events"] == 0
+        assert leader.followers() == [{"sent_sequence": 3, "lag_events": 0}]
+    finally:
+        follower.stop()
+
+
+def test_leader_replays_log_for_known_offset(leader: ReplicationLeader):
+    """
+    Test that a follower with a logged offset is served from the log.
+
+    :param leader: A running ReplicationLeader.
+    """
+    assert leader.can_replay_from(1)
+    assert not leader.can_replay_from(0)
+    assert not leader.can_replay_from(99)
+
+
+def test_follower_skips_events_it_cannot_apply():
+    """Test that a bad event is counted and skipped while later events still apply"""
+    follower = ReplicationFollower(("127.0.0.1", 0))
+    record = {"name": "Cable", "price_cents": 250, "quantity": 10}
+    messages = [
+        {"sequence": 1, "operation": "upsert", "product_id": 1, "data": record},
+        {"sequence": 2, "operation": "upsert", "product_id": 2, "data": {}},
+        {"sequence": 3, "operation": "remove", "product_id": 1, "data": None},
+        {"sequence": 4, "operation": "upsert", "product_id": 3, "data": record},
+    ]
+
+    for message in messages:
+        follower._handle(dict(message, type="event", timestamp=0.0))
+
+    assert [p.product_id for p in follower.repository.list_products()] == [3]
+    assert follower.lag()["failed_events"] == 1
+    assert follower.lag()["applied_sequence"] == 4
@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import Mock
+
+from product_repository import ProductRepository
+from product_service import ProductService
+from product_validator import ProductValidator
+from scripted_io_handler import ScriptedIOHandler, ScriptExhausted
+from session_replay import replay_session, replay_sessions
+
+
+@pytest.fixture
+def service() -> ProductService:
+    """
+    Fixture to provide a ProductService over an empty, in-memory repository.
+
+    :return: An instance of ProductService.
+    """
+    loader = Mock()
+    loader.load_data.return_value = {}
+    return ProductService(ProductRepository(loader), ProductValidator())
+
+
+def test_scripted_io_handler_answers_and_runs_out() -> None:
+    """
+    Test that script lines are returned in order and the end of the script is signalled.
+    """
+    io_handler = ScriptedIOHandler(["1\n", "abc\n"])
+
+    assert io_handler.input("Enter your choice: ") == "1"
+    assert io_handler.input("Enter product ID: ") == "abc"
+    with pytest.raises(ScriptExhausted):
+        io_handler.input("Enter your choice: ")
+
+    assert [timing.command for timing in io_handler.timings] == ["1"]
+
+
+def test_replay_session_adds_and_lists_products(service: ProductService) -> None:
+    """
+    Test that a recorded session drives the CLI through the service end to end.
+
+    :param service: An instance of ProductService.
+    """
+    script = ["1", "101", "Widget", "2.50", "5", "2", "5"]
+
+    result = replay_session(service, ProductValidator(), script)
+
+    assert service.product_exists(101)
+    assert "ID: 101 | Name: Widget | Price: $2.50 | Quantity: 5" in result.transcript
+    assert [timing.command for timing in result.timings] == [
+        "Add Product",
+        "List Products",
+        "Exit",
+    ]
+
+
+def test_replay_sessions_share_the_service(service: ProductService) -> None:
+    """
+    Test that concurrently replayed scripts operate on the same service.
+
+    :param service: An instance of ProductService.
+    """
+    scripts = {
+        f"session-{n}": ["1", str(n), f"Item {n}", "1.00", "1", "5"]
+        for n in range(1, 9)
+    }
+
+    results = replay_sessions(service, ProductValidator(), scripts, quiet=True)
+
+    assert len(results) == 8
+    assert len(service.list_products()) == 8
+
+
+def test_out_of_range_menu_choices_are_rejected(service: ProductService) -> None:
+    """
+    Test that zero and negative menu choices do not select items from the end.
+
+    :param service: An instance of ProductService.
+    """
+    script = ["0", "-1", "6", "2", "5"]
+
+    result = replay_session(service, ProductValidator(), script)
+
+    assert result.transcript.count("Invalid choice! Please try again.") == 3
+    assert result.transcript.count("Goodbye!") == 1
@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import Mock
+from bloom_filter import BloomFilter
+from data_loader import InMemoryDataLoader
+from file_handler import FileHandler
+from product import Product
+from product_repository import ProductRepository
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test that every added key is reported as possibly present"""
+    bloom = BloomFilter(capacity=1000, false_positive_rate=0.01)
+    for key in range(1, 1001):
+        bloom.add(key)
+
+    assert all(bloom.might_contain(key) for key in range(1, 1001))
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate():
+    """Test that the observed false-positive rate stays near the configured rate"""
+    bloom = BloomFilter.from_keys(range(1, 5001), false_positive_rate=0.01)
+    false_positives = sum(bloom.might_contain(key) for key in range(10001, 20001))
+
+    assert false_positives / 10000 < 0.03
+
+
+def test_bloom_filter_invalid_parameters():
+    """Test that out-of-range sizing parameters are rejected"""
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=0)
+
+    with pytest.raises(ValueError):
+        BloomFilter(false_positive_rate=1.5)
+
+
+def test_bloom_filter_save_and_load():
+    """Test that a filter survives a round trip through a FileHandler"""
+    stored = {}
+    file_handler = Mock()
+    file_handler.write.side_effect = lambda data: stored.update(data=data)
+    file_handler.read.side_effect = lambda: stored.get("data")
+
+    bloom = BloomFilter.from_keys([3, 14, 15, 92])
+    bloom.save(file_handler)
+    restored = BloomFilter.load(file_handler)
+
+    assert restored.count == 4
+    assert all(restored.might_contain(key) for key in [3, 14, 15, 92])
+
+
+def test_bloom_filter_load_missing_or_corrupt():
+    """Test that a missing or corrupt filter file yields None"""
+    file_handler = Mock()
+    file_handler.read.return_value = None
+    assert BloomFilter.load(file_handler) is None
+
+    file_handler.read.return_value = "corrupt data"
+    assert BloomFilter.load(file_handler) is None
+
+
+def test_bloom_filter_load_checks_fingerprint():
+    """Test that a filter saved for other keys is not loaded"""
+    stored = {}
+    file_handler = Mock()
+    file_handler.write.side_effect = lambda data: stored.update(data=data)
+    file_handler.read.side_effect = lambda: stored.get("data")
+
+    BloomFilter.from_keys([1, 2]).save(file_handler, fingerprint="abc")
+
+    assert BloomFilter.load(file_handler, fingerprint="abc").count == 2
+    assert BloomFilter.load(file_handler, fingerprint="def") is None
+
+
+def test_repository_reuses_saved_filter_for_unchanged_data(tmp_path, monkeypatch):
+    """Test that the saved filter is loaded unless the data changed since"""
+    loader = InMemoryDataLoader()
+    bloom_handler = FileHandler(str(tmp_path / "products.bloom.json"))
+    repository = ProductRepository(loader, bloom_handler=bloom_handler)
+    repository.add_products(Product(key, f"Item {key}", 1.0, 1) for key in (3, 14))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("rebuilt")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(BloomFilter, "from_keys", fail)
+        assert ProductRepository(loader, bloom_handler=bloom_handler).might_contain(14)
+
+    data = loader.load_data()
+    data["15"] = dict(data["14"], product_id=15)
+    loader.save_data(data)
+    assert ProductRepository(loader, bloom_handler=bloom_handler).might_contain(15)
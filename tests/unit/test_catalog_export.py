@@ -0,0 +1,103 @@
+import csv
+import json
+
+import pytest
+
+from catalog_export import (
+    FORMAT_COLUMNAR,
+    FORMAT_JSONL,
+    export_products,
+    read_columnar,
+)
+from data_loader import InMemoryDataLoader
+from product import Product
+from product_query import QueryError, where
+from product_repository import ProductRepository
+from product_service import ProductService
+from product_validator import ProductValidator
+
+
+@pytest.fixture
+def service():
+    repository = ProductRepository(InMemoryDataLoader())
+    repository.add_products(
+        Product(product_id, f'Item, "{product_id}"', 0.5 * product_id, product_id % 7)
+        for product_id in range(1, 251)
+    )
+    return ProductService(repository, ProductValidator())
+
+
+def test_csv_export_in_worker_processes(service, tmp_path):
+    """Test a parallel CSV export with a filter, a projection and progress reports"""
+    output = tmp_path / "low.csv"
+    progress = []
+
+    count = service.export(
+        str(output),
+        fields=["id", "name", "quantity"],
+        where=where("quantity").lt(2),
+        chunk_size=16,
+        workers=2,
+        progress=progress.append,
+    )
+
+    expected = [product for product in service.list_products() if product.quantity < 2]
+    with open(output, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["product_id", "name", "quantity"]
+    assert rows[1:] == [
+        [str(product.product_id), product.name, str(product.quantity)]
+        for product in expected
+    ]
+    assert count == len(expected)
+    assert progress[-1] == count and progress == sorted(progress)
+
+
+def test_jsonl_export_with_a_function_filter(service, tmp_path):
+    """Test that JSON Lines exports one object per product"""
+    output = tmp_path / "products.jsonl"
+
+    count = service.export(
+        str(output),
+        FORMAT_JSONL,
+        fields=["id", "price"],
+        where=lambda product: product.product_id <= 3,
+        workers=1,
+    )
+
+    with open(output) as file:
+        lines = [json.loads(line) for line in file]
+    assert count == 3
+    assert lines == [
+        {"product_id": 1, "price_cents": 50},
+        {"product_id": 2, "price_cents": 100},
+        {"product_id": 3, "price_cents": 150},
+    ]
+
+
+def test_columnar_export_reads_back_in_blocks(service, tmp_path):
+    """Test that a columnar export holds every column, one block per chunk"""
+    output = tmp_path / "products.col"
+
+    export_products(
+        service.list_products(), str(output), FORMAT_COLUMNAR, chunk_size=100, workers=2
+    )
+
+    blocks = list(read_columnar(str(output)))
+    assert [len(block["product_id"]) for block in blocks] == [100, 100, 50]
+    products = service.list_products()
+    assert sum((block["name"] for block in blocks), []) == [p.name for p in products]
+    assert sum((block["price_cents"] for block in blocks), []) == [
+        p.price_cents for p in products
+    ]
+
+
+def test_export_rejects_unknown_formats_and_fields(service, tmp_path):
+    """Test that bad export settings fail before anything is written"""
+    output = tmp_path / "products.out"
+
+    with pytest.raises(ValueError, match="Unknown export format"):
+        service.export(str(output), "xml")
+    with pytest.raises(QueryError):
+        service.export(str(output), fields=["colour"])
+    assert not output.exists()
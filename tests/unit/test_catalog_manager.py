@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+
+from catalog_manager import CatalogManager
+from data_loader import InMemoryDataLoader
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = CatalogManager(str(tmp_path), max_open=2)
+    yield manager
+    manager.close()
+
+
+def test_catalogs_open_lazily_and_share_the_validator(manager):
+    """Test that nothing is loaded before first use and catalogs are independent"""
+    assert manager.open_catalogs == []
+
+    with manager.catalog("north") as north:
+        north.add_product("1", "Lamp", "10.00", "2")
+    with manager.catalog("south") as south:
+        assert not south.product_exists(1)
+        assert south._validator is manager.validator
+
+    assert manager.open_catalogs == ["north", "south"]
+
+
+def test_least_recently_used_catalog_is_flushed_and_evicted(manager, tmp_path):
+    """Test that eviction saves unsaved changes and reopening loads them"""
+    with manager.catalog("a") as service:
+        service.add_product("1", "Lamp", "10.00", "2")
+    assert not (tmp_path / "a.json").exists()
+    for name in ("b", "a", "c"):
+        with manager.catalog(name):
+            pass
+
+    assert manager.open_catalogs == ["a", "c"]
+    with manager.catalog("d"):
+        pass
+    assert "a" not in manager.open_catalogs
+    assert (tmp_path / "a.json").exists()
+    with manager.catalog("a") as service:
+        assert service.product_exists(1)
+    # Catalogs that were never written to have no file yet.
+    assert manager.catalog_names() == ["a", "d"]
+
+
+def test_pinned_catalogs_are_not_evicted(manager):
+    """Test that catalogs in use stay resident even above the limit"""
+    with manager.catalog("a"), manager.catalog("b"), manager.catalog("c"):
+        assert manager.stats()["pinned"] == 3
+    assert len(manager.open_catalogs) == 2
+
+
+def test_catalog_that_cannot_be_saved_stays_resident(tmp_path, monkeypatch):
+    """Test that a failed flush on eviction keeps the changes and is retried later"""
+    stored, failing = {}, set()
+
+    class FlakyLoader(InMemoryDataLoader):
+        def __init__(self, location):
+            super().__init__(stored.get(location))
+            self.location = location
+
+        def save_data(self, data):
+            if self.location in failing:
+                raise OSError("disk full")
+            stored[self.location] = data
+
+    monkeypatch.setattr(
+        "catalog_manager.open_loader", lambda backend, location: FlakyLoader(location)
+    )
+    manager = CatalogManager(str(tmp_path), max_open=1)
+    with manager.catalog("a") as service:
+        service.add_product("1", "Lamp", "10.00", "2")
+    failing.add(manager.location("a"))
+
+    # Evicting "a" fails, but neither the caller nor the changes suffer.
+    with manager.catalog("b") as service:
+        service.add_product("2", "Desk", "80.00", "1")
+    assert "a" in manager.open_catalogs
+
+    failing.clear()
+    with manager.catalog("c"):
+        pass
+    assert "a" not in manager.open_catalogs
+    with manager.catalog("a") as service:
+        assert service.product_exists(1)
+
+
+def test_concurrent_first_use_loads_once(manager):
+    """Test that threads opening the same catalog at once share one repository"""
+    services = []
+    barrier = threading.Barrier(8)
+
+    def use():
+        barrier.wait()
+        with manager.catalog("shared") as service:
+            services.append(service)
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(service) for service in services}) == 1
+
+
+def test_invalid_catalog_names_are_rejected(manager):
+    """Test that catalog names cannot point outside the root directory"""
+    for name in ("", "../escape", ".hidden", "a/b"):
+        with pytest.raises(ValueError):
+            with manager.catalog(name):
+                pass
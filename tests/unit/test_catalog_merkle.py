@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import Mock
+
+from catalog_merkle import CatalogMerkleTree
+from catalog_sync import main as catalog_sync_main, merkle_path, sync_catalogs
+from data_loader import DataLoader, InMemoryDataLoader
+from file_handler import FileHandler
+from product import Product
+from product_repository import ProductRepository
+
+
+@pytest.fixture
+def products():
+    return [
+        Product(product_id, f"Item {product_id}", 1.5, 10)
+        for product_id in range(1, 5001)
+    ]
+
+
+def test_merkle_tree_incremental_update_matches_rebuild(products):
+    """Test that updates and removals give the same root as building from scratch"""
+    tree = CatalogMerkleTree.from_products(products)
+    tree.update(Product(42, "Renamed", 1.5, 10))
+    tree.remove(4000)
+
+    expected = [p for p in products if p.product_id not in (42, 4000)]
+    expected.append(Product(42, "Renamed", 1.5, 10))
+    rebuilt = CatalogMerkleTree.from_products(expected)
+
+    assert tree.root_hash == rebuilt.root_hash
+    assert len(tree) == 4999
+
+
+def test_merkle_tree_diff_finds_only_changed_buckets(products):
+    """Test that diff reports exactly the buckets holding changed products"""
+    source = CatalogMerkleTree.from_products(products, bucket_width=100)
+    target = CatalogMerkleTree.from_products(products, bucket_width=100)
+    assert source.diff(target) == []
+
+    target.update(Product(250, "Changed", 1.5, 10))
+    target.remove(4999)
+
+    assert source.diff(target) == [2, 49]
+    with pytest.raises(ValueError):
+        source.diff(CatalogMerkleTree(bucket_width=10))
+
+
+def test_merkle_tree_save_and_load(products):
+    """Test that a stored tree keeps its root hash and can be diffed"""
+    stored = {}
+    file_handler = Mock()
+    file_handler.write.side_effect = lambda data: stored.update(data=data)
+    file_handler.read.side_effect = lambda: stored.get("data")
+
+    tree = CatalogMerkleTree.from_products(products)
+    tree.save(file_handler)
+    restored = CatalogMerkleTree.load(file_handler)
+
+    assert restored.root_hash == tree.root_hash
+    assert restored.diff(tree) == []
+
+    stored["data"] = stored["data"].replace('"root_hash": "', '"root_hash": "0')
+    assert CatalogMerkleTree.load(file_handler) is None
+
+
+def test_sync_catalogs_transfers_only_differences(products):
+    """Test that sync copies changed and missing products and removes extra ones"""
+    source = ProductRepository(InMemoryDataLoader())
+    source.add_products(products)
+    target = ProductRepository(InMemoryDataLoader())
+    target.add_products(products[:-1] + [Product(9000, "Stale", 2.0, 1)])
+    target.add_product(Product(7, "Old name", 1.5, 10))
+
+    report = sync_catalogs(source, target)
+
+    assert sorted(report.upserted) == [7, 5000]
+    assert report.removed == [9000]
+    assert target.merkle_tree.root_hash == source.merkle_tree.root_hash
+    assert target.get_product_by_id(9000) is None
+    assert sync_catalogs(source, target).in_sync
+
+
+def test_diff_ignores_trees_saved_for_older_data(
+    products, tmp_path, capsys, monkeypatch
+):
+    """Test that diff rebuilds a tree whose data file was changed behind its back"""
+    paths = [str(tmp_path / "a.json"), str(tmp_path / "b.json")]
+    for path in paths:
+        ProductRepository(
+            DataLoader(FileHandler(path)), merkle_handler=FileHandler(merkle_path(path))
+        ).add_products(products[:100])
+    # Current stored trees are diffed without loading either catalog.
+    with monkeypatch.context() as patch:
+        patch.setattr("catalog_sync._open_catalog", Mock(side_effect=AssertionError))
+        catalog_sync_main(["diff", *paths])
+    assert capsys.readouterr().out.endswith("0 differing bucket(s)\n")
+
+    # A writer without a merkle handler leaves a.merkle.json as it was.
+    ProductRepository(DataLoader(FileHandler(paths[0]))).add_product(products[-1])
+    catalog_sync_main(["diff", *paths])
+
+    assert capsys.readouterr().out.endswith("1 differing bucket(s)\n")
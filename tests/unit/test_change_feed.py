@@ -0,0 +1,147 @@
+import os
+import threading
+import pytest
+from unittest.mock import Mock
+
+from change_feed import ChangeFeed, ConsumerOffsets, OPERATION_UPSERT
+from file_handler import FileHandler
+from product import Product
+from product_repository import ProductRepository
+
+
+@pytest.fixture
+def log_file(tmp_path) -> str:
+    """
+    Fixture to provide the path of a change log in a temporary directory.
+
+    :return: The path to the change log.
+    """
+    return os.path.join(tmp_path, "changes.jsonl")
+
+
+def make_repository(feed: ChangeFeed) -> ProductRepository:
+    loader = Mock()
+    loader.load_data.return_value = {}
+    return ProductRepository(loader, change_feed=feed)
+
+
+def test_repository_publishes_ordered_events():
+    """Test that every stored product produces one event, in order"""
+    feed = ChangeFeed()
+    received = []
+    feed.subscribe(received.append)
+    repository = make_repository(feed)
+
+    repository.add_product(Product(1, "Cable", 2.5, 10))
+    repository.add_products([Product(2, "Hub", 20, 1), Product(3, "Plug", 3, 5)])
+
+    assert [event.sequence for event in received] == [1, 2, 3]
+    assert [event.product_id for event in received] == [1, 2, 3]
+    assert received[0].operation == OPERATION_UPSERT
+    assert received[0].data["price_cents"] == 250
+
+
+def test_failing_subscriber_does_not_block_writes():
+    """Test that an exception in a subscriber does not fail the insert"""
+    feed = ChangeFeed()
+    feed.subscribe(Mock(side_effect=RuntimeError("boom")))
+    received = []
+    feed.subscribe(received.append)
+
+    make_repository(feed).add_product(Product(1, "Cable", 2.5, 10))
+
+    assert len(received) == 1
+
+
+def test_durable_log_resumes_sequence_and_replays(log_file: str):
+    """Test that a durable feed continues numbering and replays from an offset"""
+    make_repository(ChangeFeed(FileHandler(log_file))).add_products(
+        [Product(1, "Cable", 2.5, 10), Product(2, "Hub", 20, 1)]
+    )
+
+    feed = ChangeFeed(FileHandler(log_file))
+    assert feed.last_sequence == 2
+
+    replayed = []
+    feed.subscribe(replayed.append, from_sequence=1)
+    make_repository(feed).add_product(Product(3, "Plug", 3, 5))
+
+    assert [event.sequence for event in replayed] == [2, 3]
+    assert [event.product_id for event in feed.read_from(0)] == [1, 2, 3]
+
+
+def test_log_is_read_through_its_file_handler(log_file: str):
+    """Test that a missing log reads as empty and byte reads go through the handler"""
+    handler = FileHandler(log_file)
+    assert handler.read_bytes() is None and handler.read_tail(10) is None
+    assert ChangeFeed(handler).last_sequence == 0
+
+    handler.append_bytes(b"0123456789")
+    assert handler.read_bytes(2, 3) == b"234"
+    assert handler.read_tail(4) == b"6789"
+    assert handler.read_tail(100) == b"0123456789"
+
+
+def test_resume_seeks_instead_of_reading_the_whole_log(log_file: str):
+    """Test that replaying the last events reads only a small part of a long log"""
+    handler = FileHandler(log_file)
+    make_repository(ChangeFeed(handler)).add_products(
+        Product(product_id, f"Item {product_id}", 1.0, 1)
+        for product_id in range(1, 5001)
+    )
+    feed = ChangeFeed(handler)
+    read = []
+    read_bytes = handler.read_bytes
+    handler.read_bytes = lambda *args: read.append(read_bytes(*args)) or read[-1]
+
+    events = list(feed.read_from(4997))
+
+    assert [event.sequence for event in events] == [4998, 4999, 5000]
+    assert sum(len(data) for data in read) < handler.size() // 10
+
+
+def test_replay_does_not_block_writers(log_file: str):
+    """Test that events published during a replay are delivered once, in order"""
+    feed = ChangeFeed(FileHandler(log_file))
+    make_repository(feed).add_products(
+        [Product(1, "Cable", 2.5, 10), Product(2, "Hub", 20, 1)]
+    )
+    received, blocked = [], []
+
+    def callback(event):
+        received.append(event.sequence)
+        if event.sequence == 1:
+            writer = threading.Thread(target=feed.publish, args=("upsert", 3, {}))
+            writer.start()
+            writer.join(timeout=2)
+            blocked.append(writer.is_alive())
+
+    feed.subscribe(callback, from_sequence=0)
+    feed.publish("upsert", 4, {})
+
+    assert blocked == [False]
+    assert received == [1, 2, 3, 4]
+
+
+def test_tail_stops_when_asked(log_file: str):
+    """Test that tailing yields logged events and ends when the stop event is set"""
+    feed = ChangeFeed(FileHandler(log_file))
+    make_repository(feed).add_product(Product(1, "Cable", 2.5, 10))
+    stop = threading.Event()
+
+    for event in feed.tail(0, stop, poll_interval=0.01):
+        assert event.product_id == 1
+        stop.set()
+
+
+def test_consumer_offsets_are_saved():
+    """Test that committed offsets are written through the DataLoader"""
+    loader = Mock()
+    loader.load_data.return_value = {"search-cache": 7}
+    offsets = ConsumerOffsets(loader)
+
+    assert offsets.get("search-cache") == 7
+    assert offsets.get("pricing") == 0
+
+    offsets.commit("pricing", 12)
+    loader.save_data.assert_called_with({"search-cache": 7, "pricing": 12})
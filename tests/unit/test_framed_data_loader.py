@@ -0,0 +1,91 @@
+import pytest
+
+import framed_data_loader
+from file_handler import FileHandler
+from framed_data_loader import FramedDataLoader, SYNC_MARKER
+from product import Product
+from product_repository import ProductRepository
+
+
+@pytest.fixture
+def data():
+    return {
+        str(product_id): {"name": f"Item {product_id}", "quantity": product_id}
+        for product_id in range(1, 201)
+    }
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "products.framed")
+
+
+def test_framed_loader_round_trip(data, path):
+    """Test that saved data loads back unchanged with a clean report"""
+    loader = FramedDataLoader(FileHandler(path))
+    assert loader.load_data() == {}
+
+    loader.save_data(data)
+
+    assert loader.load_data() == data
+    assert loader.last_report.is_clean
+    assert loader.last_report.records == 200
+
+
+def test_framed_loader_skips_only_damaged_records(data, path):
+    """Test that flipped bytes and a cut-off tail cost only the records they hit"""
+    loader = FramedDataLoader(FileHandler(path))
+    loader.save_data(data)
+    with open(path, "rb") as file:
+        content = bytearray(file.read())
+    content[content.index(b"Item 50")] ^= 0x20
+    content[content.index(b'["120"') - 6] ^= 0xFF  # Inside the record header.
+    with open(path, "wb") as file:
+        file.write(content[:-5])
+
+    recovered = loader.load_data()
+
+    assert set(data) - set(recovered) == {"50", "120", "200"}
+    assert all(recovered[key] == data[key] for key in recovered)
+    assert loader.last_report.corrupt_regions == 3
+    with open(f"{path}.corrupt", "rb") as file:
+        assert file.read() == content[:-5]
+
+
+def test_framed_loader_parallel_matches_serial(data, path, monkeypatch):
+    """Test that verifying in chunks finds exactly the records of a serial pass"""
+    monkeypatch.setattr(framed_data_loader, "PARALLEL_MIN_BYTES", 0)
+    FramedDataLoader(FileHandler(path)).save_data(data)
+    with open(path, "r+b") as file:
+        content = bytearray(file.read())
+        content[len(content) // 3] ^= 0xFF
+        file.seek(0)
+        file.write(content)
+
+    serial = FramedDataLoader(FileHandler(path))
+    parallel = FramedDataLoader(FileHandler(path), workers=3)
+
+    assert parallel.load_data() == serial.load_data()
+    assert parallel.last_report == serial.last_report
+    assert serial.last_report.corrupt_regions == 1
+
+
+def test_framed_loader_resyncs_after_garbage(data, path):
+    """Test that trailing garbage, even marker-like, is reported and skipped"""
+    loader = FramedDataLoader(FileHandler(path))
+    loader.save_data(data)
+    with open(path, "ab") as file:
+        file.write(b"garbage" + SYNC_MARKER + b"\x00\x00")
+    assert loader.load_data() == data
+    assert loader.last_report.corrupt_regions == 1
+    assert loader.last_report.bytes_skipped == len(b"garbage") + len(SYNC_MARKER) + 2
+
+
+def test_repository_on_framed_loader(path):
+    """Test that a repository persists products through the framed format"""
+    repository = ProductRepository(FramedDataLoader(FileHandler(path)))
+    repository.add_product(Product(7, "Lamp", 12.5, 3))
+
+    reloaded = ProductRepository(FramedDataLoader(FileHandler(path)))
+
+    assert reloaded.get_product_by_id(7).price_cents == 1250
@@ -0,0 +1,128 @@
+import pytest
+
+from change_feed import ChangeFeed
+from data_loader import InMemoryDataLoader
+from file_handler import FileHandler
+from inventory_history import InventoryHistory, decode_block, encode_block, _State
+from product import Product
+from product_repository import ProductRepository
+from product_service import ProductError, ProductService
+from product_validator import ProductValidator
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable time.time() shared by the change feed and the history"""
+    now = [1000.0]
+    monkeypatch.setattr("time.time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def repository(clock):
+    repository = ProductRepository(InMemoryDataLoader())
+    repository.add_products(
+        Product(product_id, f"Item {product_id}", 1.0, 10) for product_id in range(1, 4)
+    )
+    return repository
+
+
+def test_blocks_round_trip_with_renames_and_removals():
+    """Test that delta-encoded blocks decode to the states they were built from"""
+    states = [
+        _State(10, 100, 5, "Cable"),
+        _State(20, 90, 5, "Cable"),
+        _State(30, None, 5, "Cable"),
+        _State(45, 120, 2, "USB Cable"),
+    ]
+    assert decode_block(encode_block(states)) == states
+
+
+def test_as_of_reconstructs_past_catalogs(repository, clock):
+    """Test point-in-time snapshots across updates, renames and removals"""
+    history = InventoryHistory(repository, block_size=2)
+    for step in range(1, 6):
+        clock[0] = 1000.0 + 10 * step
+        repository.update_quantity(1, 10 - step)
+    clock[0] = 1100.0
+    renamed = Product.from_cents(2, "Renamed", 250, 7)
+    repository.add_product(renamed)
+    clock[0] = 1200.0
+    repository.remove_product(3)
+
+    assert history.as_of(999.0) == []
+    assert [product.quantity for product in history.as_of(1035.0)] == [7, 10, 10]
+    before_removal = history.as_of(1150.0)
+    assert [(p.product_id, p.name, p.price_cents) for p in before_removal] == [
+        (1, "Item 1", 100),
+        (2, "Renamed", 250),
+        (3, "Item 3", 100),
+    ]
+    assert [product.product_id for product in history.as_of(1300.0)] == [1, 2]
+    # Six states of product 1 and two each of products 2 and 3.
+    assert history.stats()["blocks"] == 5
+
+
+def test_product_history_lists_every_change(repository, clock):
+    """Test per-product history, including removals and unchanged writes"""
+    service = ProductService(
+        repository, ProductValidator(), InventoryHistory(repository)
+    )
+    clock[0] = 1010.0
+    service.adjust_stock(1, 5)
+    clock[0] = 1020.0
+    service.adjust_stock(1, 0)
+    clock[0] = 1030.0
+    repository.remove_product(1)
+
+    entries = service.product_history(1)
+    assert [entry.timestamp for entry in entries] == [1000.0, 1010.0, 1030.0]
+    assert [entry.product and entry.product.quantity for entry in entries] == [
+        10,
+        15,
+        None,
+    ]
+    assert service.product_history(99) == []
+
+
+def test_history_survives_restart_and_replays_the_log(tmp_path, clock):
+    """Test that changes logged after the last save are replayed on start"""
+    feed_handler = FileHandler(str(tmp_path / "changes.jsonl"))
+    history_handler = FileHandler(str(tmp_path / "products.history"))
+    repository = ProductRepository(
+        InMemoryDataLoader(), change_feed=ChangeFeed(feed_handler)
+    )
+    repository.add_product(Product(1, "Item", 1.0, 10))
+    history = InventoryHistory(repository, history_handler, block_size=2)
+    clock[0] = 1010.0
+    repository.update_quantity(1, 9)
+    history.close()
+    clock[0] = 1020.0
+    repository.update_quantity(1, 8)
+
+    reopened = InventoryHistory(repository, history_handler, block_size=2)
+
+    quantities = [entry.product.quantity for entry in reopened.product_history(1)]
+    assert quantities == [10, 9, 8]
+    assert reopened.product_as_of(1, 1015.0).quantity == 9
+
+
+def test_damaged_history_file_is_set_aside(tmp_path, repository):
+    """Test that a truncated history file starts an empty history instead of failing"""
+    history_handler = FileHandler(str(tmp_path / "products.history"))
+    InventoryHistory(repository, history_handler).close()
+    damaged = history_handler.read_bytes()[:-5]
+    history_handler.write_bytes(damaged)
+
+    reopened = InventoryHistory(repository, history_handler)
+
+    assert (tmp_path / "products.history.corrupt").read_bytes() == damaged
+    assert [entry.product.quantity for entry in reopened.product_history(1)] == [10]
+
+
+def test_service_without_history_refuses_as_of(repository):
+    """Test that as-of queries need a recorded history"""
+    service = ProductService(repository, ProductValidator())
+
+    with pytest.raises(ProductError):
+        service.as_of(1000.0)
@@ -0,0 +1,54 @@
+import io
+from io_handler import IOHandler
+from product import Product
+from row_renderer import ProductRowRenderer
+
+
+def test_unbuffered_print_writes_immediately():
+    """Test that an unbuffered IOHandler writes every message straight away"""
+    stream = io.StringIO()
+    handler = IOHandler(stream=stream)
+
+    handler.print("first")
+    handler.write_lines(["second", "third"])
+
+    assert stream.getvalue() == "first\nsecond\nthird\n"
+
+
+def test_buffered_output_waits_for_flush():
+    """Test that buffered output is only written when flushed"""
+    stream = io.StringIO()
+    handler = IOHandler(buffered=True, stream=stream)
+
+    handler.print("first")
+    handler.write_lines(["second", "third"])
+    assert stream.getvalue() == ""
+
+    handler.flush()
+    assert stream.getvalue() == "first\nsecond\nthird\n"
+
+
+def test_buffered_output_flushes_when_full():
+    """Test that the buffer is written out once it reaches its size limit"""
+    stream = io.StringIO()
+    handler = IOHandler(buffered=True, buffer_size=10, stream=stream)
+
+    handler.write_lines(["12345", "67890"])
+
+    assert stream.getvalue() == "12345\n67890\n"
+
+
+def test_row_renderer_caches_and_tracks_name_changes():
+    """Test that rendered rows are reused and refreshed after a rename"""
+    renderer = ProductRowRenderer()
+    product = Product(1, "Cable", 2.5, 10)
+
+    row = renderer.render(product)
+    assert row == "ID: 1 | Name: Cable | Price: $2.50 | Quantity: 10"
+    assert renderer.render(product) is row
+
+    product.name = "USB Cable"
+    assert (
+        renderer.render(product)
+        == "ID: 1 | Name: USB Cable | Price: $2.50 | Quantity: 10"
+    )
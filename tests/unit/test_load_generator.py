@@ -0,0 +1,79 @@
+import random
+from collections import Counter
+
+import pytest
+
+from load_generator import (
+    LoadGenerator,
+    LoadSettings,
+    ZipfianKeys,
+    open_service,
+    parse_mix,
+    percentile,
+    run_load_in_processes,
+)
+from storage_backends import backend_names, open_loader
+
+
+def test_zipfian_keys_are_skewed():
+    """Test that a few keys receive most draws and every draw is a known key"""
+    keys = ZipfianKeys(range(1, 1001), exponent=1.2)
+    rng = random.Random(1)
+    draws = Counter(keys.sample(rng) for _ in range(20000))
+
+    assert set(draws) <= set(range(1, 1001))
+    top_ten = sum(count for _, count in draws.most_common(10))
+    assert top_ten / 20000 > 0.4
+
+
+def test_percentile_nearest_rank():
+    """Test percentiles over a known distribution"""
+    values = list(range(1, 1001))
+
+    assert percentile(values, 0.5) == 500
+    assert percentile(values, 0.99) == 990
+    assert percentile(values, 0.999) == 999
+    assert percentile([], 0.5) == 0.0
+
+
+def test_parse_mix_rejects_unknown_operations():
+    """Test that a mix names known operations with positive weights"""
+    assert parse_mix("read=90,bulk=10") == {"read": 90.0, "bulk": 10.0}
+    with pytest.raises(ValueError):
+        parse_mix("delete=5")
+    with pytest.raises(ValueError):
+        parse_mix("read=0")
+
+
+def test_unknown_backend_is_rejected():
+    """Test that only registered backends can be opened"""
+    assert {"json", "memory"} <= set(backend_names())
+    with pytest.raises(ValueError):
+        open_loader("tape", "catalog")
+
+
+@pytest.mark.parametrize("backend", backend_names())
+def test_load_generator_reports_every_operation(backend, tmp_path):
+    """Test that a short run exercises every operation without errors"""
+    service = open_service(backend, str(tmp_path / "catalog"), 200)
+    generator = LoadGenerator(service, range(1, 201), bulk_size=5, seed=3)
+
+    report = generator.run(rate=400, duration=0.5, workers=4)
+    stats = report.stats()
+
+    assert set(stats) == {"read", "query", "write", "bulk"}
+    assert all(entry.errors == 0 for entry in stats.values())
+    assert all(entry.p50 <= entry.p99 <= entry.p999 for entry in stats.values())
+    assert service.product_exists(201)
+
+
+def test_load_generator_runs_in_processes(tmp_path):
+    """Test that process mode combines the measurements of every process"""
+    settings = LoadSettings(
+        "memory", str(tmp_path / "catalog"), 50, 200, 0.3, 2, {"read": 1}, 1.0, 5, 0
+    )
+
+    report = run_load_in_processes(settings, 2)
+
+    assert report.offered_rate == 200
+    assert report.stats()["read"].count > 20
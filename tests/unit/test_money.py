@@ -0,0 +1,46 @@
+import pytest
+from money import format_cents, to_cents
+from product import Product
+from product_validator import ProductValidator
+from constants_messages import ProductMessages
+
+validator = ProductValidator()
+
+
+def test_to_cents_rounds_half_up():
+    """Test that prices are converted to exact cents using half-up rounding"""
+    assert to_cents("12.34") == 1234
+    assert to_cents(1.005) == 101
+    assert to_cents("0.004") == 0
+    assert to_cents(7) == 700
+
+
+def test_to_cents_rejects_non_numbers():
+    """Test that non-numeric and non-finite prices are rejected"""
+    for value in ["abc", "", "nan", "inf"]:
+        with pytest.raises(ValueError):
+            to_cents(value)
+
+
+def test_format_cents():
+    """Test that cents are formatted with exactly two decimals"""
+    assert format_cents(1234) == "12.34"
+    assert format_cents(5) == "0.05"
+    assert format_cents(-250) == "-2.50"
+
+
+def test_validate_product_price_cents():
+    """Test that the validator converts prices to cents and rejects zero-cent prices"""
+    assert validator.validate_product_price_cents("19.99") == 1999
+
+    with pytest.raises(ValueError, match=ProductMessages.NON_POSITIVE_PRICE):
+        validator.validate_product_price_cents("0.001")
+
+
+def test_product_price_float_view():
+    """Test that the float price is a view over the integer cents"""
+    product = Product.from_cents(1, "Cable", 1099, 3)
+
+    assert product.price_cents == 1099
+    assert product.price == 10.99
+    assert Product(2, "Plug", 10.99, 3).price_cents == 1099
@@ -0,0 +1,118 @@
+import pytest
+from unittest.mock import Mock
+
+from product import Product
+from product_query import (
+    ACCESS_FULL_SCAN,
+    ACCESS_ID_LOOKUP,
+    ACCESS_INDEX_RANGE,
+    Query,
+    QueryError,
+    parse_query,
+    where,
+)
+from product_repository import ProductRepository
+
+
+@pytest.fixture
+def repository() -> ProductRepository:
+    """
+    Fixture to provide a repository holding a small catalog.
+
+    :return: An instance of ProductRepository.
+    """
+    loader = Mock()
+    loader.load_data.return_value = {}
+    repository = ProductRepository(loader)
+    repository.add_products(
+        [
+            Product(1, "USB Cable", 12.00, 3),
+            Product(2, "USB Hub", 45.00, 8),
+            Product(3, "HDMI Cable", 15.00, 2),
+            Product(4, "USB Charger", 60.00, 1),
+            Product(5, "Mouse", 25.00, 40),
+        ]
+    )
+    return repository
+
+
+def test_parse_query_example(repository: ProductRepository):
+    """Test the example query from the feature request end to end"""
+    predicate = parse_query(
+        "quantity < 5 and price between 10 and 50 and name starts with 'USB'"
+    )
+
+    result = repository.query(Query(predicate))
+
+    assert [product.product_id for product in result] == [1]
+
+
+def test_planner_picks_id_lookup(repository: ProductRepository):
+    """Test that an equality on the product ID becomes an ID lookup"""
+    query = Query(where("id").eq(3) & where("quantity").lt(10))
+
+    plan = repository.explain(query)
+
+    assert plan.access_path == ACCESS_ID_LOOKUP
+    assert [product.name for product in repository.query(query)] == ["HDMI Cable"]
+
+
+def test_planner_picks_most_selective_index(repository: ProductRepository):
+    """Test that the index matching the fewest products is chosen"""
+    query = Query(where("quantity").lt(5) & where("price").ge(50))
+
+    plan = repository.explain(query)
+
+    assert plan.access_path == ACCESS_INDEX_RANGE
+    assert plan.field == "price_cents"
+    assert plan.estimated_rows == 1
+    assert [product.product_id for product in repository.query(query)] == [4]
+
+
+def test_planner_falls_back_to_full_scan(repository: ProductRepository):
+    """Test that predicates without an index are answered by a full scan"""
+    query = Query(where("name").startswith("USB"))
+
+    assert repository.explain(query).access_path == ACCESS_FULL_SCAN
+    assert len(repository.query(query)) == 3
+
+
+def test_query_sort_and_limit(repository: ProductRepository):
+    """Test sorting and limiting, both through an index and after a scan"""
+    by_index = Query(where("quantity").ge(0), sort_by="quantity", limit=2)
+    by_scan = Query(sort_by="price", descending=True, limit=2)
+
+    assert repository.explain(by_index).sorted_by_access
+    assert [p.product_id for p in repository.query(by_index)] == [4, 3]
+    assert [p.product_id for p in repository.query(by_scan)] == [4, 2]
+
+
+def test_indexes_follow_updates(repository: ProductRepository):
+    """Test that replacing a product moves it within the indexes"""
+    repository.add_product(Product(5, "Mouse", 25.00, 0))
+
+    result = repository.query(Query(where("quantity").eq(0)))
+
+    assert [product.product_id for product in result] == [5]
+    assert repository.query(Query(where("quantity").eq(40))) == []
+
+
+def test_parse_query_errors():
+    """Test that malformed filters raise QueryError"""
+    for text in ["colour = red", "quantity <", "quantity < abc", "price between 1"]:
+        with pytest.raises(QueryError):
+            parse_query(text)
+
+    # Specific errors from the fields are kept rather than replaced by the example.
+    with pytest.raises(QueryError, match="'abc' is not a valid value for quantity"):
+        parse_query("quantity < abc")
+
+
+def test_sorted_limit_reads_index_in_order(repository: ProductRepository):
+    """Test that a limited sort on an indexed field stops after the limit"""
+    query = Query(sort_by="price", descending=True, limit=2)
+
+    plan = repository.explain(query)
+
+    assert plan.access_path == ACCESS_INDEX_RANGE
+    assert plan.sorted_by_access
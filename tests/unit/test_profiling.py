@@ -0,0 +1,71 @@
+import pstats
+
+import pytest
+
+from data_loader import InMemoryDataLoader
+from product_repository import ProductRepository
+from product_service import ProductService
+from product_validator import ProductValidator
+from profiling import ProfilingHooks, collapsed_stacks
+
+
+@pytest.fixture
+def hooks(tmp_path):
+    hooks = ProfilingHooks(str(tmp_path))
+    yield hooks
+    hooks.disable()
+
+
+def test_profiling_hooks_patch_only_while_enabled(hooks):
+    """Test that the original methods are back in place once profiling stops"""
+    original = ProductService.list_products
+    hooks.enable()
+    assert ProductService.list_products is not original
+    with pytest.raises(RuntimeError):
+        ProfilingHooks().enable()
+
+    hooks.disable()
+    assert ProductService.list_products is original
+    assert hooks.disable() == []
+
+
+def test_profiling_hooks_write_reports(hooks):
+    """Test that service calls produce pstats, collapsed stacks and a memory report"""
+    hooks.enable()
+    repository = ProductRepository(InMemoryDataLoader())
+    service = ProductService(repository, ProductValidator())
+    for product_id in range(1, 6):
+        service.add_product(str(product_id), f"Item {product_id}", "1.25", "3")
+    service.list_products()
+    paths = hooks.disable()
+
+    pstats_path, collapsed_path, memory_path = paths
+    assert pstats_path.endswith(".pstats")
+    assert collapsed_path.endswith(".collapsed")
+    assert memory_path.endswith(".memory.txt")
+    functions = {name for _, _, name in pstats.Stats(pstats_path).stats}
+    assert {"_load_products", "add_product", "list_products"} <= functions
+
+    with open(collapsed_path) as file:
+        lines = file.read().splitlines()
+    assert any(";" in line and "add_product" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    with open(memory_path) as file:
+        report = file.read()
+    assert "_load_products:" in report and "_save_products:" in report
+
+
+def test_collapsed_stacks_split_time_over_callers():
+    """Test that a shared callee's time is divided between its callers' stacks"""
+    main, left, right, leaf = (("m.py", n, name) for n, name in enumerate("mlrx"))
+    stats = {
+        main: (1, 1, 0.0, 4.0, {}),
+        left: (1, 1, 0.0, 3.0, {main: (1, 1, 0.0, 3.0)}),
+        right: (1, 1, 0.0, 1.0, {main: (1, 1, 0.0, 1.0)}),
+        leaf: (2, 2, 4.0, 4.0, {left: (1, 1, 3.0, 3.0), right: (1, 1, 1.0, 1.0)}),
+    }
+
+    assert collapsed_stacks(stats) == [
+        "m.py:m:0;m.py:l:1;m.py:x:3 3000000",
+        "m.py:m:0;m.py:r:2;m.py:x:3 1000000",
+    ]
@@ -0,0 +1,80 @@
+import pytest
+
+from data_loader import InMemoryDataLoader
+from product_repository import ProductRepository
+from product_service import ProductError, ProductService
+from product_validator import ProductValidator
+from stock_watchlist import ALERT_LOW, ALERT_RESTOCKED, StockWatchlist
+
+
+@pytest.fixture
+def service():
+    service = ProductService(
+        ProductRepository(InMemoryDataLoader()), ProductValidator()
+    )
+    service.add_products(
+        (str(product_id), f"Item {product_id}", "2.00", str(product_id * 10))
+        for product_id in range(1, 11)
+    )
+    return service
+
+
+@pytest.fixture
+def repository(service):
+    return service._repository
+
+
+def test_watchlist_alerts_on_crossings_only(service, repository):
+    """Test that a product raises one alert when it goes low and one when restocked"""
+    watchlist = StockWatchlist(repository, default_threshold=15)
+    received = []
+    watchlist.add_callback(received.append)
+    assert watchlist.low_products() == [1]
+
+    service.adjust_stock(3, -20)
+    service.adjust_stock(3, -5)
+    service.adjust_stock(3, +40)
+
+    kinds = [(alert.kind, alert.product_id, alert.quantity) for alert in received]
+    assert kinds == [(ALERT_LOW, 3, 10), (ALERT_RESTOCKED, 3, 45)]
+    assert watchlist.alerts.qsize() == 2
+    assert watchlist.low_products() == [1]
+
+
+def test_watchlist_per_product_thresholds(service, repository):
+    """Test that a product's own threshold overrides the global one"""
+    watchlist = StockWatchlist(repository, default_threshold=5, thresholds={4: 40})
+    assert watchlist.low_products() == [4]
+
+    watchlist.set_threshold(6, 60)
+    alert = watchlist.alerts.get_nowait()
+    assert (alert.kind, alert.product_id, alert.threshold) == (ALERT_LOW, 6, 60)
+
+    service.add_product("11", "New", "1.00", "3")
+    assert watchlist.low_products() == [4, 6, 11]
+    repository.remove_product(11)
+    assert watchlist.low_products() == [4, 6]
+
+
+def test_watchlist_ignores_failing_callbacks(service, repository):
+    """Test that a failing callback neither blocks the writer nor the queue"""
+    watchlist = StockWatchlist(repository, default_threshold=15)
+    watchlist.add_callback(lambda alert: 1 / 0)
+
+    service.adjust_stock(2, -10)
+
+    assert watchlist.alerts.get_nowait().product_id == 2
+    watchlist.close()
+    service.adjust_stock(5, -50)
+    assert watchlist.alerts.empty()
+
+
+def test_low_stock_and_adjust_stock(service):
+    """Test that the lowest quantities come from the index and stock stays valid"""
+    service.adjust_stock(9, -85)
+
+    assert [product.product_id for product in service.low_stock(3)] == [9, 1, 2]
+    with pytest.raises(ProductError):
+        service.adjust_stock(1, -11)
+    with pytest.raises(ProductError):
+        service.adjust_stock(99, 1)
@@ -0,0 +1,156 @@
+import pytest
+
+from data_loader import DataLoader, InMemoryDataLoader
+from file_handler import FileHandler
+from framed_data_loader import FramedDataLoader
+from product import Product
+from product_repository import ProductRepository
+from storage_migration import (
+    MigrationError,
+    StorageMigration,
+    copy_records,
+    loader_products,
+)
+
+
+@pytest.fixture
+def json_loader(tmp_path):
+    return DataLoader(FileHandler(str(tmp_path / "products.json")))
+
+
+@pytest.fixture
+def framed_loader(tmp_path):
+    return FramedDataLoader(FileHandler(str(tmp_path / "products.framed")))
+
+
+@pytest.fixture
+def repository(json_loader):
+    repository = ProductRepository(json_loader)
+    repository.add_products(
+        Product(product_id, f"Item {product_id}", 1.0 + product_id, product_id)
+        for product_id in range(1, 301)
+    )
+    return repository
+
+
+def test_json_records_stream_in_both_directions(json_loader, repository):
+    """Test that streamed JSON reads and writes match load_data and save_data"""
+    data = json_loader.load_data()
+    assert dict(json_loader.iter_records(chunk_size=64)) == data
+
+    with open(json_loader.file_handler.filename) as file:
+        saved = file.read()
+    json_loader.write_records(data.items())
+    with open(json_loader.file_handler.filename) as file:
+        assert file.read() == saved
+
+
+def test_failed_chunked_write_keeps_its_error(tmp_path, monkeypatch):
+    """Test that a write failing before its temporary file exists reports the cause"""
+    handler = FileHandler(str(tmp_path / "products.json"))
+
+    def refuse(*args, **kwargs):
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr("file_handler.open", refuse, raising=False)
+    with pytest.raises(PermissionError):
+        handler.write_chunks([b"{}"])
+
+
+def test_framed_appends_override_earlier_records(framed_loader):
+    """Test that appended records replace or remove earlier ones"""
+    framed_loader.write_records([("1", {"a": 1}), ("2", {"a": 2})])
+    framed_loader.append_records([("1", {"a": 10}), ("2", None), ("3", {"a": 3})])
+
+    assert list(framed_loader.iter_records()) == [("1", {"a": 10}), ("3", {"a": 3})]
+    assert framed_loader.load_data() == {"1": {"a": 10}, "3": {"a": 3}}
+
+
+def test_copy_records_between_backends(json_loader, framed_loader, repository):
+    """Test an offline streaming copy from JSON to the framed format"""
+    count, _ = copy_records(json_loader, framed_loader)
+
+    assert count == 300
+    assert framed_loader.load_data() == json_loader.load_data()
+
+
+def test_online_migration_dual_writes_and_switches(repository, framed_loader):
+    """Test that changes during the migration reach the target before cutover"""
+    migration = StorageMigration(repository, framed_loader)
+    assert migration.copy() == 300
+
+    repository.add_product(Product(301, "New", 5.0, 1))
+    repository.update_quantity(7, 70)
+    repository.remove_product(9)
+    migration.cutover()
+
+    repository.add_product(Product(302, "After cutover", 5.0, 1))
+    stored = {product.product_id: product for product in loader_products(framed_loader)}
+    assert len(stored) == 301
+    assert stored[7].quantity == 70 and 9 not in stored and 302 in stored
+
+
+def test_cutover_refuses_a_diverged_target(repository):
+    """Test that a target that does not match the repository is not switched to"""
+    target = InMemoryDataLoader()
+    migration = StorageMigration(repository, target)
+    migration.copy()
+    target.append_records([("5", None)])
+
+    with pytest.raises(MigrationError):
+        migration.cutover()
+    assert repository.get_product_by_id(5) is not None
+
+
+def test_cutover_retries_a_target_caught_mid_write(repository, tmp_path, monkeypatch):
+    """Test that a partially written target is read again instead of failing"""
+    target = DataLoader(FileHandler(str(tmp_path / "target.json")))
+    migration = StorageMigration(repository, target)
+    migration.copy()
+    repository.update_quantity(3, 30)
+    reads = []
+
+    def read_mid_write(loader):
+        # The first read sees the file half written; the writer then finishes.
+        reads.append(loader)
+        if len(reads) > 1:
+            return loader_products(loader)
+        path = loader.file_handler.filename
+        with open(path) as file:
+            complete = file.read()
+        with open(path, "w") as file:
+            file.write(complete[: len(complete) // 2])
+        try:
+            return list(loader_products(loader))
+        finally:
+            with open(path, "w") as file:
+                file.write(complete)
+
+    monkeypatch.setattr("storage_migration.loader_products", read_mid_write)
+    assert migration.cutover()[0] == 300
+    assert len(reads) == 2
+    repository.add_product(Product(301, "After cutover", 5.0, 1))
+    assert "301" in target.load_data()
+
+
+def test_json_dual_writes_are_batched_and_atomic(repository, tmp_path, monkeypatch):
+    """Test that dual writes to a JSON target are grouped and replace the file"""
+    target = DataLoader(FileHandler(str(tmp_path / "target.json")))
+    migration = StorageMigration(repository, target)
+    migration.copy()
+    monkeypatch.setattr(target.file_handler, "write", pytest.fail)
+    appends = []
+    original = target.append_records
+    monkeypatch.setattr(
+        target,
+        "append_records",
+        lambda records: appends.append(records) or original(records),
+    )
+
+    for product_id in range(1, 151):
+        repository.update_quantity(product_id, 1000 + product_id)
+    migration.cutover()
+
+    assert [len(records) for records in appends] == [100, 50]
+    stored = {product.product_id: product for product in loader_products(target)}
+    assert len(stored) == 300 and stored[150].quantity == 1150
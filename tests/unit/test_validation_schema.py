@@ -0,0 +1,164 @@
+from types import SimpleNamespace
+
+import pytest
+
+from data_loader import InMemoryDataLoader
+from product_repository import ProductRepository
+from product_service import ProductError, ProductService
+from product_validator import ProductValidator
+from session_replay import replay_session
+from validation_schema import (
+    ERROR_EMPTY_NAME,
+    ERROR_ID_TOO_LONG,
+    ERROR_INVALID_ID,
+    ERROR_INVALID_QUANTITY,
+    ERROR_INVALID_PRICE,
+    ERROR_NON_POSITIVE_PRICE,
+    ERROR_PRICE_TOO_HIGH,
+    ERROR_QUANTITY_TOO_HIGH,
+    FIELD_ID,
+    FIELD_NAME,
+    FIELD_PRICE,
+    FIELD_QUANTITY,
+    PRODUCT_SCHEMA,
+    ProductSchema,
+    ValidatedRecord,
+)
+
+
+@pytest.fixture
+def service():
+    return ProductService(ProductRepository(InMemoryDataLoader()), ProductValidator())
+
+
+@pytest.mark.parametrize(
+    "price, expected",
+    [
+        ("12.34", (1234, None)),
+        (" 1.005 ", (101, None)),
+        (".5", (50, None)),
+        ("1e1", (1000, None)),
+        ("0.004", (None, ERROR_NON_POSITIVE_PRICE)),
+        ("-3", (None, ERROR_NON_POSITIVE_PRICE)),
+        ("abc", (None, ERROR_INVALID_PRICE)),
+        ("92233720368547758.07", (2**63 - 1, None)),
+        ("92233720368547758.075", (None, ERROR_PRICE_TOO_HIGH)),
+        ("1e20", (None, ERROR_PRICE_TOO_HIGH)),
+        (1e20, (None, ERROR_PRICE_TOO_HIGH)),
+    ],
+)
+def test_price_checks_return_cents_or_codes(price, expected):
+    """Test that price checks convert like to_cents and return error codes"""
+    assert PRODUCT_SCHEMA.check_price_cents(price) == expected
+
+
+def test_quantities_must_fit_the_stored_columns(service):
+    """Test that quantities above the 64-bit maximum are rejected, also by stock moves"""
+    assert PRODUCT_SCHEMA.check_quantity(str(2**63 - 1)) == (2**63 - 1, None)
+    assert PRODUCT_SCHEMA.check_quantity(str(2**63)) == (
+        None,
+        ERROR_QUANTITY_TOO_HIGH,
+    )
+
+    service.add_product("1", "Bolt", "0.10", str(2**63 - 1))
+    with pytest.raises(ProductError):
+        service.adjust_stock(1, 1)
+
+
+def test_digit_strings_too_long_for_int_are_error_codes(service):
+    """Test that digit strings int() refuses to convert are reported, not raised"""
+    digits = "1" * 5000
+
+    assert PRODUCT_SCHEMA.check_id(digits) == (None, ERROR_INVALID_ID)
+    assert PRODUCT_SCHEMA.check_id(f" {digits} ") == (None, ERROR_INVALID_ID)
+    assert PRODUCT_SCHEMA.check_quantity(digits) == (None, ERROR_INVALID_QUANTITY)
+    with pytest.raises(ProductError):
+        service.add_product("1", "a", "1", "9" * 5000)
+
+
+def test_limits_are_compiled_into_the_schema():
+    """Test ID and name limits of a schema compiled with custom lengths"""
+    schema = ProductSchema(max_id_length=3, max_name_length=4)
+
+    assert schema.check_id("999") == (999, None)
+    assert schema.check_id("1000") == (None, ERROR_ID_TOO_LONG)
+    assert schema.check_id("-100") == (None, ERROR_ID_TOO_LONG)
+    assert schema.check_name(" Cord ") == ("Cord", None)
+    assert schema.validate("1", "  ", "1", "1") == (None, ERROR_EMPTY_NAME)
+
+
+def test_only_schemas_issue_validated_records():
+    """Test that records come from validate() or a finished draft, not from callers"""
+    with pytest.raises(TypeError):
+        ValidatedRecord(1, "Fake", 100, 1, PRODUCT_SCHEMA)
+
+    draft = PRODUCT_SCHEMA.draft()
+    assert draft.set(FIELD_ID, "7") is None
+    assert draft.set(FIELD_NAME, "Lamp") is None
+    assert draft.set(FIELD_PRICE, "0") == ERROR_NON_POSITIVE_PRICE
+    assert draft.finish() is None
+    assert draft.set(FIELD_PRICE, "2.50") is None
+    assert draft.set(FIELD_QUANTITY, "0") is None
+
+    record = draft.finish()
+    assert (record.product_id, record.name, record.price_cents, record.quantity) == (
+        7,
+        "Lamp",
+        250,
+        0,
+    )
+
+
+def test_validated_records_cannot_be_changed(service):
+    """Test that the fields of an issued record cannot be reassigned"""
+    record, _ = PRODUCT_SCHEMA.validate("4", "Chair", "30", "1")
+
+    for field, value in [(FIELD_ID, -3), (FIELD_NAME, ""), (FIELD_PRICE, -500)]:
+        with pytest.raises(AttributeError):
+            setattr(record, field, value)
+
+    service.add_validated_product(record)
+    assert service.list_products()[0].price_cents == 3000
+
+    # Look-alikes of a record are validated like any other input.
+    forged = SimpleNamespace(
+        product_id=-3, name="", price_cents=-500, quantity=1, schema=PRODUCT_SCHEMA
+    )
+    with pytest.raises(ProductError):
+        service.add_validated_product(forged)
+
+
+def test_validated_records_skip_revalidation(service, monkeypatch):
+    """Test that the service stores a validated record with only a duplicate check"""
+    record, error = PRODUCT_SCHEMA.validate("5", "Desk", "80", "2")
+    assert error is None
+
+    def fail(*args):
+        raise AssertionError("revalidated")
+
+    monkeypatch.setattr(PRODUCT_SCHEMA, "check_id", fail)
+    service.add_validated_product(record)
+
+    assert service.product_exists(5)
+    with pytest.raises(ProductError):
+        service.add_validated_product(record)
+
+
+def test_records_from_other_limits_are_checked_again(service):
+    """Test that a record validated under looser limits is revalidated"""
+    loose = ProductSchema(max_name_length=100)
+    record, _ = loose.validate("6", "N" * 50, "1", "1")
+
+    with pytest.raises(ProductError):
+        service.add_validated_product(record)
+    assert not service.product_exists(6)
+
+
+def test_cli_adds_products_with_zero_quantity(service):
+    """Test that the CLI stores products entered with a quantity of 0"""
+    script = ["1", "9", "Shelf", "abc", "3", "0", "5"]
+
+    result = replay_session(service, ProductValidator(), script)
+
+    assert service.product_exists(9)
+    assert "Product price must be a valid number." in result.transcript
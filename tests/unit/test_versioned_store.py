@@ -0,0 +1,68 @@
+from versioned_store import MIN_COMPACTION, VersionedStore
+
+
+def test_snapshot_is_isolated_from_later_writes():
+    """Test that a snapshot keeps seeing the version it was taken at"""
+    store = VersionedStore([(1, "a"), (2, "b")])
+
+    with store.snapshot() as snapshot:
+        store.put(1, "a2")
+        store.put(3, "c")
+        store.put(2, None)
+
+        assert snapshot.get(1) == "a"
+        assert list(snapshot) == ["a", "b"]
+        assert len(snapshot) == 2
+
+    assert store.get(1) == "a2"
+    assert store.get(2) is None
+    assert list(store.keys()) == [1, 3]
+    assert len(store) == 2
+
+
+def test_put_many_publishes_one_version():
+    """Test that a batch of writes becomes visible as a single version"""
+    store = VersionedStore()
+
+    version = store.put_many([(1, "a"), (2, "b"), (1, "a2")])
+
+    assert version == store.version == 1
+    assert store.get(1) == "a2"
+    assert len(store) == 2
+
+
+def test_old_versions_are_reclaimed_when_snapshots_close():
+    """Test that superseded versions are freed once no snapshot needs them"""
+    store = VersionedStore([(1, "a")])
+    snapshot = store.snapshot()
+    store.put(1, "b")
+    store.put(1, "c")
+
+    assert len(store._chains[1]) == 3
+
+    snapshot.close()
+
+    assert store._chains[1] == [(store.version, "c")]
+    assert store.open_snapshots == 0
+
+
+def test_removed_keys_are_compacted_once_no_snapshot_sees_them():
+    """Test that tombstones and their order entries are reclaimed after removals"""
+    count = 4 * MIN_COMPACTION
+    store = VersionedStore((key, str(key)) for key in range(count))
+    snapshot = store.snapshot()
+    store.put_many((key, None) for key in range(1, count))
+
+    # The open snapshot still needs the removed keys.
+    assert len(store._order) == count
+    assert list(snapshot) == [str(key) for key in range(count)]
+
+    store.put(1, "back")
+    snapshot.close()
+    store.put(2, "again")
+
+    assert store._order == [0, 1, 2]
+    assert sorted(store._chains) == [0, 1, 2]
+    assert list(store.keys()) == [0, 1, 2]
+    with store.snapshot() as later:
+        assert list(later) == ["0", "back", "again"]
@@ -1,13 +1,36 @@
 # ui.py
 
+import sys
 from abc import ABC, abstractmethod
-from product_service import ProductService, format_price, ProductError
+from product_service import ProductService, ProductError
+from product_query import Query, QueryError, parse_query
 from product_validator import ProductValidator
+from validation_schema import (
+    FIELD_ID,
+    FIELD_NAME,
+    FIELD_PRICE,
+    FIELD_QUANTITY,
+    RecordDraft,
+    ValidatedRecord,
+)
 from io_handler import IOHandler
+from row_renderer import ProductRowRenderer
 from product_repository import ProductRepository
 from data_loader import DataLoader
 from file_handler import FileHandler
-from constants_messages import ProductMessages, DEFAULT_DATA_FILE
+from change_feed import ChangeFeed
+from inventory_history import InventoryHistory
+from profiling import ProfilingHooks, hooks_from_environment
+from typing import Optional
+from constants_messages import (
+    ProductMessages,
+    DEFAULT_DATA_FILE,
+    DEFAULT_BLOOM_FILE,
+    DEFAULT_CHANGE_LOG_FILE,
+    DEFAULT_MERKLE_FILE,
+    DEFAULT_HISTORY_FILE,
+    MENU_PROMPT,
+)
 
 
 class BaseUI(ABC):
@@ -34,6 +57,7 @@ class CLI(BaseUI):
         service: ProductService,
         validator: ProductValidator,
         io_handler: IOHandler,
+        profiler: Optional[ProfilingHooks] = None,
     ):
         """
         Initialize a CLI (Command Line Interface) instance.
@@ -41,16 +65,21 @@ class CLI(BaseUI):
         :param service: An instance of ProductService used for managing product data.
         :param validator: An instance of ProductValidator used for validating product data.
         :param io_handler: An instance of IOHandler for handling input and output operations.
+        :param profiler: The ProfilingHooks toggled from the menu, e.g. already enabled.
         """
         self._service = service
         self._validator = validator
         self._io = io_handler
+        self._renderer = ProductRowRenderer()
+        self._profiler = profiler or ProfilingHooks()
 
         # Menu items defined in a dictionary
         # Each menu item is associated with its corresponding function
         self.menu_items = {
             "Add Product": self.add_product,
             "List Products": self.list_products,
+            "Query Products": self.query_products,
+            "Start/Stop Profiling": self.toggle_profiling,
             "Exit": self.exit_app,
         }
 
@@ -65,23 +94,58 @@ class CLI(BaseUI):
     def main_loop(self):
         """
         Main loop for the CLI application.
+
+        Returns once the user selects "Exit".
         """
         while True:
             self.display_menu()
             try:
-                choice = int(self._io.input("Enter your choice: "))
+                choice = int(self._io.input(MENU_PROMPT))
+                # Negative indices would silently pick items from the end of the menu.
+                if not 1 <= choice <= len(self.menu_items):
+                    raise IndexError(choice)
                 # Fetching the function from menu items using the choice and executing it
                 selected_func = list(self.menu_items.values())[choice - 1]
                 selected_func()
             except (ValueError, IndexError):
                 self._io.print("Invalid choice! Please try again.")
+                continue
+
+            if selected_func == self.exit_app:
+                self._io.flush()
+                return
 
     def exit_app(self):
         """
-        Exit the application.
+        Exit the application, writing the profiling reports if profiling is on.
         """
+        if self._profiler.active:
+            self._stop_profiling()
         self._io.print("Goodbye!")
 
+    def toggle_profiling(self):
+        """
+        Start profiling, or stop it and show the report files that were written.
+        """
+        if not self._profiler.active:
+            try:
+                self._profiler.enable()
+            except RuntimeError as re:
+                self._io.print(str(re))
+                return
+            self._io.print("Profiling started.")
+            return
+
+        self._stop_profiling()
+
+    def _stop_profiling(self):
+        """
+        Stop profiling and show the report files that were written.
+        """
+        paths = self._profiler.disable()
+        self._io.print("Profiling stopped.")
+        self._io.write_lines(f"Wrote {path}" for path in paths)
+
     def list_products(self):
         """
         List all products available in the repository.
@@ -91,102 +155,130 @@ class CLI(BaseUI):
             self._io.print("No products available.")
             return
 
-        for product in products:
-            self._io.print(
-                f"ID: {product.product_id} | Name: {product.name} | Price: {format_price(product.price)} | Quantity: {product.quantity}"
+        self._io.write_lines(self._renderer.render_all(products))
+
+    def query_products(self):
+        """
+        Ask for a filter, sort order and limit, then show the plan and matching products.
+        """
+        try:
+            predicate = parse_query(
+                self._io.input(
+                    "Enter filter, e.g. quantity < 5 and price between 10 and 50 "
+                    "and name starts with 'USB' (or press Enter for all): "
+                )
             )
+            sort_words = self._io.input(
+                "Sort by id, name, price or quantity, add 'desc' to reverse "
+                "(or press Enter for none): "
+            ).split()
+            limit_text = self._io.input("Limit (or press Enter for none): ").strip()
+            query = Query(
+                predicate,
+                sort_by=sort_words[0] if sort_words else None,
+                descending=sort_words[1:] == ["desc"],
+                limit=int(limit_text) if limit_text else None,
+            )
+        except QueryError as qe:
+            self._io.print(str(qe))
+            return
+        except ValueError:
+            self._io.print(ProductMessages.INVALID_QUERY_LIMIT)
+            return
+
+        self._io.write_lines(self._service.explain(query).describe())
+        products = self._service.query(query)
+        if not products:
+            self._io.print("No matching products.")
+            return
+        self._io.write_lines(self._renderer.render_all(products))
 
     def add_product(self):
         """
         Add a new product to the repository.
         """
-        product_id, name, price, quantity = self.get_product_details()
-        if product_id and name and price and quantity:
+        record = self.get_product_details()
+        if record is not None:
             try:
-                result = self._service.add_product(product_id, name, price, quantity)
+                result = self._service.add_validated_product(record)
                 if result:  # Only print if result is truthy
                     self._io.print(result)
             except ProductError as pe:
                 self._io.print(str(pe))
 
-    def get_product_details(self):
+    def get_product_details(self) -> Optional[ValidatedRecord]:
         """
-        Get details for a new product from user input.
+        Get details for a new product from user input, checking each as it is entered.
 
-        :return: A tuple containing product_id, name, price, and quantity.
+        :return: The validated product details, or None if the user cancelled.
         """
-        product_id = self.input_with_validation(
-            "Enter product ID (or press Enter to cancel): ",
-            self._validator.validate_product_id,
-            ProductMessages.INVALID_INTEGER + " " + ProductMessages.INPUT_VALUE,
-        )
-
-        if product_id is None:
-            return None, None, None, None
+        draft = self._validator.schema.draft()
+        if not self.input_with_validation(
+            "Enter product ID (or press Enter to cancel): ", draft, FIELD_ID
+        ):
+            return None
 
-        if self._service.product_exists(product_id):
+        if self._service.product_exists(draft.get(FIELD_ID)):
             self._io.print(
                 ProductMessages.DUPLICATE_PRODUCT_ID + " " + ProductMessages.INPUT_VALUE
             )
-            return None, None, None, None
-
-        name = self.input_with_validation(
-            "Enter product name (or press Enter to cancel): ",
-            self._validator.validate_product_name,
-            "Invalid product name. Please enter again or press Enter to cancel.",
-        )
-        if name is None:
-            return None, None, None, None
+            return None
 
-        price = self.input_with_validation(
-            "Enter product price (or press Enter to cancel): ",
-            self._validator.validate_product_price,
-            ProductMessages.INVALID_PRICE + " " + ProductMessages.INPUT_VALUE,
-        )
-        if price is None:
-            return None, None, None, None
-
-        quantity = self.input_with_validation(
-            "Enter product quantity (or press Enter to cancel): ",
-            self._validator.validate_product_quantity,
-            ProductMessages.INVALID_QUANTITY + " " + ProductMessages.INPUT_VALUE,
-        )
-        if quantity is None:
-            return None, None, None, None
+        for prompt, field in (
+            ("Enter product name (or press Enter to cancel): ", FIELD_NAME),
+            ("Enter product price (or press Enter to cancel): ", FIELD_PRICE),
+            ("Enter product quantity (or press Enter to cancel): ", FIELD_QUANTITY),
+        ):
+            if not self.input_with_validation(prompt, draft, field):
+                return None
 
-        return product_id, name, price, quantity
+        return draft.finish()
 
-    def input_with_validation(self, prompt: str, validation_func, error_msg: str):
+    def input_with_validation(self, prompt: str, draft: RecordDraft, field: str):
         """
-        Get user input with validation.
+        Get user input for one field of a draft until it is valid.
 
         :param prompt: The input prompt message.
-        :param validation_func: The validation function to apply to the input.
-        :param error_msg: The error message to display on validation failure.
-        :return: Validated input value.
+        :param draft: The RecordDraft the value is checked by and kept in.
+        :param field: The field being entered, one of validation_schema.RECORD_FIELDS.
+        :return: True once the field is set, False if the user cancelled.
         """
         while True:
             value = self._io.input(prompt)
             if not value.strip():
-                return None
+                return False
 
-            try:
-                validated_value = validation_func(value)
-                return validated_value
-            except ValueError as ve:
-                self._io.print(str(ve))
+            error = draft.set(field, value)
+            if error is None:
+                return True
+            self._io.print(draft.schema.message(error))
 
 
 # The entry point of the program.
 if __name__ == "__main__":
+    # Enabled before the repository is built so that loading is profiled too.
+    profiler = hooks_from_environment()
+
     # Dependency injection is used here for greater flexibility and testability.
     file_handler = FileHandler(DEFAULT_DATA_FILE)
     loader = DataLoader(file_handler)
-    repository = ProductRepository(loader)
+    try:
+        repository = ProductRepository(
+            loader,
+            bloom_handler=FileHandler(DEFAULT_BLOOM_FILE),
+            change_feed=ChangeFeed(FileHandler(DEFAULT_CHANGE_LOG_FILE)),
+            merkle_handler=FileHandler(DEFAULT_MERKLE_FILE),
+        )
+    except ValueError as e:
+        # A data file that cannot be read must not be replaced by an empty catalog.
+        sys.exit(str(e))
+    history = InventoryHistory(repository, FileHandler(DEFAULT_HISTORY_FILE))
     validator = ProductValidator()
-    io_handler = (
-        IOHandler()
-    )  # Assuming IOHandler is a separate class for handling input/output operations.
-    service = ProductService(repository, validator)
-    cli = CLI(service, validator, io_handler)
-    cli.main_loop()
+    # Output redirected to a file or pipe is buffered; an interactive terminal is not.
+    io_handler = IOHandler(buffered=not sys.stdout.isatty())
+    service = ProductService(repository, validator, history)
+    cli = CLI(service, validator, io_handler, profiler)
+    try:
+        cli.main_loop()
+    finally:
+        history.close()
@@ -0,0 +1,359 @@
+# validation_schema.py
+# Validates product input without using exceptions for control flow.
+# SRP: ProductSchema turns raw product input into typed values or error codes, and
+# issues ValidatedRecord tokens for input that passed every check.
+
+import re
+from operator import itemgetter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from constants_messages import (
+    MAX_PRODUCT_ID_LENGTH,
+    MAX_PRODUCT_NAME_LENGTH,
+    MAX_PRODUCT_PRICE_CENTS,
+    MAX_PRODUCT_QUANTITY,
+    ProductMessages,
+)
+from money import to_cents
+
+FIELD_ID: str = "product_id"
+FIELD_NAME: str = "name"
+FIELD_PRICE: str = "price_cents"
+FIELD_QUANTITY: str = "quantity"
+RECORD_FIELDS: Tuple[str, ...] = (FIELD_ID, FIELD_NAME, FIELD_PRICE, FIELD_QUANTITY)
+
+ERROR_INVALID_ID: str = "invalid_id"
+ERROR_ID_TOO_LONG: str = "id_too_long"
+ERROR_NON_POSITIVE_ID: str = "non_positive_id"
+ERROR_EMPTY_NAME: str = "empty_name"
+ERROR_NAME_TOO_LONG: str = "name_too_long"
+ERROR_INVALID_PRICE: str = "invalid_price"
+ERROR_NON_POSITIVE_PRICE: str = "non_positive_price"
+ERROR_PRICE_TOO_HIGH: str = "price_too_high"
+ERROR_INVALID_QUANTITY: str = "invalid_quantity"
+ERROR_NEGATIVE_QUANTITY: str = "negative_quantity"
+ERROR_QUANTITY_TOO_HIGH: str = "quantity_too_high"
+
+ERROR_MESSAGES: Dict[str, str] = {
+    ERROR_INVALID_ID: ProductMessages.INVALID_INTEGER,
+    ERROR_ID_TOO_LONG: ProductMessages.ID_TOO_LONG,
+    ERROR_NON_POSITIVE_ID: ProductMessages.NON_POSITIVE_ID,
+    ERROR_EMPTY_NAME: ProductMessages.EMPTY_NAME,
+    ERROR_NAME_TOO_LONG: ProductMessages.NAME_TOO_LONG,
+    ERROR_INVALID_PRICE: ProductMessages.INVALID_PRICE,
+    ERROR_NON_POSITIVE_PRICE: ProductMessages.NON_POSITIVE_PRICE,
+    ERROR_PRICE_TOO_HIGH: ProductMessages.PRICE_TOO_HIGH,
+    ERROR_INVALID_QUANTITY: ProductMessages.INVALID_QUANTITY,
+    ERROR_NEGATIVE_QUANTITY: ProductMessages.NEGATIVE_QUANTITY,
+    ERROR_QUANTITY_TOO_HIGH: ProductMessages.QUANTITY_TOO_HIGH,
+}
+
+# Digit strings up to this length are converted with int() directly. Longer ones go
+# through _parse_integer, which also copes with strings too long for int() to convert.
+_MAX_FAST_INTEGER_DIGITS: int = 19
+
+# Up to this many integer digits, Decimal (28 significant digits) and integer
+# arithmetic round a price the same way.
+_MAX_FAST_PRICE_DIGITS: int = 18
+
+# Plain input takes these patterns. Anything else that int() or to_cents() could
+# still accept, such as exponents or underscores, is handed to them as before; input
+# that does not even match _NUMBER_CHARACTERS is rejected without trying.
+_INTEGER = re.compile(r"\s*([+-]?)([0-9]+)\s*", re.ASCII)
+_PRICE = re.compile(
+    rf"\s*([+-]?)(?:([0-9]{{1,{_MAX_FAST_PRICE_DIGITS}}})(?:\.([0-9]*))?"
+    r"|\.([0-9]+))\s*",
+    re.ASCII,
+)
+_NUMBER_CHARACTERS = re.compile(r"[\s\d._eE+-]*")
+
+# A check returns the typed value and None, or None and an error code.
+CheckResult = Tuple[Any, Optional[str]]
+
+# Only ProductSchema holds this key, so only it can create ValidatedRecord objects.
+_ISSUER = object()
+
+
+class ValidatedRecord(tuple):
+    """
+    Product input that passed every check of a ProductSchema.
+
+    A service can store it without validating it again. It says nothing about
+    whether the product ID is still unused. Records are tuples, so their fields
+    cannot be changed after the schema issued them.
+
+    Attributes:
+    - product_id: The product ID.
+    - name: The stripped name.
+    - price_cents: The price in whole cents.
+    - quantity: The quantity in stock.
+    - schema: The ProductSchema that validated the record.
+    """
+
+    __slots__ = ()
+
+    def __new__(
+        cls,
+        product_id: int,
+        name: str,
+        price_cents: int,
+        quantity: int,
+        schema: "ProductSchema",
+        issuer: object = None,
+    ):
+        if issuer is not _ISSUER:
+            raise TypeError("ValidatedRecord objects are issued by ProductSchema.")
+        return tuple.__new__(cls, (product_id, name, price_cents, quantity, schema))
+
+    product_id = property(itemgetter(0))
+    name = property(itemgetter(1))
+    price_cents = property(itemgetter(2))
+    quantity = property(itemgetter(3))
+    schema = property(itemgetter(4))
+
+    def __repr__(self) -> str:
+        return (
+            f"ValidatedRecord({self.product_id!r}, {self.name!r}, "
+            f"{self.price_cents!r}, {self.quantity!r})"
+        )
+
+
+def _parse_integer(value) -> Optional[int]:
+    """
+    Convert input to an integer the way int() does, without raising.
+
+    :param value: A string or number.
+    :return: The integer, or None if int() would reject the value.
+    """
+    if type(value) is int:
+        return value
+    try:
+        if isinstance(value, str):
+            # Decimal digits, in any script, are exactly what int() accepts unadorned.
+            if value.isdecimal():
+                return int(value)
+            match = _INTEGER.fullmatch(value)
+            if match is not None:
+                number = int(match.group(2))
+                return -number if match.group(1) == "-" else number
+            if _NUMBER_CHARACTERS.fullmatch(value) is None:
+                return None
+        return int(value)
+    except (TypeError, ValueError):
+        # ValueError also covers digit strings longer than int() converts.
+        return None
+
+
+class ProductSchema:
+    """
+    Product validation rules compiled from the configured limits.
+
+    Every check returns (value, None) on success and (None, error code) on failure;
+    ERROR_MESSAGES maps the codes to user-facing messages. Length limits are turned
+    into numeric bounds once, so IDs are never converted back to text.
+
+    Attributes:
+    - max_id_length: The most characters a product ID may have.
+    - max_name_length: The most characters a product name may have.
+    - _id_bound: The smallest positive ID that is too long.
+    - _negative_id_bound: The smallest magnitude of a negative ID that is too long.
+    - _checks: The check of every field in RECORD_FIELDS.
+    """
+
+    def __init__(
+        self,
+        max_id_length: int = MAX_PRODUCT_ID_LENGTH,
+        max_name_length: int = MAX_PRODUCT_NAME_LENGTH,
+    ):
+        """
+        Compile a ProductSchema.
+
+        :param max_id_length: The most characters a product ID may have.
+        :param max_name_length: The most characters a product name may have.
+        """
+        self.max_id_length = max_id_length
+        self.max_name_length = max_name_length
+        self._id_bound = 10**max_id_length
+        # The minus sign counts towards the length of a negative ID.
+        self._negative_id_bound = 10 ** (max_id_length - 1)
+        self._checks: Dict[str, Callable[[Any], CheckResult]] = {
+            FIELD_ID: self.check_id,
+            FIELD_NAME: self.check_name,
+            FIELD_PRICE: self.check_price_cents,
+            FIELD_QUANTITY: self.check_quantity,
+        }
+
+    @staticmethod
+    def message(error: str) -> str:
+        return ERROR_MESSAGES[error]
+
+    def check(self, field: str, value) -> CheckResult:
+        return self._checks[field](value)
+
+    def check_id(self, product_id) -> CheckResult:
+        if type(product_id) is str and (
+            product_id.isdecimal() and len(product_id) <= _MAX_FAST_INTEGER_DIGITS
+        ):
+            value = int(product_id)
+        else:
+            value = _parse_integer(product_id)
+        if value is None:
+            return None, ERROR_INVALID_ID
+        if value >= self._id_bound or -value >= self._negative_id_bound:
+            return None, ERROR_ID_TOO_LONG
+        if value <= 0:
+            return None, ERROR_NON_POSITIVE_ID
+        return value, None
+
+    def check_name(self, name: str) -> CheckResult:
+        name = name.strip()
+        if not name:
+            return None, ERROR_EMPTY_NAME
+        if len(name) > self.max_name_length:
+            return None, ERROR_NAME_TOO_LONG
+        return name, None
+
+    def check_price_cents(self, price) -> CheckResult:
+        """
+        Check a price and convert it to whole cents, rounding half up.
+
+        :param price: The price as a string or number.
+        :return: The price in cents, or the error code.
+        """
+        if isinstance(price, str):
+            whole, _, fraction = price.partition(".")
+            if not (
+                price.isascii()
+                and (whole.isdecimal() or not whole and fraction)
+                and (fraction.isdecimal() or not fraction)
+                and len(whole) <= _MAX_FAST_PRICE_DIGITS
+            ):
+                match = _PRICE.fullmatch(price)
+                if match is None:
+                    return self._convert_price(price)
+                if match.group(1) == "-":
+                    return None, ERROR_NON_POSITIVE_PRICE
+                whole = match.group(2) or ""
+                fraction = match.group(3) or match.group(4) or ""
+            price_cents = int(whole or 0) * 100 + int(fraction[:2].ljust(2, "0"))
+            if fraction[2:3] >= "5":
+                price_cents += 1
+        else:
+            return self._convert_price(price)
+        # Prices that round to zero cents are not positive either.
+        if price_cents <= 0:
+            return None, ERROR_NON_POSITIVE_PRICE
+        if price_cents > MAX_PRODUCT_PRICE_CENTS:
+            return None, ERROR_PRICE_TOO_HIGH
+        return price_cents, None
+
+    @staticmethod
+    def _convert_price(price) -> CheckResult:
+        if isinstance(price, str) and not _NUMBER_CHARACTERS.fullmatch(price):
+            return None, ERROR_INVALID_PRICE
+        try:
+            price_cents = to_cents(price)
+        except ValueError:
+            return None, ERROR_INVALID_PRICE
+        if price_cents <= 0:
+            return None, ERROR_NON_POSITIVE_PRICE
+        if price_cents > MAX_PRODUCT_PRICE_CENTS:
+            return None, ERROR_PRICE_TOO_HIGH
+        return price_cents, None
+
+    def check_quantity(self, quantity) -> CheckResult:
+        if type(quantity) is str and (
+            quantity.isdecimal() and len(quantity) <= _MAX_FAST_INTEGER_DIGITS
+        ):
+            value = int(quantity)
+        else:
+            value = _parse_integer(quantity)
+            if value is None:
+                return None, ERROR_INVALID_QUANTITY
+            if value < 0:
+                return None, ERROR_NEGATIVE_QUANTITY
+        if value > MAX_PRODUCT_QUANTITY:
+            return None, ERROR_QUANTITY_TOO_HIGH
+        return value, None
+
+    def validate(
+        self, product_id, name: str, price, quantity
+    ) -> Tuple[Optional[ValidatedRecord], Optional[str]]:
+        """
+        Check a whole record, field by field in RECORD_FIELDS order.
+
+        :param product_id: The product ID.
+        :param name: The product name.
+        :param price: The price in dollars, e.g. "12.34".
+        :param quantity: The quantity in stock.
+        :return: (ValidatedRecord, None), or (None, the code of the first error).
+        """
+        valid_id, error = self.check_id(product_id)
+        if error is not None:
+            return None, error
+        valid_name, error = self.check_name(name)
+        if error is not None:
+            return None, error
+        valid_price, error = self.check_price_cents(price)
+        if error is not None:
+            return None, error
+        valid_quantity, error = self.check_quantity(quantity)
+        if error is not None:
+            return None, error
+        return self._issue(valid_id, valid_name, valid_price, valid_quantity), None
+
+    def draft(self) -> "RecordDraft":
+        return RecordDraft(self)
+
+    def _issue(
+        self, product_id: int, name: str, price_cents: int, quantity: int
+    ) -> ValidatedRecord:
+        return ValidatedRecord(product_id, name, price_cents, quantity, self, _ISSUER)
+
+
+class RecordDraft:
+    """
+    A record filled in one field at a time, e.g. from interactive prompts.
+
+    Each field is checked as it is set, so finishing the draft needs no further
+    validation.
+
+    Attributes:
+    - schema: The ProductSchema checking the fields.
+    - _values: The checked values set so far, by field.
+    """
+
+    def __init__(self, schema: ProductSchema):
+        self.schema = schema
+        self._values: Dict[str, Any] = {}
+
+    def set(self, field: str, value) -> Optional[str]:
+        """
+        Check a field and keep its value if it is valid.
+
+        :param field: One of RECORD_FIELDS.
+        :param value: The raw input.
+        :return: None if the value was kept, otherwise the error code.
+        """
+        checked, error = self.schema.check(field, value)
+        if error is None:
+            self._values[field] = checked
+        return error
+
+    def get(self, field: str):
+        return self._values.get(field)
+
+    def finish(self) -> Optional[ValidatedRecord]:
+        """
+        Turn the draft into a ValidatedRecord.
+
+        :return: The record, or None if a field has not been set.
+        """
+        if len(self._values) < len(RECORD_FIELDS):
+            return None
+        return self.schema._issue(*(self._values[field] for field in RECORD_FIELDS))
+
+
+# The schema of the configured limits, shared so that records validated by one
+# ProductValidator are accepted by services using another.
+PRODUCT_SCHEMA = ProductSchema()
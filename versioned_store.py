@@ -0,0 +1,302 @@
+# versioned_store.py
+# Multi-version storage for products, giving readers consistent point-in-time snapshots.
+# SRP: VersionedStore keeps the version history of each key and reclaims versions that
+# no open snapshot can see any more; CatalogSnapshot is a read-only view at one version.
+
+import bisect
+import threading
+import weakref
+from typing import Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+# A version chain holds (version, value) pairs in ascending version order.
+# A value of None is a tombstone marking the key as removed at that version.
+Chain = List[Tuple[int, Optional[V]]]
+
+# Removed keys are compacted away in batches of at least this many.
+MIN_COMPACTION: int = 64
+
+
+class VersionedStore(Generic[V]):
+    """
+    A map from integer keys to values where every write creates a new version.
+
+    Writers append to per-key version chains and then publish the new version number,
+    so they never copy the map and never disturb readers. A snapshot only records the
+    version it was taken at; it reads, for every key, the newest entry not newer than
+    that version. Old entries are dropped as soon as no open snapshot needs them, and
+    keys removed before every open snapshot are compacted away in batches.
+
+    Readers never take the lock to read; it only guards writes, snapshot registration
+    and reclamation.
+
+    Attributes:
+    - _chains: The version chain of every key stored and not yet compacted away.
+    - _order: Keys in first-insertion order; snapshots read a prefix of it. Compaction
+      replaces the list, so snapshots keep the one they were taken with.
+    - _version: The latest published version.
+    - _live_count: The number of non-removed keys at the latest version.
+    - _readers: The number of open snapshots per version.
+    - _multi_version_keys: Keys whose chain holds more than one entry.
+    - _removals: (version, key) of every tombstone written, in version order.
+    - _lock: Protects publication, reader registration and reclamation.
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, V]] = (), version: int = 0):
+        """
+        Initialize a VersionedStore holding the given items at the given version.
+
+        :param items: Initial (key, value) pairs.
+        :param version: The version number of the initial state.
+        """
+        self._chains: Dict[int, Chain] = {}
+        self._order: List[int] = []
+        self._version = version
+        self._live_count = 0
+        self._readers: Dict[int, int] = {}
+        self._multi_version_keys = set()
+        self._removals: List[Tuple[int, int]] = []
+        self._lock = threading.Lock()
+        for key, value in items:
+            if key not in self._chains:
+                self._order.append(key)
+                self._live_count += 1
+            self._chains[key] = [(version, value)]
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def get(self, key: int) -> Optional[V]:
+        """
+        Get the latest value of a key.
+
+        :param key: The key to look up.
+        :return: The value, or None if the key is absent or removed.
+        """
+        chain = self._chains.get(key)
+        if chain is None:
+            return None
+        return _value_at(chain, self._version)
+
+    def __contains__(self, key: int) -> bool:
+        return self.get(key) is not None
+
+    def keys(self) -> Iterator[int]:
+        """
+        Iterate over the keys present at the latest version.
+
+        :return: An iterator over keys in first-insertion order.
+        """
+        chains = self._chains
+        version = self._version
+        for key in self._order[:]:
+            chain = chains.get(key)
+            if chain is not None and _value_at(chain, version) is not None:
+                yield key
+
+    def put(self, key: int, value: Optional[V]) -> int:
+        """
+        Write one value, or a tombstone if value is None, as a new version.
+
+        :param key: The key to write.
+        :param value: The new value, or None to remove the key.
+        :return: The version that was published.
+        """
+        return self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[Tuple[int, Optional[V]]]) -> int:
+        """
+        Write several values atomically as one new version.
+
+        :param items: The (key, value) pairs to write; None values remove keys.
+        :return: The version that was published.
+        """
+        with self._lock:
+            version = self._version + 1
+            live_delta = 0
+            written = []
+            for key, value in items:
+                chain = self._chains.get(key)
+                if chain is None:
+                    chain = self._chains[key] = []
+                    self._order.append(key)
+                    was_live = False
+                else:
+                    was_live = _value_at(chain, version) is not None
+                if chain and chain[-1][0] == version:
+                    # The same key written twice in one batch: the last write wins.
+                    chain[-1] = (version, value)
+                else:
+                    chain.append((version, value))
+                live_delta += (value is not None) - was_live
+                if value is None:
+                    self._removals.append((version, key))
+                written.append(key)
+
+            # Publishing the version number makes the new entries visible at once.
+            self._live_count += live_delta
+            self._version = version
+            horizon = self._horizon()
+            for key in written:
+                self._prune(key, horizon)
+            self._compact(horizon)
+        return version
+
+    def snapshot(self) -> "CatalogSnapshot[V]":
+        """
+        Take a consistent, read-only view of the latest version.
+
+        The snapshot should be closed, preferably with a with-statement, so the
+        versions it pins can be reclaimed; it is also released when garbage collected.
+
+        :return: A CatalogSnapshot.
+        """
+        with self._lock:
+            version = self._version
+            self._readers[version] = self._readers.get(version, 0) + 1
+            return CatalogSnapshot(
+                self, version, self._order, len(self._order), self._live_count
+            )
+
+    @property
+    def open_snapshots(self) -> int:
+        return sum(self._readers.values())
+
+    def _release(self, version: int) -> None:
+        with self._lock:
+            remaining = self._readers[version] - 1
+            if remaining:
+                self._readers[version] = remaining
+                return
+            del self._readers[version]
+            horizon = self._horizon()
+            for key in list(self._multi_version_keys):
+                self._prune(key, horizon)
+            self._compact(horizon)
+
+    def _horizon(self) -> int:
+        # The oldest version any reader, present or future, can still ask for.
+        return min(self._readers, default=self._version)
+
+    def _prune(self, key: int, horizon: int) -> None:
+        chain = self._chains[key]
+        keep_from = 0
+        for index in range(len(chain) - 1, -1, -1):
+            if chain[index][0] <= horizon:
+                keep_from = index
+                break
+        if keep_from:
+            # Readers may be scanning the old list, so it is replaced rather than cut.
+            chain = self._chains[key] = chain[keep_from:]
+        if len(chain) > 1:
+            self._multi_version_keys.add(key)
+        else:
+            self._multi_version_keys.discard(key)
+
+    def _compact(self, horizon: int) -> None:
+        # Each compaction scans _order, so it only runs once the removals no reader can
+        # see any more are enough to pay for the scan.
+        reclaimable = bisect.bisect_left(self._removals, (horizon + 1,))
+        if reclaimable < max(MIN_COMPACTION, len(self._order) // 2):
+            return
+        chains = self._chains
+        order = []
+        for key in self._order:
+            chain = chains[key]
+            # A lone tombstone no reader can see past means the key is simply absent.
+            if len(chain) == 1 and chain[0][1] is None and chain[0][0] <= horizon:
+                del chains[key]
+            else:
+                order.append(key)
+        # Readers may be scanning the old list, so it is replaced rather than edited.
+        self._order = order
+        del self._removals[:reclaimable]
+
+
+class CatalogSnapshot(Generic[V]):
+    """
+    An immutable view of a VersionedStore at one version.
+
+    Attributes:
+    - version: The version the snapshot was taken at.
+    """
+
+    def __init__(
+        self,
+        store: VersionedStore,
+        version: int,
+        order: List[int],
+        order_length: int,
+        count: int,
+    ):
+        """
+        Initialize a CatalogSnapshot; use VersionedStore.snapshot instead.
+
+        :param store: The store the snapshot reads from.
+        :param version: The version the snapshot sees.
+        :param order: The key order of the store at that version.
+        :param order_length: How many keys of the order existed at that version.
+        :param count: How many keys were present at that version.
+        """
+        self._store = store
+        self.version = version
+        self._order = order
+        self._order_length = order_length
+        self._count = count
+        self._finalizer = weakref.finalize(self, store._release, version)
+
+    def get(self, key: int) -> Optional[V]:
+        """
+        Get the value of a key as of this snapshot.
+
+        :param key: The key to look up.
+        :return: The value, or None if the key was absent or removed.
+        """
+        chain = self._store._chains.get(key)
+        if chain is None:
+            return None
+        return _value_at(chain, self.version)
+
+    def __contains__(self, key: int) -> bool:
+        return self.get(key) is not None
+
+    def __iter__(self) -> Iterator[V]:
+        chains = self._store._chains
+        order = self._order
+        version = self.version
+        for index in range(self._order_length):
+            # Compacted keys were removed before this version.
+            chain = chains.get(order[index])
+            if chain is None:
+                continue
+            value = _value_at(chain, version)
+            if value is not None:
+                yield value
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """
+        Release the snapshot so the versions it pins can be reclaimed.
+        """
+        self._finalizer()
+
+    def __enter__(self) -> "CatalogSnapshot[V]":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _value_at(chain: Chain, version: int) -> Optional[V]:
+    # Chains are short (usually one entry), so a backwards scan beats bisect.
+    for entry_version, value in reversed(chain):
+        if entry_version <= version:
+            return value
+    return None